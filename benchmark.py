@@ -0,0 +1,334 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+OPERATIONS = ['organize_directory', 'clean_temp_files', 'clean_browser_cache']
+
+# Default extension mix: weight per extension, including some unknown ones
+DEFAULT_EXTENSIONS = {
+    '.jpg': 20, '.png': 10, '.pdf': 10, '.docx': 5, '.txt': 10, '.mp3': 5,
+    '.mp4': 5, '.zip': 5, '.py': 5, '.exe': 2, '.tar.gz': 3, '.dat': 10, '': 10,
+}
+
+# Audit events that correspond to filesystem calls. os.stat is not audited,
+# so stat calls are only visible through the /proc syscall counters.
+AUDITED_CALLS = {
+    'open', 'os.scandir', 'os.listdir', 'os.rename', 'os.remove', 'os.rmdir',
+    'os.mkdir', 'os.utime', 'os.chmod', 'shutil.copyfile', 'shutil.rmtree',
+}
+
+
+def parse_extensions(spec):
+    """Parse an extension mix such as 'jpg:5,pdf:3,:1' into a weight dict."""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition(':')
+        name = name.strip()
+        if name and not name.startswith('.'):
+            name = '.' + name
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def generate_tree(root, files=1000, depth=0, extensions=None, duplicate_ratio=0.0,
+                  min_size=0, max_size=4096, seed=0):
+    """Create a reproducible synthetic directory tree for benchmarking.
+
+    Files are spread over root and, with depth > 0, nested subfolders up
+    to depth levels deep. duplicate_ratio is the fraction of top-level
+    files whose names already exist in root's category folders, so they
+    need a _1, _2 suffix when organized. The same arguments always
+    produce the same tree.
+
+    Returns the number of files created (not counting the pre-existing
+    duplicates).
+    """
+    rng = random.Random(seed)
+    mix = extensions or DEFAULT_EXTENSIONS
+    choices = list(mix)
+    weights = [mix[extension] for extension in choices]
+
+    # Three folders per level, each inside one of the previous level's
+    folders = [root]
+    level_folders = [root]
+    for level in range(depth):
+        level_folders = [os.path.join(rng.choice(level_folders), f"dir{level}_{index}")
+                         for index in range(3)]
+        folders.extend(level_folders)
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    organizer = None
+    payload = rng.getrandbits(8 * max(max_size, 1)).to_bytes(max(max_size, 1), 'little')
+    for number in range(files):
+        extension = rng.choices(choices, weights)[0]
+        folder = root if not depth or rng.random() < 0.5 else rng.choice(folders)
+        name = f"file_{number:07d}{extension}"
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(payload[:rng.randint(min_size, max_size)])
+
+        if folder == root and rng.random() < duplicate_ratio:
+            if organizer is None:
+                from file_organizer import FileOrganizer
+                organizer = FileOrganizer()
+            existing = os.path.join(root, organizer.get_file_category(name))
+            os.makedirs(existing, exist_ok=True)
+            open(os.path.join(existing, name), 'wb').close()
+
+    return files
+
+
+class _ScratchTrashBackend:
+    """Trash backend that moves items into a scratch folder.
+
+    Keeps repeated benchmark runs from filling the real recycle bin.
+    """
+
+    def __init__(self, scratch):
+        self.scratch = scratch
+        self._counter = itertools.count()
+        os.makedirs(scratch, exist_ok=True)
+
+    def trash_many(self, paths):
+        for path in paths:
+            try:
+                os.rename(path, os.path.join(self.scratch, str(next(self._counter))))
+            except OSError as e:
+                yield path, e
+            else:
+                yield path, None
+
+
+def _proc_io():
+    try:
+        with open('/proc/self/io') as f:
+            return {key: int(value) for key, value in
+                    (line.split(': ') for line in f.read().splitlines())}
+    except (OSError, ValueError):
+        return {}
+
+
+def _run_operation(operation, tree, workers, real_trash):
+    """Run one operation in this (fresh) process and measure it."""
+    # Point every location the cleaners read at the synthetic tree
+    os.environ['TEMP'] = os.path.join(tree, 'temp')
+    os.environ['LOCALAPPDATA'] = os.path.join(tree, 'local')
+    os.environ['APPDATA'] = os.path.join(tree, 'roaming')
+    os.environ.setdefault('WINDIR', os.path.join(tree, 'windows'))
+
+    from file_organizer import FileOrganizer, logger
+    from platform_backends import WindowsPlatform
+    logger.disabled = True
+
+    organizer = FileOrganizer(workers=workers)
+    # The tree has the Windows layout, found through the variables above
+    organizer.platform = WindowsPlatform()
+    organizer.temp_locations = [os.path.join(tree, 'temp')]
+    if not real_trash:
+        organizer.trash_backend = _ScratchTrashBackend(os.path.join(tree, '.trash'))
+
+    calls = {}
+
+    def audit(event, args):
+        if event in AUDITED_CALLS:
+            calls[event] = calls.get(event, 0) + 1
+
+    sys.addaudithook(audit)
+    io_before = _proc_io()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    if operation == 'organize_directory':
+        processed = organizer.organize_directory(
+            os.path.join(tree, 'organize'), recursive=True)
+    else:
+        processed = getattr(organizer, operation)()
+
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+    io_after = _proc_io()
+    audited = dict(calls)
+    calls.clear()
+
+    syscalls = {key: io_after[key] - io_before.get(key, 0)
+                for key in ('syscr', 'syscw') if key in io_after}
+    peak_rss_kb = None
+    if resource is not None:
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        'processed': processed,
+        'seconds': wall_time,
+        'cpu_seconds': cpu_time,
+        'filesystem_calls': audited,
+        'read_write_syscalls': syscalls,
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+def _prepare(operation, tree, config):
+    """Generate the input tree for an operation; returns the file count."""
+    tree_options = dict(files=config['files'], depth=config['depth'],
+                        extensions=config['extensions'],
+                        duplicate_ratio=config['duplicate_ratio'],
+                        min_size=config['min_size'], max_size=config['max_size'],
+                        seed=config['seed'])
+    if operation == 'organize_directory':
+        return generate_tree(os.path.join(tree, 'organize'), **tree_options)
+    if operation == 'clean_temp_files':
+        # The temp cleaner only looks at the top level
+        tree_options['depth'] = 0
+        return generate_tree(os.path.join(tree, 'temp'), **tree_options)
+
+    # Spread the files over the Chrome cache folders the cleaner looks in
+    cache = os.path.join(tree, 'local', 'Google', 'Chrome', 'User Data', 'Default')
+    tree_options['files'] = config['files'] // 3
+    count = 0
+    for index, folder in enumerate(('Cache', 'Code Cache', 'GPUCache')):
+        tree_options['seed'] = config['seed'] + index
+        count += generate_tree(os.path.join(cache, folder), **tree_options)
+    return count
+
+
+def run_benchmarks(config, operations=OPERATIONS, base_dir=None, repeat=1):
+    """Time each operation on freshly generated trees.
+
+    Each run happens in its own process, so peak RSS is per operation.
+    The best of repeat runs is kept.
+    """
+    if base_dir is None:
+        base_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+    context = multiprocessing.get_context('spawn')
+    results = {}
+
+    for operation in operations:
+        best = None
+        for _ in range(repeat):
+            tree = tempfile.mkdtemp(prefix='file_organizer_bench_', dir=base_dir)
+            try:
+                files = _prepare(operation, tree, config)
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(_run_operation, operation, tree,
+                                         config['workers'], config['real_trash']).result()
+            finally:
+                shutil.rmtree(tree, ignore_errors=True)
+
+            result['files'] = files
+            result['files_per_sec'] = files / result['seconds'] if result['seconds'] else None
+            if best is None or result['seconds'] < best['seconds']:
+                best = result
+        results[operation] = best
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Compare files/sec against a baseline; returns a list of regressions."""
+    regressions = []
+    for operation, result in results.items():
+        previous = baseline.get('results', {}).get(operation)
+        if not previous or not previous.get('files_per_sec') or not result['files_per_sec']:
+            continue
+        change = result['files_per_sec'] / previous['files_per_sec'] - 1
+        result['change'] = change
+        if change < -tolerance:
+            regressions.append(operation)
+    return regressions
+
+
+def print_table(results):
+    print(f"{'Operation':<22}{'Files':>9}{'Seconds':>10}{'Files/sec':>12}"
+          f"{'Peak RSS KB':>13}{'Change':>9}")
+    for operation, result in results.items():
+        rate = result['files_per_sec']
+        change = result.get('change')
+        print(f"{operation:<22}{result['files']:>9}{result['seconds']:>10.3f}"
+              f"{rate if rate is not None else 0:>12.0f}"
+              f"{result['peak_rss_kb'] or 0:>13}"
+              f"{'' if change is None else f'{change:+.1%}':>9}")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark File Organizer operations on synthetic directory trees")
+    parser.add_argument("--files", type=int, default=10000,
+                        help="Number of files per generated tree (default: 10000)")
+    parser.add_argument("--depth", type=int, default=0,
+                        help="Levels of nested subfolders (default: 0)")
+    parser.add_argument("--extensions", type=parse_extensions, metavar="MIX",
+                        help="Extension weights, e.g. 'jpg:5,pdf:3,:1' ('' is no extension)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1,
+                        help="Fraction of files whose names already exist in the destination")
+    parser.add_argument("--min-size", type=int, default=0,
+                        help="Smallest file size in bytes (default: 0)")
+    parser.add_argument("--max-size", type=int, default=4096,
+                        help="Largest file size in bytes (default: 4096)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed for the generated trees")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="FileOrganizer worker threads")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per operation; the fastest is kept")
+    parser.add_argument("--operation", action="append", choices=OPERATIONS,
+                        help="Only benchmark this operation (may be repeated)")
+    parser.add_argument("--dir", type=str,
+                        help="Where to generate trees (default: /dev/shm if present)")
+    parser.add_argument("--real-trash", action="store_true",
+                        help="Send trashed items to the real recycle bin instead of a scratch folder")
+    parser.add_argument("--baseline", type=str, metavar="FILE",
+                        help="Compare results against a baseline saved with --save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed slowdown against the baseline before failing (default: 0.1)")
+    parser.add_argument("--save-baseline", type=str, metavar="FILE",
+                        help="Save the results as a JSON baseline")
+
+    args = parser.parse_args()
+
+    config = {
+        'files': args.files,
+        'depth': args.depth,
+        'extensions': args.extensions,
+        'duplicate_ratio': args.duplicate_ratio,
+        'min_size': args.min_size,
+        'max_size': args.max_size,
+        'seed': args.seed,
+        'workers': args.workers,
+        'real_trash': args.real_trash,
+    }
+
+    results = run_benchmarks(config, args.operation or OPERATIONS,
+                             base_dir=args.dir, repeat=args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print("Warning: baseline was recorded with different settings")
+        regressions = compare(results, baseline, args.tolerance)
+
+    print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+
+    if regressions:
+        print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,47 @@
+import threading
+
+
+class CancelToken:
+    """Lets one thread stop or pause work running on others.
+
+    The work calls proceed() between batches. It returns True straight
+    away normally, waits while the token is paused, and returns False
+    once the token is cancelled, at which point the work stops starting
+    new batches and finishes the one in flight.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        """Ask the work to stop; paused work wakes up to do so."""
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self):
+        """Hold the work back at its next proceed() until resume() or cancel()."""
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def sleep(self, seconds):
+        """Wait up to seconds, returning early with True if the token is cancelled."""
+        return self._cancelled.wait(seconds)
+
+    def proceed(self):
+        """Return True if the work may go on, waiting first while paused."""
+        if not self._running.is_set():
+            self._running.wait()
+        return not self._cancelled.is_set()
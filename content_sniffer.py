@@ -0,0 +1,141 @@
+import re
+import threading
+
+# Bytes read from the start of each file
+HEADER_SIZE = 4096
+
+# Magic bytes at the start of a file and the extension they stand for.
+# Earlier entries win, so more specific signatures come first.
+SIGNATURES = [
+    (rb'\x89PNG\r\n\x1a\n', '.png'),
+    (rb'\xff\xd8\xff', '.jpg'),
+    (rb'GIF8[79]a', '.gif'),
+    (rb'RIFF.{4}WEBP', '.webp'),
+    (rb'II\*\x00|MM\x00\*', '.tiff'),
+    (rb'%PDF-', '.pdf'),
+    (rb'\{\\rtf', '.rtf'),
+    (rb'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', '.doc'),
+    (rb'PK\x03\x04.{26}mimetypeapplication/vnd\.oasis\.opendocument\.text', '.odt'),
+    (rb'PK\x03\x04(?=.*?word/)', '.docx'),
+    (rb'PK\x03\x04(?=.*?xl/)', '.xlsx'),
+    (rb'PK\x03\x04(?=.*?ppt/)', '.pptx'),
+    (rb'PK\x03\x04', '.zip'),
+    (rb'Rar!\x1a\x07', '.rar'),
+    (rb"7z\xbc\xaf'\x1c", '.7z'),
+    (rb'\x1f\x8b', '.gz'),
+    (rb'BZh[1-9]', '.bz2'),
+    (rb'\xfd7zXZ\x00', '.xz'),
+    (rb'.{257}ustar', '.tar'),
+    (rb'ID3|\xff[\xfb\xf3\xf2]', '.mp3'),
+    (rb'fLaC', '.flac'),
+    (rb'OggS', '.ogg'),
+    (rb'RIFF.{4}WAVE', '.wav'),
+    (rb'RIFF.{4}AVI ', '.avi'),
+    (rb'.{4}ftypM4[AB] ', '.m4a'),
+    (rb'.{4}ftypqt  ', '.mov'),
+    (rb'.{4}ftyp', '.mp4'),
+    (rb'\x1aE\xdf\xa3(?=.{0,64}webm)', '.webm'),
+    (rb'\x1aE\xdf\xa3', '.mkv'),
+    (rb'FLV\x01', '.flv'),
+    (rb'0&\xb2u\x8ef\xcf\x11', '.wmv'),
+    (rb'\x00\x00\x01[\xba\xb3]', '.mpeg'),
+    (rb'MZ', '.exe'),
+]
+
+# Text files, told apart by how they start
+TEXT_SIGNATURES = [
+    (rb'#![^\n]*python', '.py'),
+    (rb'#![^\n]*node', '.js'),
+    (rb'#![^\n]*ruby', '.rb'),
+    (rb'#![^\n]*php', '.php'),
+    (rb'\s*(?:<!doctype html|<html)', '.html'),
+]
+
+_signatures = re.compile(
+    b'|'.join(b'(?P<_sig%d>%s)' % (index, pattern)
+              for index, (pattern, _) in enumerate(SIGNATURES)),
+    re.DOTALL)
+_text_signatures = re.compile(
+    b'|'.join(b'(?P<_sig%d>%s)' % (index, pattern)
+              for index, (pattern, _) in enumerate(TEXT_SIGNATURES)),
+    re.IGNORECASE)
+
+
+def _looks_like_text(header, length):
+    if header.find(b'\x00', 0, length) >= 0:
+        return False
+    try:
+        str(memoryview(header)[:length], 'utf-8')
+    except UnicodeDecodeError as e:
+        # The read may have cut a character in half
+        return e.start >= length - 3 and e.reason == 'unexpected end of data'
+    return True
+
+
+class ContentSniffer:
+    """Guesses file types from their first bytes.
+
+    At most HEADER_SIZE bytes are read per file, into a buffer reused for
+    every file read on the same thread, and matched against all of
+    SIGNATURES in one regex match. Files with no binary signature whose
+    start is valid UTF-8 count as text. Results are cached by (inode,
+    size, mtime), in memory and in a ScanState if one is given, so an
+    unchanged file is only ever read once.
+    """
+
+    # Entries kept in the in-memory cache before it is emptied
+    max_cached = 100000
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cache = {}
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = bytearray(HEADER_SIZE)
+        return buffer
+
+    def sniff_header(self, header, length=None):
+        """Return the extension for a file starting with header, or None if unknown.
+
+        Only the first length bytes of header are looked at, if given.
+        """
+        if length is None:
+            length = len(header)
+        match = _signatures.match(header, 0, length)
+        if match is not None:
+            return SIGNATURES[int(match.lastgroup[len('_sig'):])][1]
+        if length and _looks_like_text(header, length):
+            match = _text_signatures.match(header, 0, length)
+            if match is not None:
+                return TEXT_SIGNATURES[int(match.lastgroup[len('_sig'):])][1]
+            return '.txt'
+        return None
+
+    def sniff(self, entry, state=None):
+        """Return the extension a ScanEntry's content suggests, or None if unknown.
+
+        Raises OSError if the file can't be read.
+        """
+        stat = entry.stat()
+        key = (entry.inode(), stat.st_size, stat.st_mtime_ns)
+        if key in self._cache:
+            return self._cache[key]
+        if state is not None:
+            found, extension = state.content_type(key)
+            if found:
+                self._cache[key] = extension
+                return extension
+
+        buffer = self._buffer()
+        with open(entry.path, 'rb', buffering=0) as f:
+            count = f.readinto(buffer)
+        extension = self.sniff_header(buffer, count)
+
+        if len(self._cache) >= self.max_cached:
+            self._cache.clear()
+        self._cache[key] = extension
+        if state is not None:
+            state.set_content_type(key, extension)
+        return extension
@@ -0,0 +1,244 @@
+import heapq
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from file_scanner import compile_patterns, scan_directory, walk_directory
+
+# Levels of subfolders a tree is split into, at most, to share it out
+MAX_SPLIT_DEPTH = 3
+
+
+def format_size(size):
+    """Format a byte count for people, e.g. '1.5 GB'."""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class UsageReport:
+    """File counts and byte totals of a directory tree.
+
+    Totals are kept per category, per extension and per directory (each
+    directory up to directory_depth levels down counts everything below
+    it), along with the top_n largest files, and the number of folders
+    that could not be read. Reports built from separate parts of a tree
+    can be combined with merge().
+    """
+
+    def __init__(self, top, top_n=20, directory_depth=2):
+        self.top = top
+        self.top_n = top_n
+        self.directory_depth = directory_depth
+        self.total_files = 0
+        self.total_bytes = 0
+        self.unreadable = 0
+        self.categories = {}    # category -> [files, bytes]
+        self.extensions = {}    # extension -> [files, bytes]
+        self.directories = {}   # path relative to top -> [files, bytes]
+        self._largest = []      # min-heap of (size, path)
+        self._prefix_length = len(os.path.join(top, ''))
+
+    @staticmethod
+    def _add_to(table, key, size):
+        totals = table.get(key)
+        if totals is None:
+            table[key] = [1, size]
+        else:
+            totals[0] += 1
+            totals[1] += size
+
+    def add(self, path, size, category):
+        """Count one file."""
+        self.total_files += 1
+        self.total_bytes += size
+        self._add_to(self.categories, category, size)
+        self._add_to(self.extensions, os.path.splitext(path)[1].lower(), size)
+
+        parts = path[self._prefix_length:].split(os.sep)[:-1]
+        for depth in range(1, min(len(parts), self.directory_depth) + 1):
+            self._add_to(self.directories, os.sep.join(parts[:depth]), size)
+
+        if len(self._largest) < self.top_n:
+            heapq.heappush(self._largest, (size, path))
+        elif size > self._largest[0][0]:
+            heapq.heapreplace(self._largest, (size, path))
+
+    def merge(self, other):
+        """Add the totals of another report of the same tree to this one."""
+        self.total_files += other.total_files
+        self.total_bytes += other.total_bytes
+        self.unreadable += other.unreadable
+        for mine, theirs in ((self.categories, other.categories),
+                             (self.extensions, other.extensions),
+                             (self.directories, other.directories)):
+            for key, (files, size) in theirs.items():
+                totals = mine.setdefault(key, [0, 0])
+                totals[0] += files
+                totals[1] += size
+        for item in other._largest:
+            if len(self._largest) < self.top_n:
+                heapq.heappush(self._largest, item)
+            elif item[0] > self._largest[0][0]:
+                heapq.heapreplace(self._largest, item)
+
+    def largest(self):
+        """Return the largest files as (size, path) pairs, biggest first."""
+        return sorted(self._largest, reverse=True)
+
+    def to_dict(self):
+        def table(totals):
+            return {key: {'files': files, 'bytes': size}
+                    for key, (files, size) in sorted(totals.items(), key=lambda item: -item[1][1])}
+
+        return {
+            'directory': self.top,
+            'total_files': self.total_files,
+            'total_bytes': self.total_bytes,
+            'unreadable_directories': self.unreadable,
+            'categories': table(self.categories),
+            'extensions': table(self.extensions),
+            'directories': table(self.directories),
+            'largest': [{'path': path, 'bytes': size} for size, path in self.largest()],
+        }
+
+    def write_json(self, path):
+        """Write the report to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self, rows=10):
+        """Return the report as a plain-text table, with at most rows lines per section."""
+        lines = [f"{self.top}: {self.total_files} files, {format_size(self.total_bytes)}"]
+        if self.unreadable:
+            lines.append(f"{self.unreadable} folders could not be read and are not counted")
+
+        def section(title, totals, label=lambda key: key):
+            if not totals:
+                return
+            lines.append("")
+            lines.append(f"{title:<40}{'Files':>10}{'Size':>12}")
+            ranked = sorted(totals.items(), key=lambda item: -item[1][1])
+            for key, (files, size) in ranked[:rows]:
+                lines.append(f"{label(key)[:40]:<40}{files:>10}{format_size(size):>12}")
+
+        section("Category", self.categories)
+        section("Extension", self.extensions, lambda key: key or "(none)")
+        section("Directory", self.directories)
+
+        largest = self.largest()[:rows]
+        if largest:
+            lines.append("")
+            lines.append("Largest files")
+            for size, path in largest:
+                lines.append(f"{format_size(size):>10}  {path}")
+
+        return '\n'.join(lines)
+
+
+def _split_tree(top, max_depth, exclude, tasks_wanted):
+    """List directories to hand out to workers, going deeper until there are enough.
+
+    Returns (subtrees as (path, depth) pairs, files found on the way,
+    number of directories that could not be listed).
+    """
+    is_excluded = compile_patterns(exclude or [])
+    level = [(top, 0)]
+    files = []
+    unreadable = 0
+    for _ in range(MAX_SPLIT_DEPTH):
+        if len(level) >= tasks_wanted:
+            break
+        next_level = []
+        for directory, depth in level:
+            if max_depth is not None and depth > max_depth:
+                continue
+            try:
+                entries = scan_directory(directory)
+            except OSError:
+                unreadable += 1
+                continue
+            for entry in entries:
+                if is_excluded is not None and is_excluded(entry.name):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    next_level.append((entry.path, depth + 1))
+                elif entry.is_file():
+                    files.append(entry)
+        level = next_level
+        if not level:
+            break
+    return level, files, unreadable
+
+
+def analyze_tree(top, classify_many, max_depth=None, workers=None, top_n=20,
+                 directory_depth=2, exclude=None):
+    """Build a UsageReport for a directory tree.
+
+    The tree is split into subtrees that a pool of threads walk with
+    walk_directory, each into its own partial report; the partial
+    reports are merged at the end, so no locking is needed while walking.
+
+    Args:
+        top: Directory to analyze
+        classify_many: Function returning the category of each of a list
+            of file names, such as FileOrganizer.classify_many
+        max_depth: Levels of subfolders to include; None for all
+        workers: Threads to use (default: one per CPU)
+        top_n: How many of the largest files to keep
+        directory_depth: Levels of subfolders to keep totals for
+        exclude: Name patterns (see file_scanner.compile_patterns) to skip
+    """
+    workers = workers or os.cpu_count() or 1
+    subtrees, files, unreadable = _split_tree(top, max_depth, exclude, workers * 4)
+    # Subtrees deeper than max_depth were only listed for their files
+    if max_depth is not None:
+        subtrees = [(path, depth) for path, depth in subtrees if depth <= max_depth]
+
+    def add_batch(report, entries):
+        sizes = []
+        for entry in entries:
+            try:
+                sizes.append((entry.path, entry.size))
+            except OSError:
+                continue
+        categories = classify_many([os.path.basename(path) for path, _ in sizes])
+        for (path, size), category in zip(sizes, categories):
+            report.add(path, size, category)
+
+    def walk(subtree):
+        path, depth = subtree
+        report = UsageReport(top, top_n, directory_depth)
+
+        def unreadable_folder(path, error):
+            report.unreadable += 1
+
+        entries = walk_directory(path, exclude=exclude, on_error=unreadable_folder,
+                                 max_depth=None if max_depth is None else max_depth - depth)
+        # The walk is lazy, so the subtree's own folder is only opened
+        # by the first batch
+        try:
+            while True:
+                batch = list(itertools.islice(entries, 1000))
+                if not batch:
+                    return report
+                add_batch(report, batch)
+        except OSError:
+            report.unreadable += 1
+            return report
+
+    report = UsageReport(top, top_n, directory_depth)
+    report.unreadable = unreadable
+    add_batch(report, files)
+
+    if len(subtrees) == 1 or workers == 1:
+        for subtree in subtrees:
+            report.merge(walk(subtree))
+    else:
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix='FileOrganizerUsage') as pool:
+            for partial in pool.map(walk, subtrees):
+                report.merge(partial)
+    return report
@@ -0,0 +1,114 @@
+import hashlib
+import os
+
+# Bytes hashed from each end of a file by the quick pass
+EDGE_SIZE = 64 * 1024
+# Read buffer for full hashes; large reads keep syscalls per file low
+BUFFER_SIZE = 1024 * 1024
+# Below this many files, hashing in-process beats starting a process pool
+POOL_THRESHOLD = 64
+
+
+def edge_hash(path):
+    """Hash the first and last EDGE_SIZE bytes of a file (and its size)."""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        digest.update(size.to_bytes(8, 'little'))
+        digest.update(f.read(EDGE_SIZE))
+        if size > 2 * EDGE_SIZE:
+            f.seek(-EDGE_SIZE, os.SEEK_END)
+            digest.update(f.read(EDGE_SIZE))
+        elif size > EDGE_SIZE:
+            # The two ends overlap; the rest of the file is all there is
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """Hash the whole file, reading it through one reusable large buffer."""
+    digest = hashlib.blake2b()
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+def _safe_hash(args):
+    hash_function, path = args
+    try:
+        return path, hash_function(path)
+    except OSError:
+        # Unreadable or vanished; it can't be shown to be a duplicate
+        return path, None
+
+
+def _hash_paths(paths, hash_function, workers):
+    """Hash paths, returning {path: digest} for those that could be read."""
+    jobs = [(hash_function, path) for path in paths]
+    if workers == 1 or len(jobs) < POOL_THRESHOLD:
+        results = map(_safe_hash, jobs)
+        return {path: digest for path, digest in results if digest is not None}
+
+    # Imported here, as it pulls in multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_safe_hash, jobs, chunksize=16)
+        return {path: digest for path, digest in results if digest is not None}
+
+
+def _group_by(paths, key):
+    """Group paths by key(path), keeping only groups of two or more."""
+    groups = {}
+    for path in paths:
+        value = key(path)
+        if value is not None:
+            groups.setdefault(value, []).append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicate_groups(files, workers=None):
+    """Find groups of files with identical content.
+
+    files is an iterable of (path, size) pairs. Work happens in stages so
+    only likely duplicates are read in full:
+
+    1. Files are bucketed by size; files with a unique size are dropped.
+    2. The first and last 64 KiB of each remaining file are hashed.
+    3. Files still sharing a hash are hashed in full.
+
+    Hashing runs on a process pool of the given size (None uses one
+    process per CPU). Empty files are ignored. Returns a list of groups,
+    each a sorted list of two or more paths.
+    """
+    sizes = {}
+    for path, size in files:
+        if size:
+            sizes[path] = size
+
+    candidates = [path for group in _group_by(sizes, sizes.get) for path in group]
+    if not candidates:
+        return []
+
+    # The size is part of the edge hash, so every bucket can share one pass
+    edge_hashes = _hash_paths(candidates, edge_hash, workers)
+    duplicates = []
+    to_read = []
+    for group in _group_by(candidates, edge_hashes.get):
+        if sizes[group[0]] <= 2 * EDGE_SIZE:
+            # Files no bigger than both edges have been hashed in full already
+            duplicates.append(group)
+        else:
+            to_read.extend(group)
+
+    full_hashes = _hash_paths(to_read, full_hash, workers)
+    duplicates.extend(_group_by(
+        to_read, lambda path: full_hashes.get(path) and (edge_hashes[path], full_hashes[path])))
+
+    return sorted(sorted(group) for group in duplicates)
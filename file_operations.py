@@ -0,0 +1,241 @@
+import collections
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from file_scanner import scan_directory
+from move_engine import MoveEngine
+from trash_backend import get_trash_backend
+
+# Operation actions
+MOVE = 'move'
+TRASH = 'trash'
+SKIP = 'skip'  # Recorded in plans only; performing it does nothing
+
+
+# Used for moves when no mover is given
+_default_mover = MoveEngine().move
+# Used for trash operations performed on their own; made on first use
+_trash_backend = None
+
+
+def _default_trash():
+    global _trash_backend
+    if _trash_backend is None:
+        _trash_backend = get_trash_backend()
+    return _trash_backend
+
+
+class FileOperation:
+    """A single planned move or trash of a file or directory.
+
+    After perform(), elapsed holds the seconds it took.
+    """
+
+    # Fields kept in plans and journals
+    FIELDS = ('action', 'source', 'destination', 'category', 'size', 'reason')
+    __slots__ = FIELDS + ('elapsed',)
+
+    def __init__(self, action, source, destination=None, category=None,
+                 size=None, reason=None):
+        self.action = action
+        self.source = source
+        self.destination = destination
+        self.category = category
+        self.size = size
+        self.reason = reason
+        self.elapsed = None
+
+    def __repr__(self):
+        return f"<FileOperation {self.action} {self.source!r} -> {self.destination!r}>"
+
+    def to_dict(self):
+        """Return the operation as a JSON-serializable dict."""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create an operation from a dict made by to_dict()."""
+        return cls(**{name: data.get(name) for name in cls.FIELDS})
+
+    def perform(self, mover=None):
+        """Carry out the operation, raising on failure.
+
+        Moves go through mover(source, destination) if given, otherwise
+        through a shared MoveEngine; trash goes to this platform's trash
+        backend. FileOrganizer batches its trash operations instead.
+        """
+        started = time.perf_counter()
+        try:
+            if self.action == MOVE:
+                (mover or _default_mover)(self.source, self.destination)
+            elif self.action == TRASH:
+                _default_trash().trash(self.source)
+            elif self.action != SKIP:
+                raise ValueError(f"Unknown file operation: {self.action}")
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+
+def write_plan(operations, plan_path):
+    """Write operations to a JSON Lines plan file as they are produced.
+
+    Returns the number of operations written.
+    """
+    count = 0
+    with open(plan_path, 'w', encoding='utf-8') as plan_file:
+        for operation in operations:
+            plan_file.write(json.dumps(operation.to_dict()) + '\n')
+            count += 1
+    return count
+
+
+def read_plan(plan_path):
+    """Read operations back from a JSON Lines plan file, one at a time."""
+    with open(plan_path, 'r', encoding='utf-8') as plan_file:
+        for line_number, line in enumerate(plan_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield FileOperation.from_dict(json.loads(line))
+            except (ValueError, TypeError, AttributeError) as e:
+                raise ValueError(
+                    f"Invalid plan entry on line {line_number} of {plan_path}: {e}")
+
+
+class DestinationNames:
+    """Hands out free file names in destination folders without probing.
+
+    Each folder is listed once, the first time a name is needed in it,
+    and names are tracked in memory from then on. Conflicting names get
+    the first free _1, _2, ... suffix, and a counter per base name means
+    a thousand IMG_0001.jpg copies cost one set lookup each rather than a
+    growing number of exists() calls.
+
+    Names are compared with os.path.normcase, so on Windows two names
+    differing only in case count as a conflict, as they do on disk.
+    """
+
+    def __init__(self):
+        self._taken = {}     # folder -> set of normcased names in use
+        self._counters = {}  # (folder, base, extension) -> next suffix to try
+
+    def _names_in(self, folder):
+        names = self._taken.get(folder)
+        if names is None:
+            try:
+                names = {os.path.normcase(entry.name)
+                         for entry in scan_directory(folder)}
+            except FileNotFoundError:
+                names = set()
+            self._taken[folder] = names
+        return names
+
+    def allocate(self, folder, name):
+        """Reserve a free name for name in folder and return its full path."""
+        taken = self._names_in(folder)
+        candidate = name
+
+        if os.path.normcase(candidate) in taken:
+            base_name, extension = os.path.splitext(name)
+            key = (folder, os.path.normcase(base_name), os.path.normcase(extension))
+            counter = self._counters.get(key, 1)
+            candidate = f"{base_name}_{counter}{extension}"
+            while os.path.normcase(candidate) in taken:
+                counter += 1
+                candidate = f"{base_name}_{counter}{extension}"
+            self._counters[key] = counter + 1
+
+        taken.add(os.path.normcase(candidate))
+        return os.path.join(folder, candidate)
+
+    def release(self, path):
+        """Give back a name reserved by allocate(), e.g. after a failed move."""
+        folder, name = os.path.split(path)
+        self._names_in(folder).discard(os.path.normcase(name))
+
+
+class SerialExecutor:
+    """Runs operations one after another on the calling thread."""
+
+    workers = 1
+
+    def __init__(self, mover=None):
+        self.mover = mover
+
+    def run(self, operations):
+        """Perform each operation, yielding (operation, error) pairs.
+
+        error is None when the operation succeeded, otherwise the exception
+        it raised. Results are yielded in the order operations were given.
+        """
+        for operation in operations:
+            try:
+                operation.perform(self.mover)
+            except Exception as e:
+                yield operation, e
+            else:
+                yield operation, None
+
+
+class ThreadPoolOperationExecutor:
+    """Runs operations concurrently on a bounded pool of worker threads.
+
+    At most max_pending operations are in flight at once, so an iterator
+    of operations is consumed lazily rather than queued up front. Results
+    are yielded in the order the operations were given, like
+    SerialExecutor, so callers can use either one.
+
+    Destination names must already be resolved when operations reach the
+    executor (organize_directory does this while planning, in name
+    order), so the order in which workers finish cannot change which file
+    receives which _1, _2 suffix.
+    """
+
+    def __init__(self, workers, max_pending=None, mover=None, initializer=None):
+        self.workers = workers
+        self.mover = mover
+        self.initializer = initializer
+        self.max_pending = max_pending or workers * 4
+
+    def run(self, operations):
+        """Perform the operations, yielding (operation, error) pairs.
+
+        If operations raises (e.g. PhaseTimeout), the results of the
+        operations already handed out are yielded before it is re-raised.
+        """
+        pending = collections.deque()
+        error = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='FileOrganizer',
+                                initializer=self.initializer) as pool:
+            try:
+                for operation in operations:
+                    pending.append((operation, pool.submit(operation.perform, self.mover)))
+                    if len(pending) >= self.max_pending:
+                        operation, future = pending.popleft()
+                        yield operation, future.exception()
+            except Exception as e:
+                error = e
+
+            while pending:
+                operation, future = pending.popleft()
+                yield operation, future.exception()
+        if error is not None:
+            raise error
+
+
+def make_executor(workers=1, mover=None, initializer=None):
+    """Return an executor running operations on the given number of threads.
+
+    mover, if given, is called as mover(source, destination) for moves.
+    initializer, if given, is called on each thread that performs
+    operations before it starts on them. It may change the thread for
+    good (e.g. lower its priority), so with one worker the operations
+    then run on a worker thread of their own rather than the caller's.
+    """
+    workers = workers or 1
+    if workers <= 1 and initializer is None:
+        return SerialExecutor(mover)
+    return ThreadPoolOperationExecutor(workers, mover=mover, initializer=initializer)
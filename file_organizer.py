@@ -1,11 +1,30 @@
 import os
-import shutil
-import datetime
+import contextlib
+import itertools
 import logging
-import winreg
-import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import send2trash  # Need to install this package
+from file_operations import (MOVE, SKIP, TRASH, DestinationNames, FileOperation,
+                             make_executor, read_plan, write_plan)
+from cancellation import CancelToken
+from content_sniffer import ContentSniffer
+from disk_usage import analyze_tree
+from duplicate_finder import find_duplicate_groups
+from file_scanner import scan_directory, scan_names, walk_directory
+from folder_watcher import make_watcher, settled_files
+from io_throttle import IO_CLASSES, IOPriority, RateLimiter
+from move_engine import MoveEngine
+from operation_journal import (DEFAULT_JOURNAL_DIR, OperationJournal, journal_path, prune_runs,
+                               read_journal)
+from platform_backends import FIREFOX_CACHE_FOLDERS, get_platform
+from process_probe import ProcessProbe
+from retention_policy import DAY, ORDERS, RetentionPolicy, RetentionQueue
+from rules_engine import load_rules, parse_size
+from run_metrics import RunMetrics
+from scan_state import DEFAULT_STATE_PATH, ScanState
+from trash_backend import DirectDeleteBackend, TrashBatch, get_trash_backend
 
 # Set up logging
 logging.basicConfig(
@@ -15,9 +34,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger('FileOrganizer')
 
+# Old temp items found in use are only probed again after this long
+IN_USE_RECHECK = DAY
+
+
+class PhaseTimeout(Exception):
+    """Raised inside a cleanup phase that ran past its time limit."""
+
+
+def _protected_temp_item(name):
+    """Return why a temp location entry must never be removed, or None."""
+    name = name.lower()
+    if name.startswith('.trash-'):
+        return "trash folder"
+    if name.startswith('systemd-private-'):
+        return "private temp folder of a system service"
+    return None
+
+
+def _holds_special_files(directory):
+    """Return True if a folder holds sockets, pipes or devices at its top level."""
+    try:
+        for entry in scan_directory(directory):
+            if not (entry.is_file() or entry.is_dir() or entry.is_symlink()):
+                return True
+    except OSError:
+        pass
+    return False
+
 
 class FileOrganizer:
-    def __init__(self):
+    def __init__(self, workers=1, io_priority=None):
         # Define file types and their corresponding folders
         self.file_types = {
             'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.ico', '.svg', '.webp'],
@@ -30,12 +77,12 @@ class FileOrganizer:
             'Others': []  # For files that don't match any category
         }
 
-        # Define paths of temporary files that can be safely deleted
-        self.temp_locations = [
-            os.path.join(os.environ['TEMP']),
-            os.path.join(os.environ['LOCALAPPDATA'], 'Temp'),
-            os.path.join(os.environ['WINDIR'], 'Temp')
-        ]
+        # Temp, browser cache and recycle bin locations of this system
+        # (see platform_backends); looked up on first use, as are
+        # temp_locations and trash_backend, so constructing an organizer
+        # touches neither the environment nor platform modules
+        self._platform = None
+        self._temp_locations = None
 
         # Define paths of download and desktop folders for organizing
         self.download_folder = os.path.join(
@@ -66,40 +113,386 @@ class FileOrganizer:
             'firefox': 'firefox.exe',
         }
 
+        # Moves files; renames within a filesystem and copies across them.
+        # Set move_engine.progress to follow large cross-device copies.
+        self.move_engine = MoveEngine()
+
+        # Snapshot of running processes and their open files, shared by
+        # every check in a run
+        self.process_probe = ProcessProbe()
+
+        # Optional io_throttle.IOPriority the threads carrying out moves
+        # and trash operations run at
+        self.io_priority = io_priority
+        self._io_priority_failed = False
+
+        # Executor that carries out planned moves and trash operations.
+        # Any object with a compatible run() method can be swapped in.
+        self.executor = make_executor(
+            workers, mover=self._move,
+            initializer=self._apply_io_priority if io_priority is not None else None)
+
+        # Optional io_throttle.RateLimiter pacing moves and trash
+        # operations; run_cleanup can give phases limiters of their own
+        self.rate_limiter = None
+
+        # Items are handed to trash_backend a batch at a time
+        self._trash_backend = None
+        self.trash_batch_size = 64
+
+        # Delete browser cache files outright instead of trashing them;
+        # they are rebuilt by the browser anyway
+        self.delete_caches_directly = False
+
+        # Look at the first bytes of files with unknown extensions to find
+        # their category, instead of putting them all in Others
+        self.sniff_content = False
+        self.sniffer = ContentSniffer()
+
+        # Which temporary files and folders clean_temp_files removes;
+        # made on first use with the platform's keep times
+        self._retention = None
+
+        # Optional rules_engine.RuleSet; when set, its rules decide where
+        # organized files go, ahead of the file type categories
+        self.rules = None
+
+        # Optional scan_state.ScanState; when set, entries left in place by
+        # an earlier run and unchanged since are skipped
+        self.state = None
+
+        # run_metrics.RunMetrics of the run in progress, if any, and of the
+        # last completed run_cleanup
+        self.metrics = None
+        self.last_metrics = None
+
+        # Optional operation_journal.OperationJournal; when set, every move
+        # and trash is recorded in it so the run can be resumed or undone
+        self.journal = None
+
+        # Optional progress_channel.ProgressChannel; when set, counts and
+        # phase starts and ends are sent to it as they happen
+        self.progress_channel = None
+
+        # Per-thread state of the phase running on each thread
+        self._local = threading.local()
+
+    @property
+    def platform(self):
+        """Backend for the locations and system calls of this platform."""
+        if self._platform is None:
+            self._platform = get_platform()
+        return self._platform
+
+    @platform.setter
+    def platform(self, platform):
+        self._platform = platform
+
+    @property
+    def temp_locations(self):
+        """Paths of temporary files that can be safely deleted."""
+        if self._temp_locations is None:
+            self._temp_locations = self.platform.temp_locations()
+        return self._temp_locations
+
+    @temp_locations.setter
+    def temp_locations(self, locations):
+        self._temp_locations = locations
+
+    @property
+    def retention(self):
+        """retention_policy.RetentionPolicy for temporary files and folders."""
+        if self._retention is None:
+            keep_days = self.platform.temp_keep_days
+            self._retention = RetentionPolicy(keep_days=keep_days,
+                                              directory_keep_days=max(2, keep_days))
+        return self._retention
+
+    @retention.setter
+    def retention(self, policy):
+        self._retention = policy
+
+    @property
+    def trash_backend(self):
+        """Backend that moves items to the trash."""
+        if self._trash_backend is None:
+            self._trash_backend = get_trash_backend()
+        return self._trash_backend
+
+    @trash_backend.setter
+    def trash_backend(self, backend):
+        self._trash_backend = backend
+
+    def _move(self, source, destination):
+        # Looked up on each call so move_engine can be replaced after setup
+        self.move_engine.move(source, destination)
+
+    def _apply_io_priority(self):
+        # Runs on each executor thread; failing only costs the lower priority
+        if self.io_priority is None:
+            return
+        try:
+            self.io_priority.apply()
+        except OSError as e:
+            if not self._io_priority_failed:
+                self._io_priority_failed = True
+                logger.warning(f"Could not lower the priority of file operations: {e}")
+
     def is_process_running(self, process_name):
         """Check if a process is running by name."""
-        try:
-            # Using tasklist command for Windows
-            cmd = f'tasklist /FI "IMAGENAME eq {process_name}" /NH'
-            output = subprocess.check_output(cmd, shell=True).decode('utf-8')
-            # If the process is running, output contains the process name
-            return process_name.lower() in output.lower()
-        except:
-            # If there's an error, assume process is not running
-            return False
+        return self.process_probe.is_running(process_name)
 
     def check_running_browsers(self):
-        """Check which browsers are currently running."""
+        """Check which browsers are currently running.
+
+        Takes one fresh snapshot of the process table for all of them.
+        """
+        self.process_probe.refresh()
         running = {}
         for browser, process in self.browsers.items():
             running[browser] = self.is_process_running(process)
         return running
 
+    @property
+    def file_types(self):
+        """Mapping of category name to the list of extensions it collects."""
+        return self._file_types
+
+    @file_types.setter
+    def file_types(self, file_types):
+        self._file_types = file_types
+        self.rebuild_category_index()
+
+    def rebuild_category_index(self):
+        """Rebuild the extension-to-category lookup table from file_types.
+
+        Assigning a new dict to file_types does this automatically; call it
+        by hand after changing the extension lists in place.
+        """
+        index = {}
+        for category, extensions in self._file_types.items():
+            for extension in extensions:
+                # First category listing an extension wins, as before
+                index.setdefault(extension.lower(), category)
+
+        self._category_index = index
+        # Longest compound suffix we need to try, e.g. 2 for '.tar.gz'
+        self._suffix_depth = max(
+            (extension.count('.') for extension in index), default=1)
+        self._default_category = 'Others'
+
+    def _category_for_name(self, name):
+        """Look up the category for a bare file name."""
+        # Leading dots mark hidden files, not extensions (as os.path.splitext)
+        name = name.lower().lstrip('.')
+        end = len(name)
+        suffixes = []
+        for _ in range(self._suffix_depth):
+            end = name.rfind('.', 0, end)
+            if end < 0:
+                break
+            suffixes.append(name[end:])
+
+        # Prefer the longest registered suffix ('.tar.gz' over '.gz')
+        for suffix in reversed(suffixes):
+            category = self._category_index.get(suffix)
+            if category is not None:
+                return category
+
+        return self._default_category
+
     def get_file_category(self, file_path):
         """Determine the category of a file based on its extension."""
-        file_ext = os.path.splitext(file_path)[1].lower()
+        return self._category_for_name(os.path.basename(file_path))
 
-        for category, extensions in self.file_types.items():
-            if file_ext in extensions:
-                return category
+    def classify_many(self, paths):
+        """Determine the categories of many files in one call.
+
+        Returns a list of category names in the same order as paths.
+        """
+        category_for_name = self._category_for_name
+        basename = os.path.basename
+        return [category_for_name(basename(path)) for path in paths]
 
-        return 'Others'
+    def _trash_planned(self, operations, backend=None):
+        """Send planned trash operations through the executor.
 
-    def clean_temp_files(self):
-        """Clean temporary files from common locations."""
-        total_deleted = 0
-        skipped_files = 0
+        Operations are grouped into batches of trash_batch_size, each
+        handled by one call to the trash backend (self.trash_backend
+        unless another is given).
+
+        Returns the number of items trashed and a list of the operations
+        that failed. Items that disappeared since they were scanned are
+        neither counted nor reported.
+        """
+        backend = backend or self.trash_backend
+        trashed = 0
+        failed = []
+
+        # Checked after the journal, which plans ahead, so a stop or pause
+        # takes effect at the next batch rather than the next journal chunk
+        batches = self._trash_batches(self._checkpoints(self._journaled(operations)),
+                                      lambda operation: backend)
+        rate_limiter = self._rate_limiter()
+
+        for batch, batch_error in self.executor.run(batches):
+            if rate_limiter is not None:
+                rate_limiter.observe(batch.elapsed, len(batch.operations))
+            errors = batch.results if batch_error is None else [batch_error] * len(batch.operations)
+            for operation, error in zip(batch.operations, errors):
+                self._journal_result(operation, error)
+                trashed += self._trash_result(operation, error, failed)
+
+        return trashed, failed
+
+    def _trash_batches(self, operations, backend_for):
+        """Group runs of trash operations into TrashBatch items of up to trash_batch_size.
+
+        backend_for(operation) picks the backend for each trash
+        operation, and a batch ends where it changes. Other operations
+        are passed through in their place. Under a rate limiter, batches
+        are also kept within its burst, as each is carried out at once.
+        """
+        max_items = self.trash_batch_size
+        max_bytes = None
+        rate_limiter = self._rate_limiter()
+        if rate_limiter is not None:
+            burst_ops, max_bytes = rate_limiter.burst()
+            if burst_ops is not None:
+                max_items = max(1, min(max_items, int(burst_ops)))
+
+        batch = []
+        batch_bytes = 0
+        backend = None
+        for operation in operations:
+            if operation.action != TRASH:
+                if batch:
+                    yield TrashBatch(batch, backend)
+                    batch = []
+                yield operation
+                continue
 
+            operation_backend = backend_for(operation)
+            size = operation.size or 0
+            if batch and (operation_backend is not backend or
+                          (max_bytes is not None and batch_bytes + size > max_bytes)):
+                yield TrashBatch(batch, backend)
+                batch = []
+                batch_bytes = 0
+            backend = operation_backend
+            batch.append(operation)
+            batch_bytes += size
+            if len(batch) >= max_items:
+                yield TrashBatch(batch, backend)
+                batch = []
+                batch_bytes = 0
+        if batch:
+            yield TrashBatch(batch, backend)
+
+    def _trash_result(self, operation, error, failed):
+        """Record the outcome of one trash operation; returns 1 if it was trashed."""
+        directory = os.path.dirname(operation.source)
+        self._count('operations', directory=directory)
+        self._count('syscalls', directory=directory)
+
+        if error is None or isinstance(error, FileNotFoundError):
+            if self.state is not None:
+                self.state.forget(operation.source)
+            # Items deleted since the directory was scanned aren't counted
+            if error is None:
+                self._count('bytes_trashed', operation.size or 0, directory)
+                return 1
+        # Files in use are expected; only log unusual failures
+        elif isinstance(error, PermissionError) or \
+                "being used by another process" in str(error):
+            self._count('skipped', directory=directory)
+            failed.append(operation)
+        else:
+            logger.debug(f"Could not delete {operation.source}: {error}")
+            self._count('errors', directory=directory)
+            failed.append(operation)
+        return 0
+
+    def _checkpoints(self, operations, throttle=True):
+        """Pass operations through, checking the current phase's deadline and cancel token between them.
+
+        Past the deadline, PhaseTimeout is raised. While the cancel token
+        is paused the next operation is held back; once it is cancelled
+        the stream ends, so operations already handed out still finish
+        and are counted as usual. With throttle, operations are also
+        held back to the pace of the phase's rate limiter; only the
+        checkpoint right before the executor should throttle.
+        """
+        deadline = getattr(self._local, 'deadline', None)
+        cancel_token = getattr(self._local, 'cancel_token', None)
+        rate_limiter = self._rate_limiter() if throttle else None
+        if deadline is None and cancel_token is None and rate_limiter is None:
+            return operations
+        return self._stop_at(operations, deadline, cancel_token, rate_limiter)
+
+    def _stop_at(self, operations, deadline, cancel_token, rate_limiter):
+        for operation in operations:
+            if deadline is not None and time.monotonic() > deadline:
+                raise PhaseTimeout("Phase time limit reached")
+            if cancel_token is not None and not cancel_token.proceed():
+                return
+            if rate_limiter is not None:
+                wait = rate_limiter.delay(operation.size)
+                if wait > 0:
+                    if cancel_token is None:
+                        time.sleep(wait)
+                    elif cancel_token.sleep(wait):
+                        return
+            yield operation
+
+    def _rate_limiter(self):
+        """Return the rate limiter of the current phase, or else the organizer's."""
+        return getattr(self._local, 'rate_limiter', None) or self.rate_limiter
+
+    @contextlib.contextmanager
+    def _cancellable(self, cancel_token):
+        """Make cancel_token, if given, the calling thread's token for the enclosed block."""
+        if cancel_token is None:
+            yield
+            return
+        previous = getattr(self._local, 'cancel_token', None)
+        self._local.cancel_token = cancel_token
+        try:
+            yield
+        finally:
+            self._local.cancel_token = previous
+
+    def _cancelled(self):
+        """Return True if the calling thread's cancel token has been cancelled."""
+        cancel_token = getattr(self._local, 'cancel_token', None)
+        return cancel_token is not None and cancel_token.cancelled
+
+    def _outcome(self):
+        return "stopped" if self._cancelled() else "completed"
+
+    def _journaled(self, operations):
+        """Pass operations through the journal, if any, before they are carried out."""
+        if self.journal is None:
+            return operations
+        return self.journal.plan(operations)
+
+    def _journal_result(self, operation, error=None):
+        if self.journal is not None:
+            self.journal.record(operation, error)
+
+    def _count(self, counter, amount=1, directory=None):
+        """Add to a counter of the current phase when metrics or progress are being collected."""
+        if self.metrics is not None:
+            self.metrics.count(counter, amount, directory)
+        if self.progress_channel is not None:
+            self.progress_channel.count(getattr(self._local, 'phase', None), counter, amount)
+
+    def plan_temp_cleanup(self):
+        """Plan the temporary file cleanup without touching any files.
+
+        Yields a TRASH operation for every item clean_temp_files would
+        remove and a SKIP operation for every item it would leave alone.
+        """
         # Files and folders to skip (commonly locked by system)
         skip_patterns = [
             'ntuser.dat',
@@ -115,241 +508,879 @@ class FileOrganizer:
             '~',  # temp files often start with ~
         ]
 
-        logger.info("Cleaning temporary files...")
+        policy = self.retention
+        # One clock reading for the whole scan
+        now = time.time()
 
         for temp_location in self.temp_locations:
             if os.path.exists(temp_location) and os.path.isdir(temp_location):
-                logger.info(f"Cleaning: {temp_location}")
+                logger.info(f"Scanning: {temp_location}")
 
                 try:
-                    items = os.listdir(temp_location)
+                    entries = scan_directory(temp_location)
                 except Exception as e:
                     logger.warning(
                         f"Could not access directory {temp_location}: {e}")
+                    self._count('errors', directory=temp_location)
                     continue
+                self._count('directories_scanned', directory=temp_location)
+                self._count('syscalls', directory=temp_location)
+
+                # With a size cap or item limit, expired items are ranked
+                # first and only removed once the whole location is scanned
+                queue = RetentionQueue(policy) if policy.needs_queue() else None
+                # Kept items count towards the queue's cap, so only skip
+                # them by scan state when there is no queue
+                state = self.state if queue is None else None
+                unchanged = 0
+                kept = 0
+                for entry in entries:
+                    self._count('entries_scanned', directory=temp_location)
 
-                for item in items:
                     # Skip files that match patterns known to be locked
-                    if any(pattern in item.lower() for pattern in skip_patterns):
-                        skipped_files += 1
+                    if any(pattern in entry.name.lower() for pattern in skip_patterns):
+                        self._count('skipped', directory=temp_location)
+                        yield FileOperation(SKIP, entry.path,
+                                            reason="matches a locked-file pattern")
                         continue
 
-                    item_path = os.path.join(temp_location, item)
+                    # Trash folders of the temp location's own drive, and
+                    # folders systemd keeps for services' private /tmp
+                    protected = _protected_temp_item(entry.name)
+                    if protected is not None:
+                        self._count('skipped', directory=temp_location)
+                        yield FileOperation(SKIP, entry.path, reason=protected)
+                        continue
 
+                    # Its stat, for the scan state or the retention policy
+                    self._count('syscalls', directory=temp_location)
                     try:
-                        # Skip items that don't exist (might have been deleted)
-                        if not os.path.exists(item_path):
+                        # Skip items an earlier run kept, if unchanged and not due since
+                        if state is not None and state.seen(temp_location, entry):
+                            self._count('skipped', directory=temp_location)
+                            unchanged += 1
                             continue
 
-                        if os.path.isfile(item_path):
-                            # Try to delete the file safely using send2trash
-                            send2trash.send2trash(item_path)
-                            total_deleted += 1
-                        elif os.path.isdir(item_path):
-                            # For directories, only delete if older than 2 days
-                            if (datetime.datetime.now() - datetime.datetime.fromtimestamp(
-                                    os.path.getmtime(item_path))).days > 2:
-                                send2trash.send2trash(item_path)
-                                total_deleted += 1
-                    except PermissionError:
-                        # File is in use, skip without error message
-                        skipped_files += 1
-                    except OSError as e:
-                        if "being used by another process" in str(e):
-                            # File is in use by another process
-                            skipped_files += 1
+                        if entry.is_file():
+                            is_dir = False
+                            size = entry.size
+                        elif entry.is_dir():
+                            is_dir = True
+                            # Folder sizes are only needed to rank or cap by size
+                            size = self._tree_size(entry.path) if policy.needs_sizes() else None
                         else:
-                            # Log other OS errors
-                            logger.debug(f"Could not delete {item_path}: {e}")
-                            skipped_files += 1
+                            # Sockets, pipes and devices belong to running programs
+                            continue
+
+                        if not policy.is_expired(is_dir, entry.mtime, now):
+                            kept += 1
+                            if queue is not None:
+                                queue.keep(size)
+                            if state is not None:
+                                # Look at it again once it is old enough
+                                state.record(temp_location, entry,
+                                             until=policy.expires_at(is_dir, entry.mtime))
+                            continue
+
+                        # Old but still open, or a folder of sockets (X11,
+                        # ssh-agent, tmux) that its program is listening on
+                        in_use = self.process_probe.in_use(entry.path) or \
+                            (is_dir and _holds_special_files(entry.path))
+                        if in_use:
+                            if queue is not None:
+                                queue.keep(size)
+                            if state is not None:
+                                state.record(temp_location, entry, until=now + IN_USE_RECHECK)
+                            self._count('skipped', directory=temp_location)
+                            yield FileOperation(SKIP, entry.path,
+                                                reason="in use by a running program")
+                            continue
+
+                        operation = FileOperation(
+                            TRASH, entry.path, size=size,
+                            reason=f"temporary folder older than {policy.directory_keep_days} days"
+                            if is_dir else "temporary file")
+                        if queue is None:
+                            yield operation
+                            continue
+
+                        queue.add(operation, size, entry.mtime)
+                        yield from queue.ready()
+                    except FileNotFoundError:
+                        # Item was deleted since the directory was scanned
+                        continue
                     except Exception as e:
-                        logger.debug(f"Error deleting {item_path}: {e}")
+                        logger.debug(f"Error checking {entry.path}: {e}")
+                        self._count('errors', directory=temp_location)
+                        yield FileOperation(SKIP, entry.path,
+                                            reason=f"could not be checked: {e}")
+
+                if queue is not None:
+                    selected, left = queue.select()
+                    yield from selected
+                    kept += len(left)
+
+                if kept:
+                    logger.info(
+                        f"Kept {kept} items in {temp_location} under the retention policy")
+
+                if state is not None:
+                    state.prune(temp_location)
+                    if unchanged:
+                        logger.info(
+                            f"Skipped {unchanged} unchanged items in {temp_location}")
+
+    def _tree_size(self, directory):
+        """Total size of the files in a directory tree."""
+        total = 0
+        for entry in walk_directory(directory):
+            try:
+                total += entry.size
+            except OSError:
+                continue
+        return total
+
+    def clean_temp_files(self, cancel_token=None):
+        """Clean temporary files from common locations.
+
+        Args:
+            cancel_token: Optional cancellation.CancelToken; the cleanup
+                pauses and stops with it between batches
+        """
+        with self._cancellable(cancel_token):
+            skipped_files = 0
+
+            logger.info("Cleaning temporary files...")
+
+            def to_trash():
+                nonlocal skipped_files
+                for operation in self._checkpoints(self.plan_temp_cleanup(), throttle=False):
+                    if operation.action == SKIP:
                         skipped_files += 1
+                    else:
+                        yield operation
 
-        logger.info(
-            f"Temporary files cleanup completed. {total_deleted} items moved to recycle bin. {skipped_files} items skipped.")
-        # Store skipped files count for GUI to use
-        self.skipped_files = skipped_files
-        return total_deleted
-
-    def clean_browser_cache(self):
-        """Clean browser cache files."""
-        # Chrome cache locations
-        chrome_cache_locations = [
-            os.path.join(os.environ['LOCALAPPDATA'], 'Google',
-                         'Chrome', 'User Data', 'Default', 'Cache'),
-            os.path.join(os.environ['LOCALAPPDATA'], 'Google',
-                         'Chrome', 'User Data', 'Default', 'Code Cache'),
-            os.path.join(os.environ['LOCALAPPDATA'], 'Google',
-                         'Chrome', 'User Data', 'Default', 'GPUCache')
-        ]
+            total_deleted, failed = self._trash_planned(to_trash())
+            skipped_files += len(failed)
 
-        # Edge cache locations
-        edge_cache_locations = [
-            os.path.join(os.environ['LOCALAPPDATA'], 'Microsoft',
-                         'Edge', 'User Data', 'Default', 'Cache'),
-            os.path.join(os.environ['LOCALAPPDATA'], 'Microsoft',
-                         'Edge', 'User Data', 'Default', 'Code Cache'),
-            os.path.join(os.environ['LOCALAPPDATA'], 'Microsoft',
-                         'Edge', 'User Data', 'Default', 'GPUCache')
-        ]
+            logger.info(
+                f"Temporary files cleanup {self._outcome()}. {total_deleted} items moved to recycle bin. {skipped_files} items skipped.")
+            # Store skipped files count for GUI to use
+            self.skipped_files = skipped_files
+            return total_deleted
 
-        # Firefox cache
-        firefox_profile = os.path.join(
-            os.environ['APPDATA'], 'Mozilla', 'Firefox', 'Profiles')
+    def plan_browser_cache_cleanup(self):
+        """Plan the browser cache cleanup without touching any files.
+
+        Yields a TRASH operation for every top-level item in each cache
+        folder that clean_browser_cache would remove.
+        """
+        # Firefox keeps its caches in each profile
+        firefox_profile = self.platform.firefox_profiles()
         firefox_caches = []
 
-        if os.path.exists(firefox_profile):
+        if firefox_profile and os.path.exists(firefox_profile):
             try:
-                for profile in os.listdir(firefox_profile):
-                    profile_path = os.path.join(firefox_profile, profile)
-                    if os.path.isdir(profile_path):
-                        # Firefox cache locations
-                        cache_paths = [
-                            os.path.join(profile_path, 'cache2'),
-                            os.path.join(profile_path, 'startupCache'),
-                            os.path.join(profile_path, 'thumbnails')
-                        ]
-                        for path in cache_paths:
+                for profile in scan_directory(firefox_profile):
+                    profile_path = profile.path
+                    if profile.is_dir():
+                        for folder in FIREFOX_CACHE_FOLDERS:
+                            path = os.path.join(profile_path, folder)
                             if os.path.exists(path):
                                 firefox_caches.append(path)
             except Exception as e:
                 logger.warning(f"Error accessing Firefox profiles: {e}")
 
         # Combine all cache locations
-        cache_locations = chrome_cache_locations + edge_cache_locations + firefox_caches
-
-        total_cleaned = 0
-        skipped_files = 0
+        cache_locations = self.platform.browser_cache_locations() + firefox_caches
 
         for location in cache_locations:
             if os.path.exists(location) and os.path.isdir(location):
-                logger.info(f"Cleaning browser cache: {location}")
-                try:
-                    items = os.listdir(location)
-
-                    # Skip if browser is running and has locked the directory
-                    if not items and ("Chrome" in location or "Edge" in location):
-                        logger.info(
-                            f"Browser appears to be running, skipping {location}")
-                        continue
+                # Leave caches alone while a browser has files in them open
+                if self.process_probe.has_open_files(location):
+                    logger.info(
+                        f"Browser is running, skipping {location}")
+                    self._count('skipped', directory=location)
+                    continue
 
-                    for item in items:
-                        item_path = os.path.join(location, item)
-                        try:
-                            if os.path.isfile(item_path):
-                                send2trash.send2trash(item_path)
-                                total_cleaned += 1
-                            elif os.path.isdir(item_path):
-                                # For nested cache directories
-                                try:
-                                    send2trash.send2trash(item_path)
-                                    total_cleaned += 1
-                                except:
-                                    # Try to clean individual files inside if directory can't be deleted
-                                    for subitem in os.listdir(item_path):
-                                        try:
-                                            sub_path = os.path.join(
-                                                item_path, subitem)
-                                            if os.path.isfile(sub_path):
-                                                send2trash.send2trash(sub_path)
-                                                total_cleaned += 1
-                                        except:
-                                            skipped_files += 1
-                        except PermissionError:
-                            # File is in use, skip silently
-                            skipped_files += 1
-                        except OSError as e:
-                            if "being used by another process" in str(e):
-                                skipped_files += 1
-                            else:
-                                logger.debug(
-                                    f"Could not delete cache file {item_path}: {e}")
-                                skipped_files += 1
-                        except Exception as e:
-                            logger.debug(
-                                f"Error cleaning cache item {item_path}: {e}")
-                            skipped_files += 1
+                logger.info(f"Scanning browser cache: {location}")
+                try:
+                    entries = list(scan_directory(location))
                 except PermissionError:
                     logger.info(
                         f"Browser is running, cannot access {location}")
+                    self._count('skipped', directory=location)
+                    continue
                 except Exception as e:
                     logger.debug(
                         f"Error accessing cache directory {location}: {e}")
+                    self._count('errors', directory=location)
+                    continue
+                self._count('directories_scanned', directory=location)
+                self._count('syscalls', directory=location)
+                self._count('entries_scanned', len(entries), location)
 
-        logger.info(
-            f"Browser cache cleanup completed. {total_cleaned} items moved to recycle bin. {skipped_files} items skipped.")
-        return total_cleaned
+                # Skip if browser is running and has locked the directory
+                if not entries and ("Chrome" in location or "Edge" in location):
+                    logger.info(
+                        f"Browser appears to be running, skipping {location}")
+                    continue
 
-    def organize_directory(self, directory):
-        """Organize files in a directory into categorized folders."""
-        if not os.path.exists(directory):
-            logger.error(f"Directory does not exist: {directory}")
-            return 0
+                # Everything found is removed, so there is nothing for the
+                # scan state to skip here
+                for entry in entries:
+                    if entry.is_file():
+                        self._count('syscalls', directory=location)
+                        try:
+                            size = entry.size
+                        except OSError:
+                            size = None
+                        yield FileOperation(TRASH, entry.path, size=size,
+                                            reason="browser cache file")
+                    elif entry.is_dir():
+                        # For nested cache directories
+                        yield FileOperation(TRASH, entry.path,
+                                            reason="browser cache folder")
+
+    def clean_browser_cache(self, cancel_token=None):
+        """Clean browser cache files.
 
-        logger.info(f"Organizing files in: {directory}")
+        Args:
+            cancel_token: Optional cancellation.CancelToken; the cleanup
+                pauses and stops with it between batches
+        """
+        with self._cancellable(cancel_token):
+            skipped_files = 0
 
-        # Create category folders if they don't exist
-        for category in self.file_types.keys():
-            category_path = os.path.join(directory, category)
-            if not os.path.exists(category_path):
-                os.makedirs(category_path)
+            # Caches are regenerated by the browser, so they may skip the trash
+            backend = DirectDeleteBackend() if self.delete_caches_directly else None
 
-        # Move files to their respective category folders
-        files_moved = 0
+            total_cleaned, failed = self._trash_planned(
+                self.plan_browser_cache_cleanup(), backend)
 
-        for item in os.listdir(directory):
-            item_path = os.path.join(directory, item)
+            # Try to clean individual files inside directories that couldn't be deleted
+            retry_operations = []
+            for operation in failed:
+                if not os.path.isdir(operation.source):
+                    skipped_files += 1
+                    continue
+                try:
+                    for subentry in scan_directory(operation.source):
+                        if subentry.is_file():
+                            retry_operations.append(
+                                FileOperation(TRASH, subentry.path))
+                except Exception:
+                    skipped_files += 1
+
+            if retry_operations:
+                retried, failed = self._trash_planned(retry_operations, backend)
+                total_cleaned += retried
+                skipped_files += len(failed)
+
+            where = "deleted" if self.delete_caches_directly else "moved to recycle bin"
+            logger.info(
+                f"Browser cache cleanup {self._outcome()}. {total_cleaned} items {where}. {skipped_files} items skipped.")
+            return total_cleaned
+
+    def plan_organize(self, directory, names=None, recursive=False, max_depth=None, only=None,
+                      rules=None, sniff_content=None):
+        """Plan the moves organize_directory would make, without touching any files.
+
+        Yields a MOVE operation per file, in name order, with conflicting
+        destination names already resolved. Pass a DestinationNames to
+        share name reservations with the caller.
+
+        With recursive=True, files in subfolders (up to max_depth levels
+        down, or all of them if max_depth is None) are planned too and all
+        go to the category folders at the top of directory. Subfolders are
+        streamed one at a time, so the tree never has to fit in memory,
+        and names matching skip_patterns are left alone.
+
+        With only, a list of file names in directory, just those files are
+        planned and the directory is not listed.
+
+        rules (a rules_engine.RuleSet) and sniff_content, when given, are
+        used instead of the organizer's own for this call only, so calls
+        on other threads are not affected.
+        """
+        if names is None:
+            names = DestinationNames()
+        if rules is None:
+            rules = self.rules
+        if sniff_content is None:
+            sniff_content = self.sniff_content
+
+        if only is not None:
+            files = sorted((entry for entry in scan_names(directory, only) if entry.is_file()),
+                           key=lambda entry: entry.name)
+        elif recursive:
+            # Never descend into the category folders we are filling
+            category_names = set(self.file_types)
+            if rules is not None:
+                category_names |= rules.folders()
+
+            def prune(entry, depth):
+                if depth == 0 and entry.name in category_names:
+                    return True
+                # Each folder entered is listed once more
+                self._count('syscalls', directory=directory)
+                return False
+
+            self._count('syscalls', directory=directory)
+            files = walk_directory(
+                directory, max_depth=max_depth, exclude=self.skip_patterns,
+                prune=prune, sort=True,
+                on_error=lambda path, e: logger.warning(f"Could not access directory {path}: {e}"))
+        else:
+            self._count('directories_scanned', directory=directory)
+            self._count('syscalls', directory=directory)
+            # Only process files; this also skips the category folders.
+            # Sorting keeps conflict suffixes the same however the moves are scheduled.
+            files = sorted((entry for entry in scan_directory(directory) if entry.is_file()),
+                           key=lambda entry: entry.name)
+
+        # Skip files an earlier run left in place, if unchanged since
+        if self.state is not None:
+            files = (entry for entry in files
+                     if not self._seen_unchanged(directory, entry))
+
+        # Classify in batches so a recursive walk is never held in memory whole
+        files = iter(files)
+        now = time.time()
+        while True:
+            batch = list(itertools.islice(files, 1000))
+            if not batch:
+                break
+
+            self._count('entries_scanned', len(batch), directory)
+            # One stat each, shared by the size, rules and scan state
+            self._count('syscalls', len(batch), directory)
+            categories = self.classify_many(entry.name for entry in batch)
+            if sniff_content:
+                categories = self._sniff_unknown(batch, categories)
+            if rules is not None:
+                categories = self._apply_rules(rules, directory, batch, categories, now)
+            for entry, category in zip(batch, categories):
+                if category is None:
+                    # No rule matched and the rules say to leave it
+                    self._count('skipped', directory=directory)
+                    if self.state is not None:
+                        try:
+                            self.state.record(directory, entry)
+                        except OSError:
+                            pass
+                    continue
+                destination = os.path.join(directory, category)
 
-            # Skip directories and the category folders we just created
-            if os.path.isdir(item_path) and item in self.file_types.keys():
-                continue
+                # Handle file name conflicts, including names planned earlier in this run
+                dest_file_path = names.allocate(destination, entry.name)
+                try:
+                    size = entry.size
+                except OSError:
+                    size = None
+                yield FileOperation(MOVE, entry.path, dest_file_path, category,
+                                    size=size, reason=f"{category} file")
+
+        # Records can only be dropped once the whole directory has been seen
+        if self.state is not None and only is None:
+            self.state.prune(directory)
+
+    def _sniff_unknown(self, batch, categories):
+        """Replace the default category with one found from the file's content, where possible."""
+        result = []
+        for entry, category in zip(batch, categories):
+            if category == self._default_category:
+                try:
+                    extension = self.sniffer.sniff(entry, self.state)
+                except OSError:
+                    extension = None
+                if extension is not None:
+                    category = self._category_index.get(extension, category)
+            result.append(category)
+        return result
+
+    def _apply_rules(self, rules, directory, batch, categories, now):
+        """Yield the folder rules picks for each entry, falling back to its category."""
+        prefix_length = len(os.path.join(directory, ''))
+        for entry, category in zip(batch, categories):
+            folder = rules.match(entry.name, entry.path[prefix_length:], entry.stat, now)
+            if folder is None and not rules.leave_unmatched:
+                folder = category
+            yield folder
+
+    def _seen_unchanged(self, scope, entry):
+        """Return True if the scan state has entry as left unchanged by an earlier run."""
+        try:
+            if self.state.seen(scope, entry):
+                self._count('entries_scanned', directory=scope)
+                self._count('skipped', directory=scope)
+                return True
+        except OSError:
+            pass
+        return False
+
+    def organize_directory(self, directory, recursive=False, max_depth=None, only=None,
+                           cancel_token=None, rules=None, sniff_content=None):
+        """Organize files in a directory into categorized folders.
 
-            # Only process files
-            if os.path.isfile(item_path):
-                category = self.get_file_category(item_path)
-                destination = os.path.join(directory, category)
+        Args:
+            directory: Directory to organize
+            recursive: Also organize files in subfolders into the
+                top-level category folders
+            max_depth: With recursive, how many levels of subfolders to
+                include; None for all of them
+            only: Names of the files in directory to organize, instead
+                of all of them
+            cancel_token: Optional cancellation.CancelToken; moving
+                pauses and stops with it between files
+            rules, sniff_content: Used instead of the organizer's rules
+                and sniff_content for this run (see plan_organize)
+        """
+        with self._cancellable(cancel_token):
+            if not os.path.exists(directory):
+                logger.error(f"Directory does not exist: {directory}")
+                return 0
+
+            logger.info(f"Organizing files in: {directory}")
+
+            # Create category folders if they don't exist
+            for category in self.file_types.keys():
+                category_path = os.path.join(directory, category)
+                if not os.path.exists(category_path):
+                    os.makedirs(category_path)
+
+            # Plan the moves so destination names are fixed before any move
+            # runs, then let the executor carry them out
+            names = DestinationNames()
+            category_folders = set(self.file_types)
+
+            def to_move():
+                for operation in self._checkpoints(
+                        self.plan_organize(directory, names, recursive, max_depth, only,
+                                           rules, sniff_content),
+                        throttle=False):
+                    # Create destination if it doesn't exist (shouldn't happen but just in case)
+                    if operation.category not in category_folders:
+                        os.makedirs(os.path.dirname(operation.destination), exist_ok=True)
+                        category_folders.add(operation.category)
+                    yield operation
+
+            # Move the files
+            files_moved = 0
+            rate_limiter = self._rate_limiter()
+
+            for operation, error in self.executor.run(self._checkpoints(self._journaled(to_move()))):
+                if rate_limiter is not None:
+                    rate_limiter.observe(operation.elapsed)
+                self._journal_result(operation, error)
+                self._count('operations', directory=directory)
+                self._count('syscalls', directory=directory)
+                if error is None:
+                    files_moved += 1
+                    self._count('bytes_moved', operation.size or 0, directory)
+                    if self.state is not None:
+                        self.state.forget(operation.source)
+                    logger.info(
+                        f"Moved: {os.path.basename(operation.source)} to {operation.category}")
+                else:
+                    names.release(operation.destination)
+                    self._count('errors', directory=directory)
+                    logger.error(f"Error moving {operation.source}: {error}")
+
+            logger.info(f"Organization {self._outcome()}. {files_moved} files moved.")
+            return files_moved
+
+    def watch(self, directories, settle=2.0, poll_interval=2.0, should_stop=None,
+              cancel_token=None):
+        """Keep organizing directories as new files arrive in them.
+
+        Each directory is organized once, then watched (with inotify on
+        Linux, by polling elsewhere). A new file is moved once it has
+        stopped changing for settle seconds, so downloads and copies in
+        progress are left alone. Only the new files are looked at; the
+        directories are not scanned again. Runs until should_stop()
+        returns True, cancel_token is cancelled or the process is
+        interrupted; moves pause while cancel_token is paused.
+        """
+        directories = [directory for directory in directories if os.path.isdir(directory)]
+        if not directories:
+            logger.error("No existing directories to watch")
+            return
+
+        def stopped():
+            return (should_stop is not None and should_stop()) or \
+                (cancel_token is not None and cancel_token.cancelled)
+
+        with make_watcher(directories, poll_interval) as watcher:
+            # Catch up on files that arrived while we weren't watching
+            for directory in directories:
+                if stopped():
+                    break
+                self.organize_directory(directory, cancel_token=cancel_token)
+
+            logger.info(f"Watching for new files in: {', '.join(directories)}")
+            try:
+                for directory, names in settled_files(watcher, settle, stopped):
+                    self.organize_directory(directory, only=names, cancel_token=cancel_token)
+            except KeyboardInterrupt:
+                pass
 
-                # Create destination if it doesn't exist (shouldn't happen but just in case)
-                if not os.path.exists(destination):
-                    os.makedirs(destination)
+        logger.info("Stopped watching.")
+
+    def find_duplicates(self, directory, recursive=True):
+        """Find files with identical content in a directory.
+
+        Files matching skip_patterns and symlinks are ignored, and hard
+        links to the same file count as one copy of it (the first path
+        found). Returns a list of groups, each a sorted list of the paths
+        of two or more identical files.
+        """
+        logger.info(f"Looking for duplicate files in: {directory}")
 
-                # Move the file
+        def sized_files():
+            seen = set()
+            for entry in walk_directory(directory, max_depth=None if recursive else 0,
+                                        exclude=self.skip_patterns):
+                if not entry.is_file(follow_symlinks=False):
+                    continue
                 try:
-                    dest_file_path = os.path.join(destination, item)
-
-                    # Handle file name conflicts
-                    if os.path.exists(dest_file_path):
-                        base_name, extension = os.path.splitext(item)
-                        counter = 1
-                        while os.path.exists(os.path.join(destination, f"{base_name}_{counter}{extension}")):
-                            counter += 1
-                        dest_file_path = os.path.join(
-                            destination, f"{base_name}_{counter}{extension}")
-
-                    shutil.move(item_path, dest_file_path)
-                    files_moved += 1
-                    logger.info(f"Moved: {item} to {category}")
-                except Exception as e:
-                    logger.error(f"Error moving {item_path}: {e}")
+                    st = entry.stat()
+                    # st_nlink is 0 when scandir doesn't report it (Windows)
+                    if st.st_nlink != 1:
+                        key = (st.st_dev, entry.inode())
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    yield entry.path, st.st_size
+                except OSError:
+                    continue
 
-        logger.info(f"Organization completed. {files_moved} files moved.")
-        return files_moved
+        groups = find_duplicate_groups(sized_files())
+
+        for group in groups:
+            logger.info(f"Duplicates: {', '.join(group)}")
+        logger.info(
+            f"Duplicate search completed. {len(groups)} sets of duplicates found.")
+        return groups
+
+    def clean_duplicates(self, directory, recursive=True):
+        """Move all but the oldest copy of each duplicate file to the recycle bin."""
+        operations = []
+
+        for group in self.find_duplicates(directory, recursive):
+            try:
+                keep = min(group, key=lambda path: (os.path.getmtime(path), path))
+            except OSError as e:
+                logger.debug(f"Could not compare duplicates of {group[0]}: {e}")
+                continue
+
+            for path in group:
+                if path == keep:
+                    continue
+                try:
+                    if os.path.islink(path) or os.path.samefile(path, keep):
+                        # Not a separate copy; the tree may have changed since the search
+                        continue
+                except OSError:
+                    continue
+                operations.append(FileOperation(
+                    TRASH, path, reason=f"duplicate of {keep}"))
+
+        total_removed, failed = self._trash_planned(operations)
+
+        logger.info(
+            f"Duplicate cleanup completed. {total_removed} files moved to recycle bin. {len(failed)} files skipped.")
+        return total_removed
+
+    def analyze_disk_usage(self, directory, recursive=True, top_n=20, workers=None):
+        """Report where the space in a directory goes.
+
+        Files are counted per category, per extension and per subfolder,
+        walking subfolders on several threads. Files matching
+        skip_patterns are ignored. Returns a disk_usage.UsageReport.
+        """
+        logger.info(f"Analyzing disk usage in: {directory}")
+        report = analyze_tree(directory, self.classify_many,
+                              max_depth=None if recursive else 0, workers=workers,
+                              top_n=top_n, exclude=self.skip_patterns)
+        logger.info(
+            f"Disk usage analysis completed. {report.total_files} files, {report.total_bytes} bytes.")
+        return report
+
+    def plan_cleanup(self, organize_desktop=True, organize_downloads=True,
+                     clean_temp=True, clean_browser=True):
+        """Plan the operations run_cleanup would perform, as one stream.
+
+        Takes the same phase switches as run_cleanup. Nothing is moved or
+        trashed; write the result out with file_operations.write_plan and
+        run it later with apply_plan.
+        """
+        if clean_temp:
+            yield from self.plan_temp_cleanup()
+
+        if clean_browser:
+            yield from self.plan_browser_cache_cleanup()
+
+        for enabled, directory in ((organize_desktop, self.desktop_folder),
+                                   (organize_downloads, self.download_folder)):
+            if enabled and os.path.isdir(directory):
+                yield from self.plan_organize(directory)
+
+    def apply_plan(self, operations, cancel_token=None):
+        """Carry out a previously generated plan.
+
+        operations is any iterable of FileOperation objects, such as
+        file_operations.read_plan(path). Moves whose destination already
+        exists are skipped, so a stale plan never overwrites a file. A
+        cancel_token (cancellation.CancelToken) pauses and stops the run
+        between operations. Items are trashed in batches through
+        trash_backend, and browser cache items are deleted outright when
+        delete_caches_directly is set, as in a cleanup run. Returns a dict
+        with the numbers of items moved, trashed, skipped and failed.
+        """
+        with self._cancellable(cancel_token):
+            results = {"moved": 0, "trashed": 0, "skipped": 0, "failed": 0}
+            ready_folders = set()
+            cache_backend = DirectDeleteBackend() if self.delete_caches_directly else None
+
+            def backend_for(operation):
+                # Plans keep the reason the cache cleanup gave each item
+                if cache_backend is not None and \
+                        (operation.reason or '').startswith("browser cache"):
+                    return cache_backend
+                return self.trash_backend
+
+            def runnable():
+                for operation in operations:
+                    if operation.action == SKIP:
+                        results["skipped"] += 1
+                        continue
+
+                    if operation.action == MOVE:
+                        folder = os.path.dirname(operation.destination)
+                        if folder not in ready_folders:
+                            os.makedirs(folder, exist_ok=True)
+                            ready_folders.add(folder)
+                        if os.path.lexists(operation.destination):
+                            logger.warning(
+                                f"Skipping {operation.source}: {operation.destination} already exists")
+                            results["skipped"] += 1
+                            continue
+
+                    yield operation
+
+            rate_limiter = self._rate_limiter()
+            items = self._trash_batches(self._checkpoints(self._journaled(runnable())), backend_for)
+            for item, item_error in self.executor.run(items):
+                if isinstance(item, TrashBatch):
+                    if rate_limiter is not None:
+                        rate_limiter.observe(item.elapsed, len(item.operations))
+                    errors = item.results if item_error is None else [item_error] * len(item.operations)
+                    outcomes = zip(item.operations, errors)
+                else:
+                    if rate_limiter is not None:
+                        rate_limiter.observe(item.elapsed)
+                    outcomes = [(item, item_error)]
+
+                for operation, error in outcomes:
+                    self._journal_result(operation, error)
+                    if error is None:
+                        results["moved" if operation.action == MOVE else "trashed"] += 1
+                    elif isinstance(error, FileNotFoundError):
+                        # Item was removed after the plan was made
+                        results["skipped"] += 1
+                    else:
+                        logger.error(f"Error applying {operation.action} of {operation.source}: {error}")
+                        results["failed"] += 1
+
+            logger.info(
+                f"Plan {'stopped' if self._cancelled() else 'applied'}. {results['moved']} files moved, {results['trashed']} items moved to recycle bin, "
+                f"{results['skipped']} skipped, {results['failed']} failed.")
+            return results
+
+    def resume_run(self, journal, run, cancel_token=None):
+        """Finish the operations an interrupted run planned but did not complete.
+
+        journal and run are as returned by OperationJournal.resume();
+        the operations are carried out without scanning anything, and
+        recorded in the same journal, which becomes self.journal.
+        Operations that happened before the interruption but were not
+        recorded are recognised by their source being gone. Returns the
+        apply_plan() results; cancel_token is passed on to it.
+        """
+        self.journal = journal
+        logger.info(f"Resuming run {run.run_id}: {len(run.unfinished)} operations left unfinished")
+
+        remaining = []
+        for operation in run.unfinished:
+            if os.path.lexists(operation.source):
+                remaining.append(operation)
+            elif operation.action == TRASH or os.path.lexists(operation.destination):
+                journal.record(operation)
+            else:
+                journal.record(operation, FileNotFoundError(operation.source))
+        return self.apply_plan(remaining, cancel_token)
+
+    def undo_run(self, run_id, journal_dir=DEFAULT_JOURNAL_DIR, cancel_token=None):
+        """Move the files an earlier run moved back where they came from.
+
+        The run's journal is replayed in reverse. Files that have moved
+        on since, or whose old place is taken, are left alone. Trashed
+        items can't be brought back this way; restore them from the
+        Recycle Bin. Returns the apply_plan() results, with the number
+        of such items under "not_restorable".
+
+        Raises FileNotFoundError if there is no journal for run_id.
+        """
+        run = read_journal(journal_path(journal_dir, run_id))
+        logger.info(f"Undoing run {run_id}...")
+
+        operations = []
+        not_restorable = 0
+        for operation in reversed(run.completed):
+            if operation.action != MOVE:
+                not_restorable += 1
+                continue
+            if not os.path.lexists(operation.destination):
+                logger.warning(f"Not undoing move of {operation.source}: "
+                               f"{operation.destination} is no longer there")
+                continue
+            operations.append(FileOperation(
+                MOVE, operation.destination, operation.source, category=operation.category,
+                size=operation.size, reason=f"undo of run {run_id}"))
+
+        results = self.apply_plan(operations, cancel_token)
+        results["not_restorable"] = not_restorable
+        if not_restorable:
+            logger.warning(
+                f"{not_restorable} items were trashed or deleted by run {run_id}; "
+                f"restore them from the Recycle Bin")
+        return results
 
     def clean_recycle_bin(self):
         """Empty the Recycle Bin."""
         try:
-            # Open a handle to the recycle bin
             logger.info("Emptying Recycle Bin...")
-            winreg.SHEmptyRecycleBin(None, None, 0)
+            self.platform.empty_recycle_bin()
             logger.info("Recycle Bin emptied successfully.")
             return True
         except Exception as e:
             logger.error(f"Error emptying Recycle Bin: {e}")
             return False
 
+    def _cleanup_phases(self, organize_desktop, organize_downloads, clean_temp,
+                        clean_browser, empty_recycle):
+        """List the selected cleanup phases as (phase, result key, function, description)."""
+        phases = []
+        if clean_temp:
+            phases.append(("temp_files", "temp_files_deleted", self.clean_temp_files,
+                           "during temp file cleanup"))
+        if clean_browser:
+            phases.append(("browser_cache", "browser_cache_cleaned", self.clean_browser_cache,
+                           "during browser cache cleanup"))
+        if organize_desktop:
+            phases.append(("desktop", "desktop_files_organized",
+                           lambda: self.organize_directory(self.desktop_folder),
+                           "organizing desktop"))
+        if organize_downloads:
+            phases.append(("downloads", "downloads_files_organized",
+                           lambda: self.organize_directory(self.download_folder),
+                           "organizing downloads folder"))
+        if empty_recycle:
+            phases.append(("recycle_bin", "recycle_bin_emptied", self.clean_recycle_bin,
+                           "emptying recycle bin"))
+        return phases
+
+    def _run_phase(self, metrics, phase, function, description, deadline=None,
+                   cancel_token=None, rate_limiter=None):
+        """Run one phase's function, timed as phase; returns its result, or None on error.
+
+        With a deadline (a time.monotonic() value), the phase stops at
+        its next file once the deadline passes and PhaseTimeout is raised.
+        With a cancel_token, it waits at its next batch while the token
+        is paused and stops there once it is cancelled, returning what it
+        got done. A rate_limiter paces the phase in place of the
+        organizer's own.
+        """
+        channel = self.progress_channel
+        result = None
+        timed_out = False
+        with metrics.phase(phase):
+            self._local.deadline = deadline
+            self._local.cancel_token = cancel_token
+            self._local.rate_limiter = rate_limiter
+            self._local.phase = phase
+            if channel is not None:
+                channel.phase_started(phase)
+            try:
+                result = function()
+                return result
+            except PhaseTimeout:
+                logger.error(f"Stopped {description}: time limit reached")
+                self._count('errors')
+                timed_out = True
+                raise
+            except Exception as e:
+                logger.error(f"Error {description}: {e}")
+                self._count('errors')
+                return None
+            finally:
+                self._local.deadline = None
+                self._local.cancel_token = None
+                self._local.rate_limiter = None
+                self._local.phase = None
+                if channel is not None:
+                    channel.phase_finished(phase, result, timed_out)
+
+    def _check_browsers(self, metrics, results):
+        with metrics.phase("browser_check"):
+            running_browsers = self.check_running_browsers()
+        results["browsers_running"] = [browser for browser,
+                                       running in running_browsers.items() if running]
+
+        if results["browsers_running"]:
+            browsers_str = ", ".join(results["browsers_running"])
+            logger.warning(
+                f"Warning: The following browsers are running: {browsers_str}")
+            logger.warning(
+                "Some browser cache files might be skipped to avoid errors")
+
+    def _new_results(self):
+        return {
+            "temp_files_deleted": 0,
+            "browser_cache_cleaned": 0,
+            "desktop_files_organized": 0,
+            "downloads_files_organized": 0,
+            "recycle_bin_emptied": False,
+            "browsers_running": [],
+            "cancelled": False,
+            "metrics": {}
+        }
+
+    def _finish_run(self, results, metrics):
+        self.metrics = None
+        results["metrics"] = metrics.to_dict()
+        # Kept on the organizer too, for exporting with run_metrics
+        self.last_metrics = metrics
+
+        if results["cancelled"]:
+            logger.warning("File cleanup and organization process stopped early; totals are partial.")
+        else:
+            logger.info("File cleanup and organization process completed!")
+
+        # Summary message
+        total_cleaned = (results["temp_files_deleted"] +
+                         results["browser_cache_cleaned"] +
+                         results["desktop_files_organized"] +
+                         results["downloads_files_organized"])
+
+        logger.info(f"Total items processed: {total_cleaned}")
+
+        return results
+
     def run_cleanup(self, organize_desktop=True, organize_downloads=True, clean_temp=True,
-                    clean_browser=True, empty_recycle=False, check_running_apps=True):
+                    clean_browser=True, empty_recycle=False, check_running_apps=True,
+                    cancel_token=None, rate_limits=None):
         """Run the full cleanup and organization process.
 
         Args:
@@ -359,88 +1390,148 @@ class FileOrganizer:
             clean_browser: Whether to clean browser cache files
             empty_recycle: Whether to empty the recycle bin
             check_running_apps: If True, will check if browsers are running before cleaning
+            cancel_token: Optional cancellation.CancelToken to pause or stop
+                the run from another thread. A cancelled run finishes the
+                batch in flight, skips the remaining phases and returns
+                what it got done, with results["cancelled"] set
+            rate_limits: Optional dict of phase name ("temp_files",
+                "browser_cache", "desktop", "downloads") to an
+                io_throttle.RateLimiter pacing that phase; the others use
+                self.rate_limiter
         """
-        results = {
-            "temp_files_deleted": 0,
-            "browser_cache_cleaned": 0,
-            "desktop_files_organized": 0,
-            "downloads_files_organized": 0,
-            "recycle_bin_emptied": False,
-            "browsers_running": []
-        }
+        rate_limits = rate_limits or {}
+        results = self._new_results()
 
         logger.info("Starting file cleanup and organization process...")
 
+        # Time and count each phase; see run_metrics.COUNTERS
+        self.metrics = metrics = RunMetrics()
+
         # Check for running browsers if requested
         if check_running_apps and clean_browser:
-            running_browsers = self.check_running_browsers()
-            results["browsers_running"] = [browser for browser,
-                                           running in running_browsers.items() if running]
+            self._check_browsers(metrics, results)
+
+        # Run each phase in turn; a failed phase leaves its default result
+        for phase, key, function, description in self._cleanup_phases(
+                organize_desktop, organize_downloads, clean_temp, clean_browser, empty_recycle):
+            if cancel_token is not None and not cancel_token.proceed():
+                break
+            value = self._run_phase(metrics, phase, function, description,
+                                    cancel_token=cancel_token,
+                                    rate_limiter=rate_limits.get(phase))
+            if value is not None:
+                results[key] = value
+
+        results["cancelled"] = cancel_token is not None and cancel_token.cancelled
+
+        return self._finish_run(results, metrics)
+
+    async def run_cleanup_async(self, organize_desktop=True, organize_downloads=True,
+                                clean_temp=True, clean_browser=True, empty_recycle=False,
+                                check_running_apps=True, timeouts=None, max_workers=None,
+                                progress=None, cancel_token=None, rate_limits=None):
+        """Run the cleanup like run_cleanup, with the phases running concurrently.
+
+        Temp files, browser caches, the desktop and the downloads folder
+        are separate trees, so their phases run at the same time on a
+        bounded thread pool and the run takes about as long as its slowest
+        phase. The browser check still comes before the browser cache
+        phase, and the recycle bin is only emptied once the rest is done.
 
-            if results["browsers_running"]:
-                browsers_str = ", ".join(results["browsers_running"])
-                logger.warning(
-                    f"Warning: The following browsers are running: {browsers_str}")
-                logger.warning(
-                    "Some browser cache files might be skipped to avoid errors")
+        Args:
+            timeouts: Optional dict of phase name to seconds. A phase that
+                runs longer is stopped at its next file and listed in
+                results["timed_out"]
+            max_workers: Threads for the phases (default: one per phase)
+            progress: Optional function called on the event loop with a
+                dict for each event as it happens:
+                {"event": "phase_started", "phase": name}
+                {"event": "count", "phase": name, "counter": counter, "amount": amount}
+                {"event": "phase_finished", "phase": name, "result": value}
+                {"event": "phase_timed_out", "phase": name}
+
+        Other arguments, cancel_token and rate_limits included, and the
+        results are as for run_cleanup, with the names of timed out
+        phases added under "timed_out".
+        """
+        # Imported here; it is slow to import and only needed by this method
+        import asyncio
 
-        # Clean temporary files
-        if clean_temp:
-            try:
-                results["temp_files_deleted"] = self.clean_temp_files()
-            except Exception as e:
-                logger.error(f"Error during temp file cleanup: {e}")
-                results["temp_files_deleted"] = 0
+        loop = asyncio.get_running_loop()
+        timeouts = timeouts or {}
+        rate_limits = rate_limits or {}
+        results = self._new_results()
+        results["timed_out"] = []
 
-        # Clean browser cache
-        if clean_browser:
-            try:
-                results["browser_cache_cleaned"] = self.clean_browser_cache()
-            except Exception as e:
-                logger.error(f"Error during browser cache cleanup: {e}")
-                results["browser_cache_cleaned"] = 0
+        logger.info("Starting file cleanup and organization process...")
 
-        # Organize desktop
-        if organize_desktop:
-            try:
-                results["desktop_files_organized"] = self.organize_directory(
-                    self.desktop_folder)
-            except Exception as e:
-                logger.error(f"Error organizing desktop: {e}")
-                results["desktop_files_organized"] = 0
+        self.metrics = metrics = RunMetrics()
 
-        # Organize downloads
-        if organize_downloads:
-            try:
-                results["downloads_files_organized"] = self.organize_directory(
-                    self.download_folder)
-            except Exception as e:
-                logger.error(f"Error organizing downloads folder: {e}")
-                results["downloads_files_organized"] = 0
+        def emit(event):
+            if progress is not None:
+                loop.call_soon_threadsafe(progress, event)
 
-        # Empty recycle bin
-        if empty_recycle:
+        if progress is not None:
+            metrics.listener = lambda phase, counter, amount: emit(
+                {"event": "count", "phase": phase, "counter": counter, "amount": amount})
+
+        phases = self._cleanup_phases(organize_desktop, organize_downloads, clean_temp,
+                                      clean_browser, empty_recycle)
+        pool = ThreadPoolExecutor(max_workers=max_workers or max(len(phases), 1),
+                                  thread_name_prefix='FileOrganizerPhase')
+
+        async def run(phase, key, function, description):
+            timeout = timeouts.get(phase)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            emit({"event": "phase_started", "phase": phase})
             try:
-                results["recycle_bin_emptied"] = self.clean_recycle_bin()
-            except Exception as e:
-                logger.error(f"Error emptying recycle bin: {e}")
-                results["recycle_bin_emptied"] = False
+                value = await asyncio.wait_for(loop.run_in_executor(
+                    pool, self._run_phase, metrics, phase, function, description, deadline,
+                    cancel_token, rate_limits.get(phase)),
+                    timeout)
+            except (asyncio.TimeoutError, PhaseTimeout):
+                results["timed_out"].append(phase)
+                emit({"event": "phase_timed_out", "phase": phase})
+                return
+            if value is not None:
+                results[key] = value
+            emit({"event": "phase_finished", "phase": phase, "result": value})
+
+        async def check_then_run(*phase):
+            await loop.run_in_executor(pool, self._check_browsers, metrics, results)
+            await run(*phase)
 
-        logger.info("File cleanup and organization process completed!")
+        try:
+            tasks = []
+            for phase in phases:
+                if phase[0] == "recycle_bin":
+                    continue
+                if phase[0] == "browser_cache" and check_running_apps:
+                    tasks.append(check_then_run(*phase))
+                else:
+                    tasks.append(run(*phase))
+            await asyncio.gather(*tasks)
 
-        # Summary message
-        total_cleaned = (results["temp_files_deleted"] +
-                         results["browser_cache_cleaned"] +
-                         results["desktop_files_organized"] +
-                         results["downloads_files_organized"])
+            # Only empty the bin once everything bound for it is there;
+            # waiting out a pause on the pool keeps the loop responsive
+            for phase in phases:
+                if phase[0] == "recycle_bin" and (
+                        cancel_token is None or
+                        await loop.run_in_executor(pool, cancel_token.proceed)):
+                    await run(*phase)
+        finally:
+            # A timed out phase may still be finishing its current file;
+            # don't hold up the caller for it
+            pool.shutdown(wait=False)
 
-        logger.info(f"Total items processed: {total_cleaned}")
+        results["cancelled"] = cancel_token is not None and cancel_token.cancelled
 
-        return results
+        return self._finish_run(results, metrics)
 
 
 if __name__ == "__main__":
     import argparse
+    import signal
 
     parser = argparse.ArgumentParser(description="File Organizer and Cleaner")
 
@@ -452,26 +1543,265 @@ if __name__ == "__main__":
                         help="Skip cleaning temporary files")
     parser.add_argument("--no-browser", action="store_true",
                         help="Skip cleaning browser caches")
+    parser.add_argument("--temp-keep-days", type=float, metavar="DAYS",
+                        help="Keep temporary files modified within this many days "
+                             "(default: 0 on Windows, 10 elsewhere)")
+    parser.add_argument("--temp-max-size", type=parse_size, metavar="SIZE",
+                        help="Only clean enough temporary files to bring each temp folder down to this size, e.g. 2GB")
+    parser.add_argument("--temp-max-items", type=int, metavar="N",
+                        help="Remove at most N items from each temp folder per run")
+    parser.add_argument("--temp-order", choices=ORDERS, default="oldest",
+                        help="Which temporary files go first when not all of them have to (default: oldest)")
     parser.add_argument("--empty-recycle", action="store_true",
                         help="Empty the Recycle Bin")
+    parser.add_argument("--delete-caches", action="store_true",
+                        help="Delete browser cache files permanently instead of using the Recycle Bin")
     parser.add_argument("--organize-dir", type=str,
                         help="Organize a specific directory")
+    parser.add_argument("--find-duplicates", type=str, metavar="DIR",
+                        help="List files with identical content in a directory and its subfolders")
+    parser.add_argument("--trash-duplicates", action="store_true",
+                        help="With --find-duplicates, move all but the oldest copy to the Recycle Bin")
+    parser.add_argument("--analyze", type=str, metavar="DIR",
+                        help="Show how much space each category, extension and subfolder of a directory uses")
+    parser.add_argument("--analyze-json", type=str, metavar="FILE",
+                        help="With --analyze, also write the full report to a JSON file")
+    parser.add_argument("--top", type=int, default=20, metavar="N",
+                        help="With --analyze, list the N largest files (default: 20)")
+    parser.add_argument("--rules", type=str, metavar="FILE",
+                        help="Organize files by the rules in a TOML or JSON file before the default categories")
+    parser.add_argument("--sniff", action="store_true",
+                        help="Find the type of files with unknown extensions from their content")
+    parser.add_argument("--recursive", action="store_true",
+                        help="With --organize-dir, also organize files in subfolders")
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                        help="With --recursive, only descend N levels of subfolders")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="Number of threads used to move and trash files (default: 1)")
+    parser.add_argument("--full-rescan", action="store_true",
+                        help="Look at every file again, not just those changed since the last run")
+    parser.add_argument("--state-db", type=str, default=DEFAULT_STATE_PATH, metavar="FILE",
+                        help="Where to keep track of files seen by earlier runs")
+    parser.add_argument("--metrics-json", type=str, metavar="FILE",
+                        help="Write per-phase timings and counters to a JSON file")
+    parser.add_argument("--metrics-prom", type=str, metavar="FILE",
+                        help="Write per-phase timings and counters in Prometheus text format")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and organize new files in the desktop, downloads and --organize-dir folders as they arrive")
+    parser.add_argument("--settle", type=float, default=2.0, metavar="SECONDS",
+                        help="With --watch, wait until a file has not changed for this long before moving it (default: 2)")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Run the cleanup steps at the same time instead of one after another")
+    parser.add_argument("--phase-timeout", type=float, metavar="SECONDS",
+                        help="With --concurrent, stop any cleanup step that runs longer than this")
+    parser.add_argument("--ops-per-second", type=float, metavar="N",
+                        help="Start at most N moves or deletions a second, to spare a busy disk")
+    parser.add_argument("--bytes-per-second", type=parse_size, metavar="SIZE",
+                        help="Move or delete at most SIZE of files a second (e.g. 50MB)")
+    parser.add_argument("--adaptive-throttle", action="store_true",
+                        help="Slow down while moves and deletions take longer than --target-latency")
+    parser.add_argument("--target-latency", type=float, default=0.05, metavar="SECONDS",
+                        help="With --adaptive-throttle, how long a move or deletion may take on average (default: 0.05)")
+    parser.add_argument("--nice", type=int, metavar="N",
+                        help="Run the threads moving and deleting files at this niceness (0-19)")
+    parser.add_argument("--io-class", choices=sorted(IO_CLASSES),
+                        help="Linux I/O scheduling class of the threads moving and deleting files")
+    parser.add_argument("--io-level", type=int, default=7, metavar="N",
+                        help="With --io-class best-effort or realtime, the priority within it, 0 (highest) to 7 (default: 7)")
+    parser.add_argument("--journal-dir", type=str, default=DEFAULT_JOURNAL_DIR, metavar="DIR",
+                        help="Where to keep the journals of moves and trashes used by --resume and --undo")
+    parser.add_argument("--keep-journals", type=int, default=50, metavar="N",
+                        help="Keep the journals of the last N finished runs, for --undo (default: 50)")
+    parser.add_argument("--resume", action="store_true",
+                        help="First finish what the last interrupted run had planned, without scanning again")
+    parser.add_argument("--undo", type=str, metavar="RUN_ID",
+                        help="Move the files moved by an earlier run back where they came from")
+    parser.add_argument("--plan", type=str, metavar="FILE",
+                        help="Write the planned operations to a JSON Lines file instead of running them")
+    parser.add_argument("--apply", type=str, metavar="FILE",
+                        help="Run the operations from a plan written with --plan")
 
     args = parser.parse_args()
 
-    organizer = FileOrganizer()
-
-    if args.organize_dir:
-        if os.path.exists(args.organize_dir) and os.path.isdir(args.organize_dir):
-            organizer.organize_directory(args.organize_dir)
+    try:
+        io_priority = None
+        if args.nice or args.io_class:
+            io_priority = IOPriority(nice=args.nice, io_class=args.io_class, io_level=args.io_level)
+        rate_limiter = None
+        if args.ops_per_second or args.bytes_per_second or args.adaptive_throttle:
+            rate_limiter = RateLimiter(ops_per_second=args.ops_per_second,
+                                       bytes_per_second=args.bytes_per_second,
+                                       adaptive=args.adaptive_throttle,
+                                       target_latency=args.target_latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    organizer = FileOrganizer(workers=args.workers, io_priority=io_priority)
+    organizer.rate_limiter = rate_limiter
+    organizer.delete_caches_directly = args.delete_caches
+    organizer.sniff_content = args.sniff
+    keep_days = organizer.retention.keep_days if args.temp_keep_days is None else args.temp_keep_days
+    organizer.retention = RetentionPolicy(keep_days=keep_days,
+                                          directory_keep_days=max(2, keep_days),
+                                          max_bytes=args.temp_max_size,
+                                          max_items=args.temp_max_items,
+                                          order=args.temp_order)
+    if args.rules:
+        try:
+            organizer.rules = load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load rules from {args.rules}: {e}")
+            raise SystemExit(1)
+
+    if args.analyze:
+        if os.path.isdir(args.analyze):
+            report = organizer.analyze_disk_usage(args.analyze, top_n=args.top)
+            print(report.summary(rows=args.top))
+            if args.analyze_json:
+                report.write_json(args.analyze_json)
         else:
+            logger.error(
+                f"The specified directory does not exist: {args.analyze}")
+    elif args.plan and not args.apply:
+        if args.organize_dir and not os.path.isdir(args.organize_dir):
             logger.error(
                 f"The specified directory does not exist: {args.organize_dir}")
+        else:
+            if args.organize_dir:
+                operations = organizer.plan_organize(
+                    args.organize_dir, recursive=args.recursive, max_depth=args.max_depth)
+            else:
+                operations = organizer.plan_cleanup(
+                    organize_desktop=not args.no_desktop,
+                    organize_downloads=not args.no_downloads,
+                    clean_temp=not args.no_temp,
+                    clean_browser=not args.no_browser
+                )
+            count = write_plan(operations, args.plan)
+            logger.info(f"Wrote {count} planned operations to {args.plan}")
     else:
-        organizer.run_cleanup(
-            organize_desktop=not args.no_desktop,
-            organize_downloads=not args.no_downloads,
-            clean_temp=not args.no_temp,
-            clean_browser=not args.no_browser,
-            empty_recycle=args.empty_recycle
-        )
+        # Remember what each run left behind so the next one only looks at changes
+        organizer.state = ScanState(args.state_db, full_rescan=args.full_rescan)
+
+        # Journal every move and trash, so the run can be resumed or undone;
+        # listing duplicates and watching folders are not journaled
+        journal = interrupted = None
+        if args.resume:
+            journal, interrupted = OperationJournal.resume(args.journal_dir)
+            if journal is None:
+                logger.info("No interrupted run to resume")
+        report_only = args.find_duplicates and not args.trash_duplicates
+        if journal is None and not (report_only or args.watch):
+            prune_runs(args.journal_dir, keep=args.keep_journals)
+            journal = OperationJournal.create(args.journal_dir)
+        organizer.journal = journal
+        if journal is not None:
+            logger.info(f"Run {journal.run_id} (undo with --undo {journal.run_id})")
+        finished = False
+
+        # On Ctrl+C or SIGTERM, finish the batch in flight and report what
+        # got done; a second Ctrl+C stops at once
+        cancel_token = CancelToken()
+        stop_signals = []
+
+        def request_stop(signum, frame):
+            if cancel_token.cancelled:
+                raise KeyboardInterrupt
+            logger.warning("Stopping after the current batch (press Ctrl+C again to stop at once)...")
+            stop_signals.append(signum)
+            cancel_token.cancel()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        try:
+            if interrupted is not None:
+                organizer.resume_run(journal, interrupted, cancel_token)
+
+            if cancel_token.cancelled:
+                # Stopped while resuming; the rest waits for the next run
+                pass
+            elif args.undo:
+                try:
+                    organizer.undo_run(args.undo, args.journal_dir, cancel_token)
+                except FileNotFoundError:
+                    logger.error(f"No journal found for run {args.undo}")
+            elif args.apply:
+                organizer.apply_plan(read_plan(args.apply), cancel_token)
+            elif args.find_duplicates:
+                if os.path.isdir(args.find_duplicates):
+                    if args.trash_duplicates:
+                        organizer.clean_duplicates(args.find_duplicates)
+                    else:
+                        organizer.find_duplicates(args.find_duplicates)
+                else:
+                    logger.error(
+                        f"The specified directory does not exist: {args.find_duplicates}")
+            elif args.watch:
+                folders = []
+                if not args.no_desktop:
+                    folders.append(organizer.desktop_folder)
+                if not args.no_downloads:
+                    folders.append(organizer.download_folder)
+                if args.organize_dir:
+                    folders.append(args.organize_dir)
+                organizer.watch(folders, settle=args.settle, cancel_token=cancel_token)
+            elif args.organize_dir:
+                if os.path.exists(args.organize_dir) and os.path.isdir(args.organize_dir):
+                    organizer.organize_directory(
+                        args.organize_dir, recursive=args.recursive, max_depth=args.max_depth,
+                        cancel_token=cancel_token)
+                else:
+                    logger.error(
+                        f"The specified directory does not exist: {args.organize_dir}")
+            elif args.concurrent:
+                timeouts = None
+                if args.phase_timeout:
+                    timeouts = dict.fromkeys(("temp_files", "browser_cache", "desktop",
+                                              "downloads", "recycle_bin"), args.phase_timeout)
+
+                def log_progress(event):
+                    if event["event"] == "phase_finished":
+                        logger.info(f"Step finished: {event['phase']}")
+                    elif event["event"] == "phase_timed_out":
+                        logger.warning(f"Step timed out: {event['phase']}")
+
+                import asyncio
+                asyncio.run(organizer.run_cleanup_async(
+                    organize_desktop=not args.no_desktop,
+                    organize_downloads=not args.no_downloads,
+                    clean_temp=not args.no_temp,
+                    clean_browser=not args.no_browser,
+                    empty_recycle=args.empty_recycle,
+                    timeouts=timeouts,
+                    progress=log_progress,
+                    cancel_token=cancel_token
+                ))
+            else:
+                organizer.run_cleanup(
+                    organize_desktop=not args.no_desktop,
+                    organize_downloads=not args.no_downloads,
+                    clean_temp=not args.no_temp,
+                    clean_browser=not args.no_browser,
+                    empty_recycle=args.empty_recycle,
+                    cancel_token=cancel_token
+                )
+
+            # Only cleanup runs collect metrics
+            if organizer.last_metrics is not None:
+                if args.metrics_json:
+                    organizer.last_metrics.write_json(args.metrics_json)
+                if args.metrics_prom:
+                    organizer.last_metrics.write_prometheus(args.metrics_prom)
+            # A stopped run is left for --resume to finish; watching only
+            # ever ends by being stopped
+            finished = args.watch or not cancel_token.cancelled
+        finally:
+            # An interrupted run's journal stays open for --resume
+            if journal is not None:
+                journal.close(finished)
+            organizer.state.close()
+
+        if stop_signals and journal is not None and not args.watch:
+            logger.warning(f"Run {journal.run_id} stopped early; continue it with --resume")
+            raise SystemExit(128 + stop_signals[0])
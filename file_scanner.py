@@ -0,0 +1,216 @@
+import fnmatch
+import os
+import re
+import stat
+
+
+class ScanEntry:
+    """A directory entry with its type and stat data cached.
+
+    Wraps an os.DirEntry so callers can ask for the entry type, size and
+    modification time without going back to the filesystem. The type
+    comes straight from the directory listing and stat() is issued at
+    most once, the first time size or time information is needed.
+    """
+
+    __slots__ = ('name', 'path', '_entry', '_stat')
+
+    def __init__(self, entry):
+        self.name = entry.name
+        self.path = entry.path
+        self._entry = entry
+        self._stat = None
+
+    def __repr__(self):
+        return f"<ScanEntry {self.path!r}>"
+
+    def is_file(self, follow_symlinks=True):
+        """Return True if the entry is a file (or, by default, a symlink to one)."""
+        try:
+            return self._entry.is_file(follow_symlinks=follow_symlinks)
+        except OSError:
+            return False
+
+    def is_dir(self, follow_symlinks=True):
+        """Return True if the entry is a directory."""
+        try:
+            return self._entry.is_dir(follow_symlinks=follow_symlinks)
+        except OSError:
+            return False
+
+    def is_symlink(self):
+        """Return True if the entry itself is a symbolic link."""
+        try:
+            return self._entry.is_symlink()
+        except OSError:
+            return False
+
+    def stat(self):
+        """Return the stat result for the entry, calling stat() only once."""
+        if self._stat is None:
+            self._stat = self._entry.stat()
+        return self._stat
+
+    def inode(self):
+        """Return the inode number of the entry."""
+        return self._entry.inode()
+
+    @property
+    def size(self):
+        return self.stat().st_size
+
+    @property
+    def mtime(self):
+        return self.stat().st_mtime
+
+
+def scan_directory(directory):
+    """Scan the top level of a directory in a single pass.
+
+    The directory is opened immediately, so errors such as a missing
+    directory or denied access are raised by this call rather than on
+    first iteration. Returns an iterator of ScanEntry records.
+    """
+    iterator = os.scandir(directory)
+    return _iter_entries(iterator)
+
+
+def _iter_entries(iterator):
+    with iterator:
+        for entry in iterator:
+            yield ScanEntry(entry)
+
+
+class _PathEntry:
+    """Stand-in for os.DirEntry when an entry's name is already known."""
+
+    __slots__ = ('name', 'path')
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+
+    def is_file(self, follow_symlinks=True):
+        return stat.S_ISREG(self.stat(follow_symlinks=follow_symlinks).st_mode)
+
+    def is_dir(self, follow_symlinks=True):
+        return stat.S_ISDIR(self.stat(follow_symlinks=follow_symlinks).st_mode)
+
+    def is_symlink(self):
+        return stat.S_ISLNK(self.stat(follow_symlinks=False).st_mode)
+
+    def stat(self, follow_symlinks=True):
+        return os.stat(self.path, follow_symlinks=follow_symlinks)
+
+    def inode(self):
+        return self.stat(follow_symlinks=False).st_ino
+
+
+def scan_names(directory, names):
+    """Return ScanEntry records for the given names in a directory.
+
+    For when the interesting names are already known, such as from a
+    folder watcher, so the directory need not be listed. Names need not
+    exist; such entries are neither files nor directories.
+    """
+    return [ScanEntry(_PathEntry(directory, name)) for name in names]
+
+
+def compile_patterns(patterns):
+    """Compile name patterns into a single case-insensitive matcher.
+
+    Patterns containing glob characters (*, ? or [) must match the whole
+    name; plain strings match anywhere in the name, the way skip_patterns
+    have always been applied. Returns a function taking a name and
+    returning True if any pattern matches, or None if there are no
+    patterns.
+    """
+    parts = []
+    for pattern in patterns:
+        if any(char in pattern for char in '*?['):
+            parts.append(fnmatch.translate(pattern))
+        else:
+            parts.append(f"(?s:.*{re.escape(pattern)}.*)\\Z")
+    if not parts:
+        return None
+
+    regex = re.compile('|'.join(parts), re.IGNORECASE)
+    return lambda name: regex.match(name) is not None
+
+
+def _open_level(directory, sort):
+    if sort:
+        return iter(sorted(scan_directory(directory), key=lambda entry: entry.name))
+    return scan_directory(directory)
+
+
+def _directory_key(path):
+    info = os.stat(path)
+    return info.st_dev, info.st_ino
+
+
+def walk_directory(top, max_depth=None, exclude=None, prune=None,
+                   follow_symlinks=False, sort=False, on_error=None):
+    """Walk a directory tree, yielding a ScanEntry for every file in it.
+
+    The walk is iterative and keeps only one open listing per level of
+    the current path, so memory use depends on the depth of the tree
+    rather than its size. With sort=True each directory is read fully
+    and visited in name order instead, which costs memory proportional
+    to the largest single directory.
+
+    Args:
+        top: Directory to walk; it is not yielded itself
+        max_depth: How many levels of subdirectories to descend into
+            (0 lists top only); None for no limit
+        exclude: Name patterns (see compile_patterns) for files and
+            directories to leave out entirely
+        prune: Optional function called as prune(entry, depth) for each
+            directory; returning True skips that directory
+        follow_symlinks: Whether to descend into symlinked directories.
+            Directories already on the current path are never entered
+            again, so symlink loops end the descent instead of recursing
+        sort: Visit each directory's entries in name order
+        on_error: Optional function called as on_error(path, error) when a
+            subdirectory cannot be read; by default it is skipped silently
+    """
+    is_excluded = compile_patterns(exclude or [])
+    top_key = _directory_key(top) if follow_symlinks else None
+    # Each level holds (entries iterator, depth, directory identity)
+    stack = [(_open_level(top, sort), 0, top_key)]
+
+    try:
+        while stack:
+            entries, depth, _ = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            if is_excluded is not None and is_excluded(entry.name):
+                continue
+
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                if prune is not None and prune(entry, depth):
+                    continue
+
+                try:
+                    key = None
+                    if follow_symlinks:
+                        key = _directory_key(entry.path)
+                        if any(level[2] == key for level in stack):
+                            # Symlink back to a directory we are inside of
+                            continue
+                    stack.append((_open_level(entry.path, sort), depth + 1, key))
+                except OSError as e:
+                    if on_error is not None:
+                        on_error(entry.path, e)
+            elif entry.is_file():
+                yield entry
+    finally:
+        for entries, _, _ in stack:
+            close = getattr(entries, 'close', None)
+            if close is not None:
+                close()
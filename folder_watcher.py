@@ -0,0 +1,210 @@
+import os
+import select
+import stat
+import struct
+import sys
+import time
+
+# Names browsers and download tools give files that are still arriving;
+# the file shows up again under its final name once it is complete
+PARTIAL_SUFFIXES = ('.crdownload', '.part', '.partial', '.download',
+                    '.opdownload', '.tmp', '!ut')
+
+# inotify event flags (from <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+class PollingWatcher:
+    """Watches folders by listing them every interval seconds.
+
+    Works on every platform. Reports files that are new or whose size
+    or modification time changed since the previous listing.
+    """
+
+    def __init__(self, folders, interval=2.0):
+        self.interval = interval
+        self._snapshots = {folder: self._snapshot(folder) for folder in folders}
+        self._next_poll = time.monotonic() + interval
+
+    def _snapshot(self, folder):
+        files = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            info = entry.stat()
+                            files[entry.name] = (info.st_size, info.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files
+
+    def read_events(self, timeout):
+        """Wait up to timeout seconds; return a list of (folder, name) changes."""
+        delay = self._next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return []
+        if delay > 0:
+            time.sleep(delay)
+        self._next_poll = time.monotonic() + self.interval
+
+        changes = []
+        for folder, previous in self._snapshots.items():
+            current = self._snapshot(folder)
+            changes.extend((folder, name) for name, signature in current.items()
+                           if previous.get(name) != signature)
+            self._snapshots[folder] = current
+        return changes
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class InotifyWatcher:
+    """Watches folders with Linux inotify, so changes arrive as they happen.
+
+    Only the folders themselves are watched, not their subfolders. If the
+    kernel's event queue overflows, (folder, None) is reported for every
+    folder, meaning it has to be looked at in full.
+    """
+
+    def __init__(self, folders):
+        # Imported here so runs that never watch don't pay for ctypes
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                                 use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._folders = {}  # watch descriptor -> folder
+        try:
+            for folder in folders:
+                wd = self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+                if wd < 0:
+                    errno_value = ctypes.get_errno()
+                    raise OSError(errno_value, os.strerror(errno_value), folder)
+                self._folders[wd] = folder
+        except BaseException:
+            self.close()
+            raise
+
+    def read_events(self, timeout):
+        """Wait up to timeout seconds; return a list of (folder, name) changes."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        changes = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    changes.extend((folder, None) for folder in self._folders.values())
+                elif wd in self._folders and name:
+                    changes.append((self._folders[wd], os.fsdecode(name)))
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def make_watcher(folders, poll_interval=2.0):
+    """Return an inotify watcher on Linux, or a polling watcher elsewhere."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError):
+            # No libc inotify, or out of watches; polling still works
+            pass
+    return PollingWatcher(folders, poll_interval)
+
+
+def _list_files(folder):
+    try:
+        with os.scandir(folder) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+    except OSError:
+        return []
+
+
+def settled_files(watcher, settle=2.0, should_stop=None):
+    """Yield (folder, names) for files that have finished arriving.
+
+    A file counts as finished once its size and modification time have
+    not changed for settle seconds and its name does not mark an
+    unfinished download. Names are yielded in sorted batches per folder.
+    Runs until should_stop() returns True, if given.
+    """
+    pending = {}  # (folder, name) -> ((size, mtime_ns), when last changed)
+
+    while should_stop is None or not should_stop():
+        timeout = settle / 2 if pending else 1.0
+        for folder, name in watcher.read_events(timeout):
+            if name is None:
+                for listed in _list_files(folder):
+                    pending.setdefault((folder, listed), None)
+            else:
+                pending[(folder, name)] = None
+
+        now = time.monotonic()
+        ready = {}
+        for key, last in list(pending.items()):
+            folder, name = key
+            if name.lower().endswith(PARTIAL_SUFFIXES):
+                del pending[key]
+                continue
+            try:
+                info = os.stat(os.path.join(folder, name))
+            except OSError:
+                # Gone already, moved or deleted by someone else
+                del pending[key]
+                continue
+            if not stat.S_ISREG(info.st_mode):
+                del pending[key]
+                continue
+
+            signature = (info.st_size, info.st_mtime_ns)
+            if last is None or last[0] != signature:
+                pending[key] = (signature, now)
+            elif now - last[1] >= settle:
+                del pending[key]
+                ready.setdefault(folder, []).append(name)
+
+        for folder, names in ready.items():
+            yield folder, sorted(names)
@@ -1,4 +1,11 @@
-from file_organizer import FileOrganizer
+from cancellation import CancelToken
+from disk_usage import format_size
+from file_organizer import FileOrganizer, logger
+from preview_cache import PreviewCache, directory_stamp
+from progress_channel import ChannelLogHandler, ProgressChannel, ProgressTracker
+from rules_engine import load_rules
+from virtual_treeview import VirtualTreeview
+import asyncio
 import os
 import sys
 import tkinter as tk
@@ -11,6 +18,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 class FileOrganizerGUI:
+    # Milliseconds between checks for progress sent by worker threads, and
+    # the most events applied per check
+    poll_interval = 100
+    poll_batch = 10000
+    # Lines kept in the Logs tab
+    max_log_lines = 5000
+    # Planned moves sent from the preview scan at a time, at most
+    # preview_interval seconds apart
+    preview_batch = 2000
+    preview_interval = 0.2
+
     def __init__(self, root):
         self.root = root
         self.root.title("File Organizer & Cleaner")
@@ -26,6 +44,27 @@ class FileOrganizerGUI:
         # Initialize FileOrganizer
         self.organizer = FileOrganizer()
 
+        # Worker threads never touch widgets; they send progress, warnings
+        # and finished results through this channel, and _poll_progress
+        # applies them on the Tk thread
+        self.channel = ProgressChannel()
+        self.organizer.progress_channel = self.channel
+        logger.addHandler(ChannelLogHandler(self.channel))
+        # ProgressTracker of the task in progress, and its number of steps
+        # (None when unknown)
+        self.tracker = None
+        self.task = None
+        self.steps = None
+        # CancelToken the task in progress pauses and stops with
+        self.cancel_token = None
+
+        # The Organize tab's preview is scanned on a worker thread; each
+        # scan has a number so results of an abandoned one are ignored
+        self.preview_cache = PreviewCache()
+        self.preview_scan = 0
+        self.preview_token = None
+        self.preview_directory = None
+
         # Create main frame
         main_frame = ttk.Frame(self.root, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -70,6 +109,18 @@ class FileOrganizerGUI:
                                         variable=self.progress_var)
         self.progress.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
 
+        # Pause and stop the task in progress
+        controls = ttk.Frame(self.root)
+        controls.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
+        self.stop_button = ttk.Button(controls, text="Stop", command=self.stop_task,
+                                      state=tk.DISABLED)
+        self.stop_button.pack(side=tk.RIGHT)
+        self.pause_button = ttk.Button(controls, text="Pause", command=self.toggle_pause,
+                                       state=tk.DISABLED)
+        self.pause_button.pack(side=tk.RIGHT, padx=5)
+
+        self.root.after(self.poll_interval, self._poll_progress)
+
     def _setup_quick_clean_tab(self):
         # Quick Clean Options
         frame = ttk.LabelFrame(self.quick_clean_tab,
@@ -106,9 +157,14 @@ class FileOrganizerGUI:
         ttk.Checkbutton(advanced_frame, text="Check for running applications before cleaning",
                         variable=self.check_running_apps_var).pack(anchor=tk.W, pady=2)
 
+        self.delete_caches_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(advanced_frame, text="Delete browser cache permanently (faster, skips Recycle Bin)",
+                        variable=self.delete_caches_var).pack(anchor=tk.W, pady=2)
+
         # Run Button
-        ttk.Button(frame, text="Start Quick Clean",
-                   command=self.start_quick_clean).pack(pady=20)
+        self.quick_clean_button = ttk.Button(frame, text="Start Quick Clean",
+                                             command=self.start_quick_clean)
+        self.quick_clean_button.pack(pady=20)
 
         # Results frame
         results_frame = ttk.LabelFrame(
@@ -136,17 +192,38 @@ class FileOrganizerGUI:
         ttk.Button(dir_frame, text="Browse...",
                    command=self.browse_directory).pack(side=tk.RIGHT, padx=5)
 
-        # Organize button
-        ttk.Button(frame, text="Organize Files",
-                   command=self.organize_selected_dir).pack(pady=20)
+        self.recursive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Include files in subfolders", variable=self.recursive_var,
+                        command=self.refresh_preview).pack(anchor=tk.W, pady=5)
+
+        self.sniff_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Detect the type of files with unknown extensions from their content",
+                        variable=self.sniff_var, command=self.refresh_preview).pack(anchor=tk.W, pady=5)
+
+        # Organize and disk usage buttons
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(pady=20)
+        self.organize_button = ttk.Button(button_frame, text="Organize Files",
+                                          command=self.organize_selected_dir)
+        self.organize_button.pack(side=tk.LEFT, padx=5)
+        self.usage_button = ttk.Button(button_frame, text="Analyze Disk Usage",
+                                       command=self.analyze_selected_dir)
+        self.usage_button.pack(side=tk.LEFT, padx=5)
 
         # Preview frame
         preview_frame = ttk.LabelFrame(frame, text="Preview", padding=10)
         preview_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
-        self.preview_text = tk.Text(preview_frame, height=10, wrap=tk.WORD)
-        self.preview_text.pack(fill=tk.BOTH, expand=True)
-        self.preview_text.config(state=tk.DISABLED)
+        # Files per category, updated as the scan goes
+        self.preview_var = tk.StringVar(value="Select a directory to see where its files would go.")
+        ttk.Label(preview_frame, textvariable=self.preview_var, wraplength=540,
+                  justify=tk.LEFT).pack(anchor=tk.W, fill=tk.X)
+
+        # The planned moves; only the rows in view become Treeview items
+        self.preview_tree = VirtualTreeview(
+            preview_frame, [("File", 220), ("Moves to", 220), ("Size", 80)],
+            format_row=self._preview_row)
+        self.preview_tree.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
 
     def _setup_custom_tab(self):
         frame = ttk.Frame(self.custom_tab, padding=10)
@@ -182,8 +259,21 @@ class FileOrganizerGUI:
         ttk.Button(dir_select_frame, text="Browse...",
                    command=self.browse_custom_directory).pack(side=tk.RIGHT, padx=5)
 
-        ttk.Button(custom_dir_frame, text="Organize with Custom Rules",
-                   command=self.organize_custom_dir).pack(pady=10)
+        ttk.Label(custom_dir_frame, text="Rules file (TOML or JSON):").pack(
+            anchor=tk.W, pady=5)
+
+        rules_select_frame = ttk.Frame(custom_dir_frame)
+        rules_select_frame.pack(fill=tk.X, pady=5)
+
+        self.rules_file_var = tk.StringVar()
+        ttk.Entry(rules_select_frame, textvariable=self.rules_file_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(rules_select_frame, text="Browse...",
+                   command=self.browse_rules_file).pack(side=tk.RIGHT, padx=5)
+
+        self.custom_button = ttk.Button(custom_dir_frame, text="Organize with Custom Rules",
+                                        command=self.organize_custom_dir)
+        self.custom_button.pack(pady=10)
 
     def _setup_logs_tab(self):
         frame = ttk.Frame(self.logs_tab, padding=10)
@@ -221,140 +311,389 @@ class FileOrganizerGUI:
         if directory:
             self.custom_dir_var.set(directory)
 
-    def update_preview(self, directory):
-        """Update the preview text with what files will be organized."""
-        self.preview_text.config(state=tk.NORMAL)
-        self.preview_text.delete(1.0, tk.END)
+    def browse_rules_file(self):
+        path = filedialog.askopenfilename(
+            filetypes=[("Rules files", "*.toml *.json"), ("All files", "*.*")])
+        if path:
+            self.rules_file_var.set(path)
 
-        try:
-            if not os.path.exists(directory):
-                self.preview_text.insert(tk.END, "Directory does not exist.")
-                return
+    def refresh_preview(self):
+        if self.dir_var.get():
+            self.update_preview(self.dir_var.get())
 
-            file_count = 0
-            category_counts = {
-                category: 0 for category in self.organizer.file_types}
+    def update_preview(self, directory):
+        """Show the moves organizing directory would make.
+
+        The directory is scanned on a worker thread and the moves are
+        shown as they are planned; a directory previewed recently and
+        unchanged since is shown at once from preview_cache.
+        """
+        # Only the latest scan counts; stop the one before it
+        if self.preview_token is not None:
+            self.preview_token.cancel()
+            self.preview_token = None
+        self.preview_scan += 1
+        self.preview_directory = directory
+        self.preview_tree.set_rows([])
+
+        if not os.path.isdir(directory):
+            self.preview_var.set("Directory does not exist.")
+            return
 
-            for item in os.listdir(directory):
-                item_path = os.path.join(directory, item)
+        recursive = self.recursive_var.get()
+        sniff_content = self.sniff_var.get()
+        key = (os.path.abspath(directory), recursive, sniff_content)
 
-                if os.path.isfile(item_path):
-                    category = self.organizer.get_file_category(item_path)
-                    category_counts[category] += 1
-                    file_count += 1
+        cached = self.preview_cache.get(key, directory)
+        if cached is not None:
+            operations, counts = cached
+            self.preview_tree.set_rows(list(operations))
+            self._show_preview_counts(counts, done=True)
+            return
 
-            self.preview_text.insert(
-                tk.END, f"Found {file_count} files to organize:\n\n")
+        self.preview_var.set("Scanning...")
+        self.preview_token = CancelToken()
+        threading.Thread(target=self._scan_preview, args=(
+            directory, key, recursive, sniff_content, self.preview_scan, self.preview_token),
+            daemon=True).start()
+
+    def _scan_preview(self, directory, key, recursive, sniff_content, scan, cancel_token):
+        """Plan the moves for the preview; runs on a worker thread."""
+        stamp = directory_stamp(directory)
+        operations = []
+        counts = {}  # category -> [files, bytes]
+        sent = 0
+        sent_at = time.monotonic()
+        try:
+            # Options go with the call; the organizer is shared with tasks
+            for operation in self.organizer.plan_organize(directory, recursive=recursive,
+                                                          sniff_content=sniff_content):
+                if cancel_token.cancelled:
+                    return
+                operations.append(operation)
+                totals = counts.setdefault(operation.category, [0, 0])
+                totals[0] += 1
+                totals[1] += operation.size or 0
+
+                if len(operations) - sent >= self.preview_batch or \
+                        time.monotonic() - sent_at >= self.preview_interval:
+                    self.channel.call(self._preview_progress, scan, operations[sent:],
+                                      {category: list(totals) for category, totals in counts.items()})
+                    sent = len(operations)
+                    sent_at = time.monotonic()
+        except Exception as e:
+            self.channel.call(self._preview_failed, scan, e)
+            return
 
-            for category, count in category_counts.items():
-                if count > 0:
-                    self.preview_text.insert(
-                        tk.END, f"{category}: {count} files\n")
+        self.channel.call(self._preview_progress, scan, operations[sent:], counts)
+        self.channel.call(self._preview_finished, scan, key, stamp, operations, counts)
+
+    def _preview_progress(self, scan, operations, counts):
+        if scan == self.preview_scan:
+            self.preview_tree.extend(operations)
+            self._show_preview_counts(counts)
+
+    def _preview_finished(self, scan, key, stamp, operations, counts):
+        self.preview_cache.put(key, stamp, (operations, counts))
+        if scan == self.preview_scan:
+            self.preview_token = None
+            self._show_preview_counts(counts, done=True)
+
+    def _preview_failed(self, scan, error):
+        if scan == self.preview_scan:
+            self.preview_token = None
+            self.preview_var.set(f"Error generating preview: {error}")
+
+    def _show_preview_counts(self, counts, done=False):
+        files = sum(totals[0] for totals in counts.values())
+        size = sum(totals[1] for totals in counts.values())
+        if done:
+            summary = f"{files:,} files to move ({format_size(size)})"
+        else:
+            summary = f"Scanning... {files:,} files so far ({format_size(size)})"
+        categories = sorted(counts.items(), key=lambda item: -item[1][0])
+        if categories:
+            summary += ": " + ", ".join(f"{category} {totals[0]:,}"
+                                        for category, totals in categories)
+        self.preview_var.set(summary)
+
+    def _preview_row(self, operation):
+        directory = self.preview_directory
+        return (os.path.relpath(operation.source, directory),
+                os.path.relpath(operation.destination, directory),
+                "" if operation.size is None else format_size(operation.size))
+
+    def analyze_selected_dir(self):
+        """Show where the space in the selected directory goes."""
+        directory = self.dir_var.get()
+        if not directory or not os.path.isdir(directory):
+            messagebox.showwarning(
+                "No Directory Selected", "Please select an existing directory first.")
+            return
+
+        self.usage_button.config(state=tk.DISABLED)
+        self.status_var.set(f"Analyzing disk usage in {directory}...")
+        # The walk can take a while on large trees; keep it off the Tk thread
+        threading.Thread(target=self._analyze_usage, args=(
+            directory, self.recursive_var.get()), daemon=True).start()
 
+    def _analyze_usage(self, directory, recursive):
+        """Run the disk usage analysis; runs on a worker thread."""
+        try:
+            report = self.organizer.analyze_disk_usage(directory, recursive=recursive, top_n=10)
         except Exception as e:
-            self.preview_text.insert(tk.END, f"Error generating preview: {e}")
+            self.channel.call(self._usage_failed, e)
+        else:
+            self.channel.call(self._show_usage, report)
+
+    def _show_usage(self, report):
+        self.usage_button.config(state=tk.NORMAL)
+        self.status_var.set("Disk usage analysis completed.")
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Disk Usage - {report.top}")
+        window.geometry("600x400")
+        # Fixed-width font and no wrapping keep the summary table aligned
+        text = tk.Text(window, wrap=tk.NONE, font="TkFixedFont")
+        text.pack(fill=tk.BOTH, expand=True)
+        text.insert(tk.END, report.summary())
+        text.config(state=tk.DISABLED)
+
+    def _usage_failed(self, error):
+        self.usage_button.config(state=tk.NORMAL)
+        self.status_var.set(f"Error: {error}")
+        messagebox.showerror(
+            "Error", f"Could not analyze disk usage: {error}")
+
+    def _poll_progress(self):
+        """Apply what worker threads sent since the last call; runs on a Tk timer."""
+        update = self.channel.drain(self.poll_batch)
+        try:
+            if self.tracker is not None:
+                self.tracker.apply(update)
+                self._show_progress()
+            if update.errors:
+                self._append_logs([message for _, message in update.errors],
+                                  update.dropped_errors)
+            for function, args in update.calls:
+                function(*args)
+        finally:
+            # Come back right away while events are piling up
+            more = update.events >= self.poll_batch
+            self.root.after(1 if more else self.poll_interval, self._poll_progress)
+
+    def _start_task(self, task, steps=None):
+        """Reset the progress display for a task of steps steps (None if unknown).
+
+        Returns the CancelToken to hand to the task's worker thread.
+        """
+        self.tracker = ProgressTracker()
+        self.task = task
+        self.steps = steps
+        self.cancel_token = CancelToken()
+        self.pause_button.config(text="Pause", state=tk.NORMAL)
+        self.stop_button.config(state=tk.NORMAL)
+        # One task at a time; a second would take over the token and tracker
+        self._set_task_buttons(tk.DISABLED)
+        self.status_var.set(f"{task}...")
+        if steps:
+            self.progress.config(mode='determinate')
+            self.progress_var.set(0)
+        else:
+            self.progress.config(mode='indeterminate')
+            self.progress.start(20)
+        return self.cancel_token
+
+    def _show_progress(self):
+        tracker = self.tracker
+        if self.steps:
+            self.progress_var.set(100 * len(tracker.finished) / self.steps)
+
+        files_per_second, bytes_per_second = tracker.rates()
+        status = (f"{self.task}: {tracker.files:,} items, {format_size(tracker.bytes)} "
+                  f"({files_per_second:,.0f} items/s, {format_size(bytes_per_second)}/s)")
+        if tracker.running:
+            status += f" - {', '.join(tracker.running)}"
+        if tracker.errors:
+            status += f" - {tracker.errors:,} errors"
+        if self.cancel_token.cancelled:
+            status += " - stopping after the current batch"
+        elif self.cancel_token.paused:
+            status += " - paused"
+        self.status_var.set(status)
+
+    def _finish_task(self, status):
+        self.progress.stop()
+        self.progress.config(mode='determinate')
+        self.progress_var.set(100)
+        self.status_var.set(status)
+        self.tracker = None
+        self.cancel_token = None
+        self.pause_button.config(text="Pause", state=tk.DISABLED)
+        self.stop_button.config(state=tk.DISABLED)
+        self._set_task_buttons(tk.NORMAL)
+
+    def _task_running(self):
+        """Return True, after telling the user, if a task is already in progress."""
+        if self.cancel_token is None:
+            return False
+        messagebox.showinfo("Task Running",
+                            "Please wait for the current task to finish, or stop it first.")
+        return True
+
+    def _set_task_buttons(self, state):
+        for button in (self.quick_clean_button, self.organize_button, self.custom_button):
+            button.config(state=state)
+
+    def toggle_pause(self):
+        """Pause the task in progress at its next batch, or let it go on."""
+        if self.cancel_token is None:
+            return
+        if self.cancel_token.paused:
+            self.cancel_token.resume()
+            self.pause_button.config(text="Pause")
+        else:
+            self.cancel_token.pause()
+            self.pause_button.config(text="Resume")
+        self._show_progress()
+
+    def stop_task(self):
+        """Stop the task in progress once its current batch is done."""
+        if self.cancel_token is None:
+            return
+        self.cancel_token.cancel()
+        self.pause_button.config(text="Pause", state=tk.DISABLED)
+        self.stop_button.config(state=tk.DISABLED)
+        self._show_progress()
 
-        self.preview_text.config(state=tk.DISABLED)
+    def _append_logs(self, messages, dropped=0):
+        self.logs_text.config(state=tk.NORMAL)
+        self.logs_text.insert(tk.END, ''.join(f"{message}\n" for message in messages))
+        if dropped:
+            self.logs_text.insert(tk.END, f"... and {dropped} more\n")
+        # Keep the widget from growing without bound on long runs
+        lines = int(self.logs_text.index('end-1c').split('.')[0])
+        if lines > self.max_log_lines:
+            self.logs_text.delete(1.0, f"{lines - self.max_log_lines}.0")
+        self.logs_text.see(tk.END)
+        self.logs_text.config(state=tk.DISABLED)
 
     def start_quick_clean(self):
         """Start the quick clean process in a separate thread."""
-        self.status_var.set("Cleaning in progress...")
-        self.progress_var.set(0)
+        if self._task_running():
+            return
+
+        # Tk variables are read here, on the Tk thread, not by the worker
+        options = dict(
+            organize_desktop=self.organize_desktop_var.get(),
+            organize_downloads=self.organize_downloads_var.get(),
+            clean_temp=self.clean_temp_var.get(),
+            clean_browser=self.clean_browser_var.get(),
+            empty_recycle=self.empty_recycle_var.get(),
+            check_running_apps=self.check_running_apps_var.get(),
+        )
+        self.organizer.delete_caches_directly = self.delete_caches_var.get()
+
+        # Clear previous results
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.config(state=tk.DISABLED)
 
-        # Disable buttons during cleaning
-        for widget in self.quick_clean_tab.winfo_children():
-            if isinstance(widget, ttk.Button):
-                widget.config(state=tk.DISABLED)
+        # The progress bar follows the selected steps
+        steps = [options['clean_temp'], options['clean_browser'], options['organize_desktop'],
+                 options['organize_downloads'], options['empty_recycle']].count(True)
+        cancel_token = self._start_task("Cleaning", steps)
 
         # Start cleaning in a separate thread
-        threading.Thread(target=self._do_quick_clean, daemon=True).start()
+        threading.Thread(target=self._do_quick_clean, args=(options, cancel_token),
+                         daemon=True).start()
 
-    def _do_quick_clean(self):
-        """Perform the actual cleaning process."""
+    def _do_quick_clean(self, options, cancel_token):
+        """Perform the actual cleaning process; runs on a worker thread."""
         try:
-            # Clear previous results
-            self.results_text.config(state=tk.NORMAL)
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.config(state=tk.DISABLED)
-
-            self.progress_var.set(10)  # Start progress
-
-            # Run cleanup with selected options
-            results = self.organizer.run_cleanup(
-                organize_desktop=self.organize_desktop_var.get(),
-                organize_downloads=self.organize_downloads_var.get(),
-                clean_temp=self.clean_temp_var.get(),
-                clean_browser=self.clean_browser_var.get(),
-                empty_recycle=self.empty_recycle_var.get(),
-                check_running_apps=self.check_running_apps_var.get()
-            )
-
-            self.progress_var.set(90)  # Almost done
-
-            # Update results text
-            self.results_text.config(state=tk.NORMAL)
+            # Run cleanup with selected options; the steps run side by side
+            results = asyncio.run(self.organizer.run_cleanup_async(
+                **options, cancel_token=cancel_token))
+        except Exception as e:
+            self.channel.call(self._quick_clean_failed, e)
+        else:
+            self.channel.call(self._show_clean_results, options, results)
+
+    def _show_clean_results(self, options, results):
+        # Update results text
+        self.results_text.config(state=tk.NORMAL)
+        if results['cancelled']:
+            self.results_text.insert(tk.END, "Cleanup stopped; the counts below are what got done.\n\n")
+        else:
             self.results_text.insert(tk.END, "Cleanup completed!\n\n")
 
-            # Show any running browsers
-            if 'browsers_running' in results and results['browsers_running']:
-                browsers_str = ", ".join(results['browsers_running'])
-                self.results_text.insert(
-                    tk.END, f"⚠️ Note: The following browsers were running during cleanup: {browsers_str}\n")
-                self.results_text.insert(
-                    tk.END, "Some browser cache files may have been skipped to avoid errors.\n\n")
-
-            if self.clean_temp_var.get():
-                self.results_text.insert(
-                    tk.END, f"Temporary Files Cleaned: {results['temp_files_deleted']} items\n")
-                # Add note about in-use files if applicable
-                if hasattr(self.organizer, 'skipped_files') and self.organizer.skipped_files > 0:
-                    self.results_text.insert(
-                        tk.END, f"(Some files were in use and skipped)\n")
+        # Show any running browsers
+        if 'browsers_running' in results and results['browsers_running']:
+            browsers_str = ", ".join(results['browsers_running'])
+            self.results_text.insert(
+                tk.END, f"⚠️ Note: The following browsers were running during cleanup: {browsers_str}\n")
+            self.results_text.insert(
+                tk.END, "Some browser cache files may have been skipped to avoid errors.\n\n")
 
-            if self.clean_browser_var.get():
-                self.results_text.insert(
-                    tk.END, f"Browser Cache Cleaned: {results['browser_cache_cleaned']} items\n")
+        phases = results.get('metrics', {}).get('phases', {})
 
-            if self.organize_desktop_var.get():
-                self.results_text.insert(
-                    tk.END, f"Desktop Files Organized: {results['desktop_files_organized']} files\n")
-
-            if self.organize_downloads_var.get():
+        if options['clean_temp']:
+            self.results_text.insert(
+                tk.END, f"Temporary Files Cleaned: {results['temp_files_deleted']} items\n")
+            # Add note about in-use files if applicable
+            if phases.get('temp_files', {}).get('skipped', 0) > 0:
                 self.results_text.insert(
-                    tk.END, f"Downloads Files Organized: {results['downloads_files_organized']} files\n")
+                    tk.END, f"(Some files were in use and skipped)\n")
 
-            if self.empty_recycle_var.get():
-                status = "Successfully emptied" if results['recycle_bin_emptied'] else "Failed to empty"
-                self.results_text.insert(tk.END, f"Recycle Bin: {status}\n")
+        if options['clean_browser']:
+            self.results_text.insert(
+                tk.END, f"Browser Cache Cleaned: {results['browser_cache_cleaned']} items\n")
 
-            # Add total count
-            total_processed = (results["temp_files_deleted"] +
-                               results["browser_cache_cleaned"] +
-                               results["desktop_files_organized"] +
-                               results["downloads_files_organized"])
+        if options['organize_desktop']:
             self.results_text.insert(
-                tk.END, f"\nTotal items processed: {total_processed}\n")
+                tk.END, f"Desktop Files Organized: {results['desktop_files_organized']} files\n")
 
-            self.results_text.config(state=tk.DISABLED)
+        if options['organize_downloads']:
+            self.results_text.insert(
+                tk.END, f"Downloads Files Organized: {results['downloads_files_organized']} files\n")
+
+        if options['empty_recycle']:
+            status = "Successfully emptied" if results['recycle_bin_emptied'] else "Failed to empty"
+            self.results_text.insert(tk.END, f"Recycle Bin: {status}\n")
+
+        # Add total count
+        total_processed = (results["temp_files_deleted"] +
+                           results["browser_cache_cleaned"] +
+                           results["desktop_files_organized"] +
+                           results["downloads_files_organized"])
+        self.results_text.insert(
+            tk.END, f"\nTotal items processed: {total_processed}\n")
+
+        # Show where the time went
+        if phases:
+            self.results_text.insert(tk.END, "\nTime per step:\n")
+            for phase, metrics in phases.items():
+                self.results_text.insert(
+                    tk.END, f"  {phase}: {metrics['wall_time']:.1f}s, "
+                            f"{metrics['entries_scanned']} items scanned\n")
 
-            self.progress_var.set(100)  # Complete
-            self.status_var.set("Cleanup completed successfully!")
+        self.results_text.config(state=tk.DISABLED)
 
-        except Exception as e:
-            self.results_text.config(state=tk.NORMAL)
-            self.results_text.insert(tk.END, f"Error during cleanup: {e}")
-            self.results_text.config(state=tk.DISABLED)
+        self._finish_task("Cleanup stopped." if results['cancelled']
+                          else "Cleanup completed successfully!")
 
-            self.status_var.set(f"Error: {str(e)}")
+    def _quick_clean_failed(self, error):
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.insert(tk.END, f"Error during cleanup: {error}")
+        self.results_text.config(state=tk.DISABLED)
 
-        finally:
-            # Re-enable buttons
-            for widget in self.quick_clean_tab.winfo_children():
-                if isinstance(widget, ttk.Button):
-                    widget.config(state=tk.NORMAL)
+        self._finish_task(f"Error: {error}")
 
     def organize_selected_dir(self):
         """Organize the selected directory."""
+        if self._task_running():
+            return
+
         directory = self.dir_var.get()
 
         if not directory:
@@ -367,37 +706,58 @@ class FileOrganizerGUI:
                 "Error", "The selected directory does not exist.")
             return
 
-        self.status_var.set(f"Organizing {directory}...")
-        self.progress_var.set(10)
+        cancel_token = self._start_task(f"Organizing {directory}")
 
         # Start organizing in a separate thread
         threading.Thread(target=self._do_organize, args=(
-            directory,), daemon=True).start()
+            directory, cancel_token, self.recursive_var.get(), None, self.sniff_var.get()),
+            daemon=True).start()
 
-    def _do_organize(self, directory):
-        """Perform the actual organization."""
+    def _do_organize(self, directory, cancel_token, recursive=False, rules=None,
+                     sniff_content=False):
+        """Perform the actual organization; runs on a worker thread."""
+        error = None
         try:
-            # Organize directory
-            files_organized = self.organizer.organize_directory(directory)
-
-            self.progress_var.set(100)
-            self.status_var.set(
-                f"Organization completed. {files_organized} files organized.")
-
-            # Update preview
-            self.update_preview(directory)
-
-            # Show message box
-            self.root.after(0, lambda: messagebox.showinfo("Complete",
-                                                           f"Organization completed successfully!\n\n{files_organized} files were organized."))
-
+            # Rules and sniffing apply to this run only, leaving the
+            # organizer as the preview scan sees it
+            files_organized = self.organizer.organize_directory(
+                directory, recursive=recursive, cancel_token=cancel_token,
+                rules=rules, sniff_content=sniff_content)
         except Exception as e:
-            self.status_var.set(f"Error: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror(
-                "Error", f"An error occurred during organization: {e}"))
+            error = e
+
+        # Counts this thread still holds go out ahead of the result
+        self.channel.flush()
+        if error is None:
+            self.channel.call(self._organize_finished, directory, files_organized,
+                              cancel_token.cancelled)
+        else:
+            self.channel.call(self._organize_failed, error)
+
+    def _organize_finished(self, directory, files_organized, stopped=False):
+        outcome = "stopped" if stopped else "completed"
+        self._finish_task(f"Organization {outcome}. {files_organized} files organized.")
+
+        # Update preview
+        self.update_preview(directory)
+
+        if stopped:
+            messagebox.showinfo("Stopped",
+                                f"Organization stopped.\n\n{files_organized} files were organized.")
+        else:
+            messagebox.showinfo("Complete",
+                                f"Organization completed successfully!\n\n{files_organized} files were organized.")
+
+    def _organize_failed(self, error):
+        self._finish_task(f"Error: {error}")
+        messagebox.showerror(
+            "Error", f"An error occurred during organization: {error}")
 
     def organize_custom_dir(self):
         """Organize directory with custom rules."""
+        if self._task_running():
+            return
+
         directory = self.custom_dir_var.get()
 
         if not directory:
@@ -410,12 +770,24 @@ class FileOrganizerGUI:
                 "Error", "The selected directory does not exist.")
             return
 
-        self.status_var.set(f"Organizing {directory} with custom rules...")
-        self.progress_var.set(10)
+        rules_file = self.rules_file_var.get()
+        if not rules_file:
+            messagebox.showwarning(
+                "No Rules File Selected", "Please select a rules file first.")
+            return
+
+        try:
+            rules = load_rules(rules_file)
+        except (OSError, ValueError) as e:
+            messagebox.showerror(
+                "Error", f"Could not load the rules file: {e}")
+            return
+
+        cancel_token = self._start_task(f"Organizing {directory} with custom rules")
 
         # Start organizing with custom rules in a separate thread
         threading.Thread(target=self._do_organize, args=(
-            directory,), daemon=True).start()
+            directory, cancel_token, False, rules), daemon=True).start()
 
     def refresh_logs(self):
         """Refresh the logs display."""
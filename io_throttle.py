@@ -0,0 +1,180 @@
+import os
+import platform
+import sys
+import threading
+import time
+
+# Linux I/O scheduling classes, as used by ionice
+IO_CLASSES = {'realtime': 1, 'best-effort': 2, 'idle': 3}
+
+# ioprio_set system call numbers; glibc has no wrapper for it
+_IOPRIO_SET = {'x86_64': 251, 'amd64': 251, 'i386': 289, 'i686': 289,
+               'aarch64': 30, 'arm64': 30, 'armv7l': 314, 'ppc64le': 273, 's390x': 282}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+
+
+class _TokenBucket:
+    """Allowance refilled at rate per second, holding at most capacity.
+
+    Takes may overdraw it; the caller then waits until the debt is paid
+    off, so an item larger than the capacity still goes through.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount, now):
+        """Take amount; returns the seconds to wait before using it."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Caps how fast file operations are started, to spare a shared disk.
+
+    Operations and bytes each have a token bucket. An adaptive limiter
+    also adds a delay before each operation while operations take longer
+    than target_latency on average, doubling it at each check until they
+    speed up again and then halving it. One limiter may be shared by
+    several threads.
+
+    Args:
+        ops_per_second: Most operations started per second; None for no limit
+        bytes_per_second: Most bytes of files handled per second; None for
+            no limit
+        burst: Seconds' worth of operations and bytes that may go at once
+            after a quiet spell
+        adaptive: Back off while operations are slow
+        target_latency: With adaptive, the seconds an operation may take
+            on average before backing off
+    """
+
+    # Bounds of the adaptive delay, in seconds, and how often it changes
+    min_backoff = 0.001
+    max_backoff = 1.0
+    adjust_interval = 0.25
+    # Weight of each new latency in the running average
+    smoothing = 0.2
+
+    def __init__(self, ops_per_second=None, bytes_per_second=None, burst=1.0,
+                 adaptive=False, target_latency=0.05):
+        for name, rate in (('ops_per_second', ops_per_second),
+                           ('bytes_per_second', bytes_per_second)):
+            if rate is not None and rate <= 0:
+                raise ValueError(f"{name} must be positive, not {rate}")
+        if burst <= 0:
+            raise ValueError(f"burst must be positive, not {burst}")
+
+        self.ops_per_second = ops_per_second
+        self.bytes_per_second = bytes_per_second
+        self.adaptive = adaptive
+        self.target_latency = target_latency
+        self._ops = _TokenBucket(ops_per_second, max(ops_per_second * burst, 1)) \
+            if ops_per_second else None
+        self._bytes = _TokenBucket(bytes_per_second, bytes_per_second * burst) \
+            if bytes_per_second else None
+        self._lock = threading.Lock()
+
+        # Running average of operation latency, and the adaptive delay
+        self.latency = None
+        self.backoff = 0.0
+        self._adjusted = time.monotonic()
+
+    def delay(self, size=None):
+        """Take the allowance for one operation on size bytes.
+
+        Returns the seconds the caller should wait before starting it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = self.backoff
+            if self._ops is not None:
+                wait = max(wait, self._ops.take(1, now))
+            if self._bytes is not None and size:
+                wait = max(wait, self._bytes.take(size, now))
+        return wait
+
+    def burst(self):
+        """Return the (operations, bytes) that may go at once; None where unlimited."""
+        return (self._ops.capacity if self._ops is not None else None,
+                self._bytes.capacity if self._bytes is not None else None)
+
+    def observe(self, seconds, count=1):
+        """Report that count operations took seconds to carry out, for adaptive backoff."""
+        if not self.adaptive or seconds is None or count <= 0:
+            return
+        latency = seconds / count
+        now = time.monotonic()
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+
+            if now - self._adjusted < self.adjust_interval:
+                return
+            self._adjusted = now
+            if self.latency > self.target_latency:
+                self.backoff = min(self.max_backoff, max(self.min_backoff, self.backoff * 2))
+            elif self.latency < self.target_latency / 2 and self.backoff:
+                self.backoff /= 2
+                if self.backoff < self.min_backoff:
+                    self.backoff = 0.0
+
+
+class IOPriority:
+    """CPU and disk priority to run file operations at, on Linux.
+
+    apply() sets it for the calling thread only, so worker threads can
+    be lowered while the rest of the program keeps its priority.
+
+    Args:
+        nice: Niceness to run at, 0 (normal) to 19 (lowest CPU priority)
+        io_class: 'idle', 'best-effort' or 'realtime'; see ionice(1)
+        io_level: Level within best-effort or realtime, 0 (highest) to 7
+    """
+
+    def __init__(self, nice=None, io_class=None, io_level=7):
+        if nice is not None and not 0 <= nice <= 19:
+            raise ValueError(f"Niceness must be between 0 and 19, not {nice}")
+        if io_class is not None and io_class not in IO_CLASSES:
+            raise ValueError(f"Unknown I/O class: {io_class}")
+        if not 0 <= io_level <= 7:
+            raise ValueError(f"I/O level must be between 0 and 7, not {io_level}")
+        self.nice = nice
+        self.io_class = io_class
+        self.io_level = io_level
+
+    def apply(self):
+        """Set the priority of the calling thread; raises OSError if that fails."""
+        if self.nice:
+            if not hasattr(os, 'setpriority'):
+                raise OSError(f"Niceness is not supported on {sys.platform}")
+            # On Linux, niceness is per thread; lowering it needs privileges
+            thread = threading.get_native_id()
+            if os.getpriority(os.PRIO_PROCESS, thread) < self.nice:
+                os.setpriority(os.PRIO_PROCESS, thread, self.nice)
+        if self.io_class is not None:
+            _set_io_priority(IO_CLASSES[self.io_class],
+                             0 if self.io_class == 'idle' else self.io_level)
+
+
+def _set_io_priority(io_class, level):
+    # Imported here; only needed when an I/O class is asked for
+    import ctypes
+
+    number = _IOPRIO_SET.get(platform.machine().lower())
+    if not sys.platform.startswith('linux') or number is None:
+        raise OSError(f"I/O priorities are not supported on {sys.platform} {platform.machine()}")
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    # who=0 is the calling thread
+    if libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, (io_class << _IOPRIO_CLASS_SHIFT) | level) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
@@ -0,0 +1,120 @@
+import errno
+import os
+import shutil
+import stat
+import sys
+
+
+class MoveEngine:
+    """Moves files, renaming in place whenever possible.
+
+    Whether a source and destination folder share a device is checked
+    once per folder pair and remembered, so moves within a filesystem are
+    a single rename with no extra stat calls. Moves across filesystems
+    copy the data in the kernel where the platform allows it
+    (copy_file_range, then sendfile) and through one large reusable
+    buffer otherwise, then remove the source.
+
+    Args:
+        progress: Optional function called as progress(source, copied,
+            total) while a cross-device copy runs
+    """
+
+    # Bytes copied per call on the cross-device path
+    chunk_size = 8 * 1024 * 1024
+
+    def __init__(self, progress=None):
+        self.progress = progress
+        self._same_device = {}  # (source folder, destination folder) -> bool
+
+    def same_device(self, source_dir, destination_dir):
+        """Return True if both folders are on the same device (cached)."""
+        key = (source_dir, destination_dir)
+        same = self._same_device.get(key)
+        if same is None:
+            same = os.stat(source_dir).st_dev == os.stat(destination_dir).st_dev
+            self._same_device[key] = same
+        return same
+
+    def move(self, source, destination):
+        """Move source to destination, which must not exist yet."""
+        source_dir = os.path.dirname(os.path.abspath(source))
+        destination_dir = os.path.dirname(os.path.abspath(destination))
+
+        if self.same_device(source_dir, destination_dir):
+            try:
+                os.rename(source, destination)
+                return
+            except OSError as e:
+                # A mount point inside the folder; copy it instead
+                if e.errno != errno.EXDEV:
+                    raise
+
+        self._copy_and_remove(source, destination)
+
+    def _copy_and_remove(self, source, destination):
+        if not stat.S_ISREG(os.lstat(source).st_mode):
+            # Folders, links and special files: let shutil handle them
+            shutil.move(source, destination)
+            return
+
+        with open(source, 'rb') as src:
+            # Fails if the destination exists, as a rename would on Windows
+            dst = open(destination, 'xb')
+            try:
+                with dst:
+                    self._copy_data(source, src, dst, os.fstat(src.fileno()).st_size)
+                shutil.copystat(source, destination)
+            except BaseException:
+                try:
+                    os.remove(destination)
+                except OSError:
+                    pass
+                raise
+
+        os.remove(source)
+
+    def _copy_data(self, source, src, dst, total):
+        in_fd = src.fileno()
+        out_fd = dst.fileno()
+        copied = 0
+
+        for kernel_copy in (_copy_file_range, _sendfile):
+            try:
+                while True:
+                    count = kernel_copy(in_fd, out_fd, self.chunk_size)
+                    if not count:
+                        return
+                    copied += count
+                    if self.progress is not None:
+                        self.progress(source, copied, total)
+            except (OSError, NotImplementedError):
+                # Not supported here; carry on from where it stopped
+                if copied:
+                    raise
+                continue
+
+        # Plain copy through one reusable buffer
+        buffer = bytearray(min(self.chunk_size, max(total, 1)))
+        view = memoryview(buffer)
+        while True:
+            count = src.readinto(buffer)
+            if not count:
+                return
+            dst.write(view[:count])
+            copied += count
+            if self.progress is not None:
+                self.progress(source, copied, total)
+
+
+def _copy_file_range(in_fd, out_fd, count):
+    if not hasattr(os, 'copy_file_range'):
+        raise NotImplementedError
+    return os.copy_file_range(in_fd, out_fd, count)
+
+
+def _sendfile(in_fd, out_fd, count):
+    # sendfile to a regular file is only supported on Linux
+    if not hasattr(os, 'sendfile') or not sys.platform.startswith('linux'):
+        raise NotImplementedError
+    return os.sendfile(out_fd, in_fd, None, count)
@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+import time
+
+from file_operations import FileOperation
+
+# Default folder for the journals of command line runs
+DEFAULT_JOURNAL_DIR = os.path.join(
+    os.path.expanduser('~'), '.file_organizer_journal')
+
+
+def journal_path(journal_dir, run_id):
+    """Return the path of the journal of a run."""
+    return os.path.join(journal_dir, f'{run_id}.jsonl')
+
+
+class OperationJournal:
+    """Append-only, crash-safe record of the moves and trashes of one run.
+
+    Each operation is written twice, as a JSON line: once as planned,
+    before it is carried out, and once more when it is done (or failed).
+    Writes are collected in memory and committed as a group with a
+    single fsync: planned operations in batches of batch_size, which are
+    on disk before any of them is released to the executor, and results
+    whenever batch_size of them have piled up or sync_interval seconds
+    have passed. Journaling then costs two short writes per file and an
+    fsync per thousand.
+
+    After a crash, every operation that may have happened is in the
+    journal as planned; read_journal() works out which ones completed.
+    """
+
+    batch_size = 1000
+    sync_interval = 1.0
+
+    def __init__(self, path, run_id):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @classmethod
+    def create(cls, journal_dir=DEFAULT_JOURNAL_DIR):
+        """Start the journal of a new run, named after the current time."""
+        os.makedirs(journal_dir, exist_ok=True)
+        base = time.strftime('%Y%m%d-%H%M%S')
+        run_id = base
+        counter = 1
+        while True:
+            try:
+                # Claim the name; two runs started in the same second get _1, _2...
+                os.close(os.open(journal_path(journal_dir, run_id),
+                                 os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+                break
+            except FileExistsError:
+                run_id = f'{base}_{counter}'
+                counter += 1
+
+        journal = cls(journal_path(journal_dir, run_id), run_id)
+        journal._write({'run': run_id, 'started': time.time()})
+        journal.sync()
+        _sync_directory(journal_dir)
+        return journal
+
+    @classmethod
+    def resume(cls, journal_dir=DEFAULT_JOURNAL_DIR):
+        """Reopen the journal of the latest run that did not finish.
+
+        Returns (journal, JournalRun of what it holds so far), or
+        (None, None) if every run finished.
+        """
+        for run_id in reversed(list_runs(journal_dir)):
+            path = journal_path(journal_dir, run_id)
+            run = read_journal(path)
+            if not run.finished:
+                return cls(path, run_id), run
+        return None, None
+
+    def _write(self, record):
+        self._buffer.append(json.dumps(record) + '\n')
+
+    def sync(self):
+        """Commit everything recorded so far to disk."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer = []
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def plan(self, operations):
+        """Journal operations as planned, passing them on once they are on disk."""
+        operations = iter(operations)
+        while True:
+            batch = []
+            for operation in operations:
+                batch.append(operation)
+                if len(batch) >= self.batch_size:
+                    break
+            if not batch:
+                return
+            with self._lock:
+                for operation in batch:
+                    self._write({'planned': operation.to_dict()})
+                self._sync()
+            yield from batch
+
+    def record(self, operation, error=None):
+        """Journal the outcome of a planned operation."""
+        key = [operation.action, operation.source]
+        with self._lock:
+            if error is None:
+                self._write({'done': key})
+            else:
+                self._write({'failed': key, 'error': str(error)})
+            if len(self._buffer) >= self.batch_size or \
+                    time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def close(self, finished=True):
+        """Commit what is left and close the journal.
+
+        Only a journal closed with finished=True counts as a complete
+        run; others are picked up by resume().
+        """
+        with self._lock:
+            if finished:
+                self._write({'finished': time.time()})
+            self._sync()
+            self._file.close()
+
+
+class JournalRun:
+    """What a journal says about a run.
+
+    completed lists the operations that were carried out, in the order
+    they finished; unfinished those planned without a recorded outcome,
+    in the order they were planned.
+    """
+
+    def __init__(self, run_id, finished, completed, unfinished):
+        self.run_id = run_id
+        self.finished = finished
+        self.completed = completed
+        self.unfinished = unfinished
+
+
+def read_journal(path):
+    """Read a journal back into a JournalRun.
+
+    A line cut short by a crash ends the journal; everything before it
+    still counts. Raises FileNotFoundError if there is no such journal.
+    """
+    run_id = os.path.splitext(os.path.basename(path))[0]
+    finished = False
+    planned = {}    # (action, source) -> FileOperation awaiting an outcome
+    completed = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if 'planned' in record:
+                operation = FileOperation.from_dict(record['planned'])
+                planned[(operation.action, operation.source)] = operation
+            elif 'done' in record:
+                operation = planned.pop(tuple(record['done']), None)
+                if operation is not None:
+                    completed.append(operation)
+            elif 'failed' in record:
+                planned.pop(tuple(record['failed']), None)
+            elif 'finished' in record:
+                finished = True
+
+    return JournalRun(run_id, finished, completed, list(planned.values()))
+
+
+def list_runs(journal_dir=DEFAULT_JOURNAL_DIR):
+    """Return the ids of the journaled runs, oldest first."""
+    try:
+        names = os.listdir(journal_dir)
+    except FileNotFoundError:
+        return []
+    return sorted((name[:-len('.jsonl')] for name in names if name.endswith('.jsonl')),
+                  key=_run_order)
+
+
+def _run_order(run_id):
+    # Run ids are their start time, with _1, _2... for runs started in
+    # the same second; compare the counter as a number so _10 follows _9
+    base, _, counter = run_id.partition('_')
+    return (base, int(counter) if counter.isdigit() else 0, run_id)
+
+
+def _is_finished(path):
+    """Return True if the journal at path ends with its run's 'finished' record."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 256))
+        last = f.read().splitlines()[-1:]
+    try:
+        return bool(last) and 'finished' in json.loads(last[0])
+    except (ValueError, TypeError):
+        return False
+
+
+def prune_runs(journal_dir=DEFAULT_JOURNAL_DIR, keep=50):
+    """Delete the journals of finished runs but the keep latest ones.
+
+    Journals of runs that did not finish are left for resume().
+    Returns the number of journals deleted.
+    """
+    finished = []
+    for run_id in list_runs(journal_dir):
+        try:
+            if _is_finished(journal_path(journal_dir, run_id)):
+                finished.append(run_id)
+        except OSError:
+            continue
+    deleted = 0
+    for run_id in finished[:max(0, len(finished) - keep)]:
+        try:
+            os.remove(journal_path(journal_dir, run_id))
+            deleted += 1
+        except OSError:
+            continue
+    return deleted
+
+
+def _sync_directory(directory):
+    # Makes a new file's directory entry durable; not possible on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
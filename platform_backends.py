@@ -0,0 +1,160 @@
+import os
+import shutil
+import stat
+import sys
+
+# Folders inside each Firefox profile that hold caches
+FIREFOX_CACHE_FOLDERS = ['cache2', 'startupCache', 'thumbnails']
+
+
+def _home(*parts):
+    return os.path.join(os.path.expanduser('~'), *parts)
+
+
+class WindowsPlatform:
+    """Temp, browser cache and Recycle Bin locations on Windows.
+
+    Locations are read from the environment when asked for, so setting
+    TEMP, LOCALAPPDATA, APPDATA or WINDIR beforehand redirects them.
+    """
+
+    name = 'windows'
+    # Days temporary files are kept by default; Windows temp folders hold
+    # nothing that is needed once it is no longer open
+    temp_keep_days = 0
+
+    @staticmethod
+    def _env_path(variable, *parts):
+        value = os.environ.get(variable)
+        return os.path.join(value, *parts) if value else None
+
+    def temp_locations(self):
+        """Return the folders of temporary files that can be safely deleted."""
+        locations = [self._env_path('TEMP'),
+                     self._env_path('LOCALAPPDATA', 'Temp'),
+                     self._env_path('WINDIR', 'Temp')]
+        return [location for location in locations if location]
+
+    def browser_cache_locations(self):
+        """Return the browser cache folders whose contents can be deleted."""
+        locations = []
+        for browser in (('Google', 'Chrome'), ('Microsoft', 'Edge')):
+            for cache in ('Cache', 'Code Cache', 'GPUCache'):
+                location = self._env_path('LOCALAPPDATA', *browser, 'User Data', 'Default', cache)
+                if location:
+                    locations.append(location)
+        return locations
+
+    def firefox_profiles(self):
+        """Return the folder holding Firefox's profile caches, or None."""
+        return self._env_path('APPDATA', 'Mozilla', 'Firefox', 'Profiles')
+
+    def empty_recycle_bin(self):
+        """Empty the Recycle Bin, raising OSError on failure."""
+        import ctypes
+
+        # SHERB_NOCONFIRMATION is left out, so Windows asks first
+        result = ctypes.windll.shell32.SHEmptyRecycleBinW(None, None, 0)
+        # E_UNEXPECTED means it was empty already
+        if result not in (0, -0x7fff0001):
+            raise OSError(f"SHEmptyRecycleBin failed with {result & 0xffffffff:#010x}")
+
+
+class FreedesktopPlatform:
+    """Temp, browser cache and trash locations on Linux and the BSDs.
+
+    Follows the XDG base directory and trash specifications.
+    """
+
+    name = 'freedesktop'
+    # /tmp also holds sockets, service folders and files of programs
+    # still running; keep what systemd-tmpfiles would keep
+    temp_keep_days = 10
+
+    def temp_locations(self):
+        return [os.environ.get('TMPDIR') or '/tmp']
+
+    def browser_cache_locations(self):
+        cache_home = os.environ.get('XDG_CACHE_HOME') or _home('.cache')
+        config_home = os.environ.get('XDG_CONFIG_HOME') or _home('.config')
+        locations = []
+        for browser in ('google-chrome', 'microsoft-edge'):
+            locations.append(os.path.join(cache_home, browser, 'Default', 'Cache'))
+            locations.append(os.path.join(cache_home, browser, 'Default', 'Code Cache'))
+            locations.append(os.path.join(config_home, browser, 'Default', 'GPUCache'))
+        return locations
+
+    def firefox_profiles(self):
+        return os.path.join(os.environ.get('XDG_CACHE_HOME') or _home('.cache'),
+                            'mozilla', 'firefox')
+
+    def empty_recycle_bin(self):
+        """Empty the home trash, raising OSError if anything in it could not be removed."""
+        data_home = os.environ.get('XDG_DATA_HOME') or _home('.local', 'share')
+        trash = os.path.join(data_home, 'Trash')
+
+        first_error = None
+        # Items first, then their .trashinfo files, so an interrupted run
+        # never leaves items without their info
+        for folder in ('files', 'info', 'expunged'):
+            try:
+                entries = list(os.scandir(os.path.join(trash, folder)))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    if stat.S_ISDIR(entry.stat(follow_symlinks=False).st_mode):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.remove(entry.path)
+                except OSError as e:
+                    first_error = first_error or e
+
+        try:
+            os.remove(os.path.join(trash, 'directorysizes'))
+        except FileNotFoundError:
+            pass
+        if first_error is not None:
+            raise first_error
+
+
+class MacPlatform:
+    """Temp, browser cache and Trash locations on macOS."""
+
+    name = 'macos'
+    temp_keep_days = 10
+
+    def temp_locations(self):
+        return [os.environ.get('TMPDIR') or '/tmp']
+
+    def browser_cache_locations(self):
+        caches = _home('Library', 'Caches')
+        support = _home('Library', 'Application Support')
+        locations = []
+        for browser in (os.path.join('Google', 'Chrome'), 'Microsoft Edge'):
+            locations.append(os.path.join(caches, browser, 'Default', 'Cache'))
+            locations.append(os.path.join(caches, browser, 'Default', 'Code Cache'))
+            locations.append(os.path.join(support, browser, 'Default', 'GPUCache'))
+        return locations
+
+    def firefox_profiles(self):
+        return _home('Library', 'Caches', 'Firefox', 'Profiles')
+
+    def empty_recycle_bin(self):
+        import subprocess
+
+        # The Trash is protected from other apps; Finder empties it
+        try:
+            subprocess.run(['osascript', '-e', 'tell application "Finder" to empty trash'],
+                           check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            raise OSError(f"Finder could not empty the Trash: {e.stderr.decode(errors='replace').strip()}")
+
+
+def get_platform():
+    """Return the platform backend for the running system."""
+    if sys.platform.startswith('win'):
+        return WindowsPlatform()
+    if sys.platform == 'darwin':
+        return MacPlatform()
+    return FreedesktopPlatform()
@@ -0,0 +1,46 @@
+import collections
+import os
+
+
+def directory_stamp(directory):
+    """Return the directory's modification time in nanoseconds, or None if it can't be read."""
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+class PreviewCache:
+    """Previews of recently scanned directories, kept while the directory is unchanged.
+
+    Each preview is stored with the directory's modification time from
+    before its scan. Adding, removing or renaming a file changes that
+    time, so a preview is only returned while the listing it was made
+    from still holds. Changes inside subfolders or to a file's contents
+    don't, so recursive previews and sizes may lag behind those until
+    the directory itself changes.
+    """
+
+    max_entries = 4
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()  # key -> (stamp, preview)
+
+    def get(self, key, directory):
+        """Return the preview stored under key, or None if there is none or directory changed since."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stamp, preview = entry
+        if stamp is None or stamp != directory_stamp(directory):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return preview
+
+    def put(self, key, stamp, preview):
+        """Store a preview made from the directory as it was at stamp (see directory_stamp)."""
+        self._entries[key] = (stamp, preview)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
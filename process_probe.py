@@ -0,0 +1,188 @@
+import os
+import sys
+import threading
+import time
+
+
+class ProcessProbe:
+    """Answers questions about running processes from a cached snapshot.
+
+    The process table is read once and reused for ttl seconds, so any
+    number of queries in a run cost a single snapshot: /proc is read
+    directly on Linux, and one tasklist or ps call is made elsewhere.
+    Open files are snapshotted the same way, but only where the platform
+    exposes them (/proc on Linux).
+    """
+
+    def __init__(self, ttl=5.0, listing=None):
+        self.ttl = ttl
+        # ProcListing or CommandListing; picked on first use if not given
+        self.listing = listing
+        self._lock = threading.Lock()
+        # Snapshots and when they were taken (None: not taken yet)
+        self._names = None
+        self._names_time = None
+        self._open_files = None
+        self._open_files_time = None
+        # Open paths and all their parent folders, and the snapshot they
+        # were found from
+        self._in_use = None
+        self._in_use_of = None
+        # Folders queried by in_use, resolved, for the same snapshot
+        self._real_folders = {}
+
+    def _listing(self):
+        if self.listing is None:
+            self.listing = get_process_listing()
+        return self.listing
+
+    def refresh(self):
+        """Forget the cached snapshots; the next query takes new ones."""
+        with self._lock:
+            self._names_time = self._open_files_time = None
+
+    def process_names(self):
+        """Return the set of running process names, lowercased and without .exe."""
+        with self._lock:
+            if self._names_time is None or time.monotonic() - self._names_time > self.ttl:
+                self._names = {_normalize(name) for name in self._listing().process_names()}
+                self._names_time = time.monotonic()
+            return self._names
+
+    def is_running(self, process_name):
+        """Return True if a process with this name (e.g. 'chrome.exe') is running."""
+        name = _normalize(process_name)
+        names = self.process_names()
+        # Linux truncates process names to 15 characters
+        return name in names or name[:15] in names
+
+    def open_files(self):
+        """Return the set of paths open in any visible process, or None if unknown."""
+        with self._lock:
+            if self._open_files_time is None or \
+                    time.monotonic() - self._open_files_time > self.ttl:
+                self._open_files = self._listing().open_files()
+                self._open_files_time = time.monotonic()
+            return self._open_files
+
+    def has_open_files(self, directory):
+        """Return True if any process has a file under directory open.
+
+        Returns None when open files can't be listed on this platform.
+        """
+        open_files = self.open_files()
+        if open_files is None:
+            return None
+        prefix = os.path.join(os.path.realpath(directory), '')
+        return any(path.startswith(prefix) for path in open_files)
+
+    def in_use(self, path):
+        """Return True if path, or anything under it, is open in any process.
+
+        Unlike has_open_files, costs one set lookup per call, so it suits
+        checking every entry of a large folder: the folder holding path is
+        resolved once, and path itself is not (removing a symlink leaves
+        what it points to alone). Returns None when open files can't be
+        listed on this platform.
+        """
+        open_files = self.open_files()
+        if open_files is None:
+            return None
+        with self._lock:
+            if self._in_use_of is not open_files:
+                in_use = set()
+                for open_path in open_files:
+                    while open_path not in in_use:
+                        in_use.add(open_path)
+                        parent = os.path.dirname(open_path)
+                        if parent == open_path:
+                            break
+                        open_path = parent
+                self._in_use = in_use
+                self._in_use_of = open_files
+                self._real_folders = {}
+            in_use = self._in_use
+            folder, name = os.path.split(os.path.abspath(path))
+            real_folder = self._real_folders.get(folder)
+            if real_folder is None:
+                real_folder = self._real_folders[folder] = os.path.realpath(folder)
+        # Nothing under a folder no open path goes through can be open
+        return real_folder in in_use and os.path.join(real_folder, name) in in_use
+
+
+def _normalize(name):
+    name = os.path.basename(name).lower()
+    if name.endswith('.exe'):
+        name = name[:-4]
+    return name
+
+
+class ProcListing:
+    """Lists processes and their open files from /proc (Linux)."""
+
+    def process_names(self):
+        names = []
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/comm', 'rb') as f:
+                    names.append(os.fsdecode(f.read().rstrip(b'\n')))
+            except OSError:
+                # Exited while we were looking
+                continue
+        return names
+
+    def open_files(self):
+        paths = set()
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            fd_dir = f'/proc/{pid}/fd'
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                # Other users' processes, or already exited
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                if target.startswith('/'):
+                    paths.add(target)
+        return paths
+
+
+class CommandListing:
+    """Lists processes by running one command (tasklist on Windows, ps elsewhere).
+
+    Open files are not listed; open_files() returns None.
+    """
+
+    def process_names(self):
+        import csv
+        import subprocess
+
+        try:
+            if sys.platform.startswith('win'):
+                # One call for every process, one CSV line each
+                output = subprocess.check_output(['tasklist', '/FO', 'CSV', '/NH'],
+                                                 text=True, errors='replace')
+                return [row[0] for row in csv.reader(output.splitlines()) if row]
+            output = subprocess.check_output(['ps', '-A', '-o', 'comm='],
+                                             text=True, errors='replace')
+            return [line.strip() for line in output.splitlines() if line.strip()]
+        except (OSError, subprocess.CalledProcessError):
+            # If the process list can't be read, assume nothing is running
+            return []
+
+    def open_files(self):
+        return None
+
+
+def get_process_listing():
+    """Return the way of listing processes that works on this system."""
+    if os.path.isdir('/proc/self/fd'):
+        return ProcListing()
+    return CommandListing()
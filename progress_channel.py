@@ -0,0 +1,187 @@
+import collections
+import logging
+import queue
+import threading
+import time
+
+# Event kinds; each event is a (kind, phase, value) tuple
+PHASE_STARTED = 'phase_started'
+PHASE_FINISHED = 'phase_finished'  # value: (result, timed_out)
+COUNTS = 'counts'                  # value: {(phase, counter): amount}
+ERROR = 'error'                    # value: message
+CALL = 'call'                      # value: (function, args)
+
+
+class ProgressUpdate:
+    """Everything drained from a channel in one go, coalesced.
+
+    counts adds up the counters of all COUNTS events per phase; the
+    other lists keep their events in the order they were sent.
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.started = []       # phase names
+        self.finished = []      # (phase, result, timed_out)
+        self.counts = {}        # phase -> {counter: amount}
+        self.errors = []        # (phase, message)
+        self.dropped_errors = 0
+        self.calls = []         # (function, args)
+
+
+class ProgressChannel:
+    """Carries progress events from worker threads to one consuming thread.
+
+    Producers may call the methods below from any thread; nothing blocks
+    and nothing touches the consumer's state, such as Tk widgets. Counts
+    are added up per thread and sent as one COUNTS event every
+    tick_events counts or tick_seconds, whichever comes first, so even a
+    phase handling 100k files a second puts only a few hundred events
+    on the queue. The consumer calls drain() on a timer.
+    """
+
+    tick_events = 256
+    tick_seconds = 0.1
+    # Error messages kept per drain; the rest are only counted
+    max_errors = 200
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._local = threading.local()
+
+    def phase_started(self, phase):
+        self._queue.put((PHASE_STARTED, phase, None))
+
+    def phase_finished(self, phase, result=None, timed_out=False):
+        """Report the end of a phase, after any counts the calling thread still holds."""
+        self.flush()
+        self._queue.put((PHASE_FINISHED, phase, (result, timed_out)))
+
+    def count(self, phase, counter, amount=1):
+        """Add amount to one of phase's counters (see run_metrics.COUNTERS)."""
+        local = self._local
+        pending = getattr(local, 'pending', None)
+        if pending is None:
+            pending = local.pending = {}
+            local.counts = 0
+            local.last_flush = time.monotonic()
+
+        key = (phase, counter)
+        pending[key] = pending.get(key, 0) + amount
+        local.counts += 1
+        if local.counts >= self.tick_events or \
+                time.monotonic() - local.last_flush >= self.tick_seconds:
+            self.flush()
+
+    def flush(self):
+        """Send the counts the calling thread has added up so far."""
+        local = self._local
+        pending = getattr(local, 'pending', None)
+        if pending:
+            self._queue.put((COUNTS, None, pending))
+            local.pending = {}
+        local.counts = 0
+        local.last_flush = time.monotonic()
+
+    def error(self, message, phase=None):
+        self._queue.put((ERROR, phase, message))
+
+    def call(self, function, *args):
+        """Have the consumer call function(*args) on its own thread."""
+        self._queue.put((CALL, None, (function, args)))
+
+    def drain(self, max_events=10000):
+        """Take up to max_events queued events and return them as one ProgressUpdate."""
+        update = ProgressUpdate()
+        get = self._queue.get_nowait
+
+        for _ in range(max_events):
+            try:
+                kind, phase, value = get()
+            except queue.Empty:
+                break
+            update.events += 1
+
+            if kind == COUNTS:
+                for (counted_phase, counter), amount in value.items():
+                    counts = update.counts.get(counted_phase)
+                    if counts is None:
+                        counts = update.counts[counted_phase] = {}
+                    counts[counter] = counts.get(counter, 0) + amount
+            elif kind == PHASE_STARTED:
+                update.started.append(phase)
+            elif kind == PHASE_FINISHED:
+                update.finished.append((phase,) + value)
+            elif kind == ERROR:
+                if len(update.errors) < self.max_errors:
+                    update.errors.append((phase, value))
+                else:
+                    update.dropped_errors += 1
+            elif kind == CALL:
+                update.calls.append(value)
+
+        return update
+
+
+class ProgressTracker:
+    """Running totals and throughput of the updates drained from a channel.
+
+    Files are the move and trash operations issued, bytes those moved
+    and trashed. Throughput is measured over the last window seconds.
+    """
+
+    window = 2.0
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases = {}        # phase -> {counter: amount}
+        self.running = []       # phases started and not yet finished
+        self.finished = []      # (phase, result, timed_out)
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self._samples = collections.deque([(self.started, 0, 0)])
+
+    def apply(self, update, now=None):
+        """Add an update; call it regularly, even with empty updates, to keep rates current."""
+        for phase, counts in update.counts.items():
+            totals = self.phases.setdefault(phase, {})
+            for counter, amount in counts.items():
+                totals[counter] = totals.get(counter, 0) + amount
+            self.files += counts.get('operations', 0)
+            self.bytes += counts.get('bytes_moved', 0) + counts.get('bytes_trashed', 0)
+            self.errors += counts.get('errors', 0)
+
+        self.running.extend(update.started)
+        for phase, result, timed_out in update.finished:
+            if phase in self.running:
+                self.running.remove(phase)
+            self.finished.append((phase, result, timed_out))
+
+        now = time.monotonic() if now is None else now
+        self._samples.append((now, self.files, self.bytes))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+
+    def rates(self):
+        """Return (files per second, bytes per second) over the last window."""
+        start_time, start_files, start_bytes = self._samples[0]
+        end_time, end_files, end_bytes = self._samples[-1]
+        elapsed = end_time - start_time
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (end_files - start_files) / elapsed, (end_bytes - start_bytes) / elapsed
+
+
+class ChannelLogHandler(logging.Handler):
+    """Logging handler that sends records to a ProgressChannel as ERROR events."""
+
+    def __init__(self, channel, level=logging.WARNING):
+        super().__init__(level)
+        self.channel = channel
+
+    def emit(self, record):
+        try:
+            self.channel.error(self.format(record))
+        except Exception:
+            self.handleError(record)
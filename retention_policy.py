@@ -0,0 +1,141 @@
+import heapq
+import itertools
+
+DAY = 86400
+
+# Orders in which expired items are removed when not all of them have to go
+ORDERS = ('oldest', 'largest')
+
+
+class RetentionPolicy:
+    """Which temporary items to remove, and in which order.
+
+    Args:
+        keep_days: Files modified within this many days are kept
+        directory_keep_days: Folders modified within this many days are
+            kept (they are often still in use by an installer or app)
+        max_bytes: Only remove enough to bring a location's total size
+            down to this many bytes; None removes everything expired
+        max_items: Remove at most this many items per location and run
+        order: 'oldest' or 'largest'; which expired items go first
+    """
+
+    def __init__(self, keep_days=0, directory_keep_days=2, max_bytes=None,
+                 max_items=None, order='oldest'):
+        if order not in ORDERS:
+            raise ValueError(f"Unknown retention order: {order}")
+        self.keep_days = keep_days
+        self.directory_keep_days = directory_keep_days
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.order = order
+
+    def is_expired(self, is_dir, mtime, now):
+        """Return True if an item last modified at mtime may be removed at time now."""
+        keep_days = self.directory_keep_days if is_dir else self.keep_days
+        return now - mtime > keep_days * DAY
+
+    def expires_at(self, is_dir, mtime):
+        """Return the time from which an item last modified at mtime may be removed."""
+        keep_days = self.directory_keep_days if is_dir else self.keep_days
+        return mtime + keep_days * DAY
+
+    def needs_sizes(self):
+        """Return True if folder sizes are needed (walking each folder's tree)."""
+        return self.max_bytes is not None or (self.needs_queue() and self.order == 'largest')
+
+    def needs_queue(self):
+        """Return True if items must be ranked before any is removed.
+
+        Without a size cap or item limit every expired item goes, and they
+        can be removed as they are found.
+        """
+        return self.max_bytes is not None or self.max_items is not None
+
+
+class RetentionQueue:
+    """Ranks the expired items of one location during a single scan.
+
+    With an item limit, only the max_items items that should go first
+    are held, in a heap. With only a size cap, an item is handed out by
+    ready() as soon as the items ranked below it (and those kept) exceed
+    max_bytes, as it is bound to go then; what stays held is at most
+    max_bytes. Either way memory stays bounded however large the
+    location is. Once the scan is done, select() picks items in order
+    until enough bytes are freed.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.total_bytes = 0
+        self._kept_bytes = 0
+        self._heap = []
+        self._counter = itertools.count()
+        # With only a size cap the heap has the highest priority on top,
+        # and items sure to go are handed out early through ready()
+        self._by_size = policy.max_items is None and policy.max_bytes is not None
+        self._held_bytes = 0
+        self._released_bytes = 0
+        self._ready = []
+
+    def keep(self, size):
+        """Count an item that stays (e.g. too new) towards the location's size."""
+        self.total_bytes += size or 0
+        self._kept_bytes += size or 0
+
+    def add(self, item, size, mtime):
+        """Offer an expired item for removal.
+
+        Returns the item that dropped out of the queue to make room, if
+        any; it will not be removed in this run.
+        """
+        self.total_bytes += size or 0
+        priority = (size or 0) if self.policy.order == 'largest' else -mtime
+
+        if self._by_size:
+            # Highest priority on top; among equals, items found first
+            heapq.heappush(self._heap, (-priority, next(self._counter), item, size or 0))
+            self._held_bytes += size or 0
+            # The top item can only stay if it, everything ranked below it
+            # and the kept items fit in max_bytes; that total only grows
+            while self._heap and self._kept_bytes + self._held_bytes > self.policy.max_bytes:
+                _, _, ready, ready_size = heapq.heappop(self._heap)
+                self._held_bytes -= ready_size
+                self._released_bytes += ready_size
+                self._ready.append(ready)
+            return None
+
+        # Among equals, items found first go first
+        entry = (priority, -next(self._counter), item, size or 0)
+
+        if self.policy.max_items is None or len(self._heap) < self.policy.max_items:
+            heapq.heappush(self._heap, entry)
+            return None
+        # Keep the higher-priority of the new item and the lowest one held
+        dropped = heapq.heappushpop(self._heap, entry)
+        return dropped[2]
+
+    def ready(self):
+        """Return the items known to be removed since the last call, in order."""
+        ready, self._ready = self._ready, []
+        return ready
+
+    def select(self):
+        """Return (items to remove, in order; items that stay).
+
+        Items already handed out by ready() are not included.
+        """
+        ranked = sorted(self._heap) if self._by_size else sorted(self._heap, reverse=True)
+        self._heap = []
+
+        if self.policy.max_bytes is None:
+            return [entry[2] for entry in ranked], []
+
+        to_free = self.total_bytes - self._released_bytes - self.policy.max_bytes
+        selected = []
+        for index, (_, _, item, size) in enumerate(ranked):
+            if to_free <= 0:
+                return selected, [entry[2] for entry in ranked[index:]]
+            selected.append(item)
+            to_free -= size
+        return selected, []
@@ -0,0 +1,339 @@
+import fnmatch
+import heapq
+import json
+import mimetypes
+import os
+import re
+import time
+
+_SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4}
+
+
+def parse_size(value):
+    """Parse a size such as 1048576, '500KB' or '1.5 GB' into bytes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*', str(value))
+    if not match or match.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def _glob_regex(pattern):
+    # fnmatch.translate anchors with \Z; the caller supplies its own end
+    regex = fnmatch.translate(pattern)
+    return regex[:-2] if regex.endswith('\\Z') else regex
+
+
+def _joinable(regex):
+    """Return True if regex means the same inside a larger regex.
+
+    Backreferences would point at other groups there, and global inline
+    flags would apply to the whole of it.
+    """
+    return re.search(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)', regex) is None
+
+
+def _mime_extensions(patterns):
+    """Return the extensions whose guessed MIME type matches any of patterns."""
+    if not mimetypes.inited:
+        mimetypes.init()
+    return sorted(extension for extension, mime in mimetypes.types_map.items()
+                  if any(fnmatch.fnmatch(mime, pattern.lower()) for pattern in patterns))
+
+
+class Rule:
+    """Where files meeting all of a rule's conditions should go.
+
+    Conditions left out always hold. Name and path conditions ignore
+    case, like the built-in categories.
+
+    Args:
+        folder: Target folder, relative to the directory being organized
+        extensions: File extensions, e.g. ['.pdf', '.tar.gz']
+        glob: Glob patterns the file name must match (any of them)
+        regex: Regular expression the whole file name must match
+        path: Glob patterns for the path relative to the organized
+            directory, with / as separator (any of them)
+        mime: MIME types guessed from the name, e.g. ['image/*']
+        min_size, max_size: Size range in bytes, or strings like '10MB'
+        min_age_days, max_age_days: Age range by modification time
+    """
+
+    def __init__(self, folder, extensions=None, glob=None, regex=None, path=None, mime=None,
+                 min_size=None, max_size=None, min_age_days=None, max_age_days=None):
+        if not folder:
+            raise ValueError("Every rule needs a folder")
+        self.folder = os.path.normpath(folder)
+        if self.folder == os.curdir:
+            raise ValueError(f"Rule folder must not be the organized directory itself: {folder!r}")
+        if os.path.isabs(self.folder) or os.path.splitdrive(self.folder)[0] or \
+                os.pardir in self.folder.split(os.sep):
+            raise ValueError(f"Rule folder must be inside the organized directory: {folder!r}")
+        self.extensions = [extension.lower() if extension.startswith('.') else f'.{extension.lower()}'
+                           for extension in _as_list(extensions)]
+        self.globs = _as_list(glob)
+        self.regex = regex
+        self.paths = _as_list(path)
+        self.mime = _as_list(mime)
+        self.mime_extensions = _mime_extensions(self.mime) if self.mime else []
+        self.min_size = None if min_size is None else parse_size(min_size)
+        self.max_size = None if max_size is None else parse_size(max_size)
+        self.min_age = None if min_age_days is None else float(min_age_days) * 86400
+        self.max_age = None if max_age_days is None else float(max_age_days) * 86400
+
+        self.name_regex = None
+        if regex is not None:
+            try:
+                self.name_regex = re.compile(regex, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"Invalid regex {regex!r}: {e}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a rule from a dict, as found in a rules file."""
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError(f"Invalid rule {data!r}: {e}")
+
+    def __repr__(self):
+        return f"<Rule -> {self.folder!r}>"
+
+    def pattern(self):
+        """Return the regex for the rule's name and path conditions.
+
+        It is matched against 'name\\0relative/path' and only uses
+        lookaheads, so patterns of many rules can be joined into one. The
+        regex condition is left out; see matches_name.
+        """
+        parts = []
+        if self.extensions:
+            parts.append('(?=[^\\x00]*(?:%s)\\x00)' % '|'.join(map(re.escape, self.extensions)))
+        if self.mime:
+            # A MIME type nothing maps to can never match
+            parts.append('(?=[^\\x00]*(?:%s)\\x00)' % '|'.join(map(re.escape, self.mime_extensions))
+                         if self.mime_extensions else '(?!)')
+        if self.globs:
+            parts.append('(?=(?:%s)\\x00)' % '|'.join(map(_glob_regex, self.globs)))
+        if self.paths:
+            parts.append('(?=[^\\x00]*\\x00(?:%s)\\Z)' % '|'.join(map(_glob_regex, self.paths)))
+        return ''.join(parts)
+
+    def matches_name(self, name):
+        """Check the regex condition, which must match the whole name."""
+        return self.name_regex is None or self.name_regex.fullmatch(name) is not None
+
+    def literal_keys(self):
+        """Return ('prefix' or 'suffix', keys) such that a matching name
+        starts or ends with one of the lowercased keys, or None if the
+        rule's conditions promise no such literal.
+        """
+        if self.extensions:
+            return 'suffix', self.extensions
+        if self.mime:
+            return 'suffix', self.mime_extensions
+        if self.globs:
+            prefixes = [re.split(r'[*?\[]', glob, 1)[0].lower() for glob in self.globs]
+            if all(prefixes):
+                return 'prefix', prefixes
+            suffixes = [re.split(r'[*?\]]', glob)[-1].lower() for glob in self.globs]
+            if all(suffixes) and not any('[' in suffix for suffix in suffixes):
+                return 'suffix', suffixes
+        return None
+
+    def needs_stat(self):
+        return any(limit is not None for limit in
+                   (self.min_size, self.max_size, self.min_age, self.max_age))
+
+    def accepts(self, stat, now):
+        """Check the size and age conditions against a stat result."""
+        if self.min_size is not None and stat.st_size < self.min_size:
+            return False
+        if self.max_size is not None and stat.st_size > self.max_size:
+            return False
+        age = now - stat.st_mtime
+        if self.min_age is not None and age < self.min_age:
+            return False
+        if self.max_age is not None and age > self.max_age:
+            return False
+        return True
+
+
+class RuleSet:
+    """An ordered list of rules; the first rule a file matches decides its folder.
+
+    Rules are compiled when the set is built so that matching a file
+    costs about the same however many rules there are. Rules whose names
+    must start or end with a literal (an extension, 'invoice*', '*.bak')
+    are indexed by it and found with a few dict lookups per name. The
+    name and path conditions of all other rules are joined into a single
+    regex and tested in one match. Rules with a regex of their own are
+    joined the same way by that regex, each alternative anchored at the
+    end of the name, so the first alternative that matches is the first
+    such rule whose regex matches the whole name; only regexes that can't
+    be joined are tried one by one. Size and age conditions need a stat
+    and are only checked for rules whose patterns matched.
+
+    With leave_unmatched, files no rule matches stay where they are
+    instead of going to their default category.
+    """
+
+    def __init__(self, rules, leave_unmatched=False):
+        self.rules = list(rules)
+        self.leave_unmatched = leave_unmatched
+
+        # Each index maps a key length to {lowercased literal: [rule index, ...]}
+        self._prefixes = {}
+        self._suffixes = {}
+        general = []
+        regex_rules = []
+        for index, rule in enumerate(self.rules):
+            keys = rule.literal_keys()
+            if keys is None:
+                (general if rule.name_regex is None else regex_rules).append(index)
+                continue
+            kind, literals = keys
+            table = self._prefixes if kind == 'prefix' else self._suffixes
+            for literal in set(literals):
+                table.setdefault(len(literal), {}).setdefault(literal, []).append(index)
+
+        self._matchers = [re.compile(rule.pattern(), re.IGNORECASE) for rule in self.rules]
+        self._general = general
+        self._general_matcher = re.compile(
+            '|'.join(f'(?P<_rule{index}>{self.rules[index].pattern()})' for index in general),
+            re.IGNORECASE) if general else None
+
+        self._joined = [index for index in regex_rules if _joinable(self.rules[index].regex)]
+        self._regex_rules = [index for index in regex_rules if index not in self._joined]
+        self._joined_matcher = None
+        if self._joined:
+            try:
+                self._joined_matcher = re.compile(
+                    '|'.join(f'(?P<_regex{index}>(?:{self.rules[index].regex}))\\Z'
+                             for index in self._joined),
+                    re.IGNORECASE)
+            except re.error:
+                # e.g. two rules using the same group name
+                self._joined = []
+                self._regex_rules = regex_rules
+
+    def folders(self):
+        """Return the set of top-level folders rules move files into."""
+        return {rule.folder.split(os.sep)[0] for rule in self.rules}
+
+    def _indexed_matches(self, name, key):
+        lower = name.lower()
+        candidates = set()
+        for length, literals in self._prefixes.items():
+            candidates.update(literals.get(lower[:length], ()))
+        for length, literals in self._suffixes.items():
+            if length <= len(lower):
+                candidates.update(literals.get(lower[len(lower) - length:], ()))
+        # The literal is only one condition; check the others too
+        return [index for index in sorted(candidates) if self._matchers[index].match(key)]
+
+    def _general_matches(self, key):
+        if self._general_matcher is None:
+            return
+        match = self._general_matcher.match(key)
+        if match is None:
+            return
+        first = int(match.lastgroup[len('_rule'):])
+        yield first
+        # Later rules only matter if the first one's size or age conditions fail
+        for index in self._general[self._general.index(first) + 1:]:
+            if self._matchers[index].match(key):
+                yield index
+
+    def _joined_regex_matches(self, name, key):
+        if self._joined_matcher is None:
+            return
+        match = self._joined_matcher.match(name)
+        if match is None:
+            return
+        first = int(match.lastgroup[len('_regex'):])
+        if self._matchers[first].match(key):
+            yield first
+        # Later rules only matter if the first one's other conditions fail
+        for index in self._joined[self._joined.index(first) + 1:]:
+            if self.rules[index].matches_name(name) and self._matchers[index].match(key):
+                yield index
+
+    def _regex_matches(self, name, key):
+        single = [index for index in self._regex_rules
+                  if self.rules[index].matches_name(name) and self._matchers[index].match(key)]
+        return heapq.merge(single, self._joined_regex_matches(name, key))
+
+    def match(self, name, relative_path=None, stat=None, now=None):
+        """Return the folder for a file, or None if no rule matches.
+
+        Args:
+            name: File name
+            relative_path: Path relative to the organized directory
+                (defaults to name)
+            stat: Function returning the file's stat result; only called
+                if a matching rule has size or age conditions
+            now: Current time for age conditions (default: time.time())
+        """
+        if not self.rules:
+            return None
+        key = f"{name}\0{(relative_path or name).replace(os.sep, '/')}"
+
+        for index in heapq.merge(self._indexed_matches(name, key), self._general_matches(key),
+                                 self._regex_matches(name, key)):
+            rule = self.rules[index]
+            if not rule.matches_name(name):
+                continue
+            if not rule.needs_stat():
+                return rule.folder
+            try:
+                if rule.accepts(stat(), time.time() if now is None else now):
+                    return rule.folder
+            except (OSError, TypeError):
+                # Can't tell without a stat; don't apply the rule
+                continue
+        return None
+
+
+def load_rules(path):
+    """Load a RuleSet from a .toml or .json file.
+
+    The file holds a list of rules under 'rules' (see Rule for their
+    keys) and optionally leave_unmatched = true. Raises ValueError if the
+    file is not valid.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if path.lower().endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("Reading TOML rules needs Python 3.11 or the tomli package")
+        try:
+            config = tomllib.loads(data.decode('utf-8'))
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"Invalid rules file {path}: {e}")
+    else:
+        try:
+            config = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid rules file {path}: {e}")
+
+    if not isinstance(config, dict):
+        raise ValueError(f"Invalid rules file {path}: expected a table of settings "
+                         f"with a list of rules under 'rules'")
+    rules = [Rule.from_dict(item) for item in config.get('rules', [])]
+    return RuleSet(rules, leave_unmatched=bool(config.get('leave_unmatched', False)))
@@ -0,0 +1,166 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Counters kept for every phase and for every directory within it
+COUNTERS = (
+    'entries_scanned',      # Directory entries looked at
+    'directories_scanned',  # Directory listings read
+    'operations',           # Move and trash calls issued
+    # Listings, stats, renames and trash calls issued; a move across
+    # devices counts as one, though its copy takes several calls
+    'syscalls',
+    'bytes_moved',
+    'bytes_trashed',
+    'errors',
+    'skipped',
+)
+
+
+class PhaseMetrics:
+    """Timing and counters for one phase of a run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.directories = {}
+
+    def count(self, counter, amount=1, directory=None):
+        self.counters[counter] += amount
+        if directory is not None:
+            counters = self.directories.get(directory)
+            if counters is None:
+                counters = self.directories[directory] = dict.fromkeys(COUNTERS, 0)
+            counters[counter] += amount
+
+    def to_dict(self):
+        result = {'wall_time': self.wall_time, 'cpu_time': self.cpu_time}
+        result.update(self.counters)
+        result['directories'] = {directory: dict(counters)
+                                 for directory, counters in self.directories.items()}
+        return result
+
+
+class RunMetrics:
+    """Collects per-phase metrics for a cleanup run.
+
+    Code inside a `with metrics.phase(name):` block records counters with
+    count(). The current phase is tracked per thread, so phases running
+    on different threads at the same time are kept apart.
+
+    A phase's cpu_time is that of the thread running it, as phases may
+    run at the same time; work it hands to worker threads only shows in
+    the run's cpu_time, which covers the whole process.
+
+    If listener is set, it is called as listener(phase, counter, amount)
+    after each count, on the thread that made it.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.started = time.time()
+        self._cpu_start = time.process_time()
+        self.listener = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the enclosed block and attribute counts made in it to name."""
+        with self._lock:
+            metrics = self.phases.get(name)
+            if metrics is None:
+                metrics = self.phases[name] = PhaseMetrics(name)
+
+        previous = getattr(self._local, 'phase', None)
+        self._local.phase = metrics
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_time += time.perf_counter() - wall_start
+            metrics.cpu_time += time.thread_time() - cpu_start
+            self._local.phase = previous
+
+    def count(self, counter, amount=1, directory=None):
+        """Add amount to a counter of the current thread's phase, if any."""
+        metrics = getattr(self._local, 'phase', None)
+        if metrics is not None:
+            with self._lock:
+                metrics.count(counter, amount, directory)
+            if self.listener is not None:
+                self.listener(metrics.name, counter, amount)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'started': self.started,
+                'cpu_time': time.process_time() - self._cpu_start,
+                'phases': {name: phase.to_dict() for name, phase in self.phases.items()},
+            }
+
+    def write_json(self, path):
+        """Write the metrics to a JSON file."""
+        _write_atomically(path, json.dumps(self.to_dict(), indent=2))
+
+    def prometheus_text(self, prefix='file_organizer'):
+        """Render the metrics in the Prometheus text exposition format."""
+        data = self.to_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(value)}"'
+                                      for key, value in labels.items())
+                if label_text:
+                    label_text = f"{{{label_text}}}"
+                lines.append(f"{prefix}_{name}{label_text} {value}")
+
+        phases = data['phases']
+        metric('run_cpu_seconds', "CPU time used by the whole run.",
+               [({}, data['cpu_time'])])
+        metric('phase_wall_seconds', "Wall-clock time spent in each phase.",
+               [({'phase': name}, phase['wall_time']) for name, phase in phases.items()])
+        metric('phase_cpu_seconds', "CPU time used by the thread running each phase.",
+               [({'phase': name}, phase['cpu_time']) for name, phase in phases.items()])
+        for counter in COUNTERS:
+            metric(f'phase_{counter}', f"Value of {counter} for each phase.",
+                   [({'phase': name}, phase[counter]) for name, phase in phases.items()])
+            metric(f'directory_{counter}', f"Value of {counter} for each directory.",
+                   [({'phase': name, 'directory': directory}, counters[counter])
+                    for name, phase in phases.items()
+                    for directory, counters in phase['directories'].items()])
+        metric('last_run_timestamp_seconds', "When the last run started.",
+               [({}, data['started'])])
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the metrics as a Prometheus text file (for node exporter's textfile collector)."""
+        _write_atomically(path, self.prometheus_text())
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomically(path, text):
+    # Write next to the target and rename, so scrapers never see a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
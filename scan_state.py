@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Default location of the state database used by the command line
+DEFAULT_STATE_PATH = os.path.join(
+    os.path.expanduser('~'), '.file_organizer_state.db')
+
+
+class ScanState:
+    """SQLite-backed memory of entries that earlier runs left in place.
+
+    Entries a run decides to leave alone are recorded with their (size,
+    mtime, inode) signature, and optionally a time after which they must
+    be looked at again even if unchanged (e.g. when they become old
+    enough to remove). On the next run, seen() reports those as
+    unchanged and the caller can skip them without classifying them
+    again. Entries that are moved or trashed are forgotten, and entries
+    that are still waiting to be handled, or that failed, are never
+    recorded, so a stopped or failed run leaves them to the next one.
+
+    Each record belongs to a scope (the directory being processed). When
+    a scope has been scanned completely, prune() drops the records of
+    entries that were not seen, i.e. that have since disappeared.
+
+    With full_rescan=True nothing is reported as unchanged, but entries
+    are still recorded so the following run is incremental again.
+    """
+
+    # Commit after this many writes, so a run costs few fsyncs
+    batch_size = 1000
+
+    def __init__(self, db_path=DEFAULT_STATE_PATH, full_rescan=False):
+        self.db_path = db_path
+        self.full_rescan = full_rescan
+        self.run_id = time.time_ns()
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "path TEXT PRIMARY KEY, scope TEXT NOT NULL, size INTEGER, "
+            "mtime_ns INTEGER, inode INTEGER, run INTEGER, until REAL)")
+        # Databases written before records could expire lack the column
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if 'until' not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN until REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_scope ON entries (scope, run)")
+        # File types found by content sniffing, keyed by file identity
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content_types ("
+            "inode INTEGER, size INTEGER, mtime_ns INTEGER, extension TEXT, "
+            "PRIMARY KEY (inode, size, mtime_ns))")
+        self._conn.commit()
+
+    @staticmethod
+    def signature(entry):
+        """Return the (size, mtime_ns, inode) signature of a ScanEntry."""
+        stat = entry.stat()
+        return stat.st_size, stat.st_mtime_ns, entry.inode()
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._conn.commit()
+            self._pending = 0
+
+    def seen(self, scope, entry):
+        """Return True if entry was recorded by a previous run and is unchanged since.
+
+        The caller can then skip it. Its record is kept through this
+        run's prune(); nothing is recorded for new or changed entries, or
+        for entries whose record has expired.
+        """
+        if self.full_rescan:
+            return False
+        signature = self.signature(entry)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, until FROM entries WHERE path = ?",
+                (entry.path,)).fetchone()
+            if row is None or row[:3] != signature:
+                return False
+            if row[3] is not None and row[3] <= time.time():
+                return False
+            self._conn.execute(
+                "UPDATE entries SET run = ? WHERE path = ?", (self.run_id, entry.path))
+            self._written()
+        return True
+
+    def record(self, scope, entry, until=None):
+        """Remember that entry was deliberately left in place, so later runs can skip it.
+
+        Args:
+            scope: Directory being processed
+            entry: The ScanEntry left in place
+            until: Optional time (as from time.time()) from which later
+                runs must look at the entry again, even if unchanged
+        """
+        size, mtime_ns, inode = self.signature(entry)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (path, scope, size, mtime_ns, inode, run, until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.path, scope, size, mtime_ns, inode, self.run_id, until))
+            self._written()
+
+    def forget(self, path):
+        """Drop the record for path, e.g. once it has been moved or trashed."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+            self._written()
+
+    def content_type(self, key):
+        """Look up a sniffed type by (inode, size, mtime_ns).
+
+        Returns (True, extension) if one is recorded (extension may be None
+        for files that could not be identified), or (False, None).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT extension FROM content_types WHERE inode = ? AND size = ? AND mtime_ns = ?",
+                key).fetchone()
+        if row is None:
+            return False, None
+        return True, row[0]
+
+    def set_content_type(self, key, extension):
+        """Record the sniffed type of the file with this (inode, size, mtime_ns)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_types VALUES (?, ?, ?, ?)",
+                (*key, extension))
+            self._written()
+
+    def prune(self, scope):
+        """Drop records in scope that were not seen in this run.
+
+        Only call this after the whole scope has been scanned.
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM entries WHERE scope = ? AND run != ?",
+                (scope, self.run_id))
+            self._conn.commit()
+            self._pending = 0
+
+    def commit(self):
+        """Write out any pending changes."""
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        """Commit pending changes and close the database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,78 @@
+import os
+
+from file_operations import MOVE, TRASH, FileOperation
+from file_organizer import FileOrganizer
+from io_throttle import RateLimiter
+
+
+class RecordingBackend:
+    """Trash backend that deletes items and remembers the batches it got."""
+
+    def __init__(self):
+        self.batches = []
+
+    def trash_many(self, paths):
+        self.batches.append(list(paths))
+        for path in paths:
+            os.remove(path)
+            yield path, None
+
+
+def test_plan_trash_goes_through_the_backend_in_batches(tmp_path):
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"temp{index}.tmp"
+        path.write_text("x")
+        paths.append(str(path))
+    (tmp_path / "photo.jpg").write_text("y")
+
+    organizer = FileOrganizer()
+    organizer.trash_backend = RecordingBackend()
+    organizer.trash_batch_size = 2
+    plan = [FileOperation(TRASH, path, reason="temporary file") for path in paths[:3]]
+    plan.append(FileOperation(MOVE, str(tmp_path / "photo.jpg"),
+                              str(tmp_path / "Images" / "photo.jpg"), "Images"))
+    plan.extend(FileOperation(TRASH, path, reason="temporary file") for path in paths[3:])
+
+    results = organizer.apply_plan(plan)
+
+    assert results == {"moved": 1, "trashed": 5, "skipped": 0, "failed": 0}
+    assert organizer.trash_backend.batches == [paths[:2], paths[2:3], paths[3:]]
+    assert (tmp_path / "Images" / "photo.jpg").exists()
+
+
+def test_plan_cache_items_are_deleted_directly(tmp_path):
+    cache_file = tmp_path / "cache_entry"
+    cache_file.write_text("x")
+    temp_file = tmp_path / "temp.tmp"
+    temp_file.write_text("x")
+
+    organizer = FileOrganizer()
+    organizer.trash_backend = RecordingBackend()
+    organizer.delete_caches_directly = True
+    results = organizer.apply_plan([
+        FileOperation(TRASH, str(cache_file), reason="browser cache file"),
+        FileOperation(TRASH, str(temp_file), reason="temporary file"),
+    ])
+
+    assert results["trashed"] == 2
+    assert not cache_file.exists()
+    assert organizer.trash_backend.batches == [[str(temp_file)]]
+
+
+def test_trash_batches_stay_within_the_rate_limiter_burst(tmp_path):
+    paths = []
+    for index in range(12):
+        path = tmp_path / f"temp{index:02}.tmp"
+        path.write_text("x")
+        paths.append(str(path))
+
+    organizer = FileOrganizer()
+    organizer.trash_backend = RecordingBackend()
+    organizer.rate_limiter = RateLimiter(ops_per_second=100, bytes_per_second=2000, burst=0.05)
+    plan = [FileOperation(TRASH, path, size=300 if index < 6 else 1)
+            for index, path in enumerate(paths)]
+
+    assert organizer.apply_plan(plan)["trashed"] == 12
+    # At most 5 operations, and 100 bytes, go in one call
+    assert [len(batch) for batch in organizer.trash_backend.batches] == [1, 1, 1, 1, 1, 1, 5, 1]
@@ -0,0 +1,31 @@
+import os
+
+from file_organizer import FileOrganizer
+
+
+def block_folders(monkeypatch, *blocked):
+    scandir = os.scandir
+    blocked = {os.fspath(path) for path in blocked}
+
+    def guarded(path='.'):
+        if os.fspath(path) in blocked:
+            raise PermissionError(13, "Permission denied", os.fspath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', guarded)
+
+
+def test_unreadable_folders_are_counted_not_fatal(tmp_path, monkeypatch):
+    for name in ("a", "b", "c", "d"):
+        (tmp_path / name / "inner").mkdir(parents=True)
+        (tmp_path / name / "file.txt").write_bytes(b"x" * 10)
+        (tmp_path / name / "inner" / "file.jpg").write_bytes(b"y" * 5)
+    block_folders(monkeypatch, tmp_path / "b", tmp_path / "c" / "inner")
+
+    report = FileOrganizer().analyze_disk_usage(str(tmp_path), workers=1)
+
+    assert report.unreadable == 2
+    # a and d whole, and c without its inner folder
+    assert report.total_files == 5
+    assert report.total_bytes == 40
+    assert "2 folders could not be read" in report.summary()
@@ -0,0 +1,54 @@
+import os
+
+from file_organizer import FileOrganizer
+
+
+class RecordingBackend:
+    """Trash backend that deletes items and remembers which."""
+
+    def __init__(self):
+        self.trashed = []
+
+    def trash_many(self, paths):
+        for path in paths:
+            os.remove(path)
+            self.trashed.append(path)
+            yield path, None
+
+
+def make_organizer():
+    organizer = FileOrganizer()
+    organizer.trash_backend = RecordingBackend()
+    return organizer
+
+
+def test_symlinks_and_hard_links_are_not_copies(tmp_path):
+    real = tmp_path / "real.bin"
+    real.write_bytes(b"x" * 1000)
+    (tmp_path / "sub").mkdir()
+    os.link(real, tmp_path / "sub" / "hard.bin")
+    os.symlink(real, tmp_path / "alink.bin")
+
+    organizer = make_organizer()
+    assert organizer.find_duplicates(str(tmp_path)) == []
+    assert organizer.clean_duplicates(str(tmp_path)) == 0
+    assert real.read_bytes() == b"x" * 1000
+    assert os.path.exists(tmp_path / "alink.bin")
+
+
+def test_copy_of_hard_linked_file_is_trashed_once(tmp_path):
+    real = tmp_path / "real.bin"
+    real.write_bytes(b"y" * 1000)
+    os.link(real, tmp_path / "hard.bin")
+    copy = tmp_path / "zcopy.bin"
+    copy.write_bytes(b"y" * 1000)
+    os.utime(real, (1, 1))
+
+    organizer = make_organizer()
+    groups = organizer.find_duplicates(str(tmp_path))
+    assert len(groups) == 1 and len(groups[0]) == 2
+    assert str(copy) in groups[0]
+
+    assert organizer.clean_duplicates(str(tmp_path)) == 1
+    assert organizer.trash_backend.trashed == [str(copy)]
+    assert real.exists() and (tmp_path / "hard.bin").exists()
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from file_operations import MOVE, FileOperation, SerialExecutor, make_executor
+
+
+def moves(tmp_path, count):
+    (tmp_path / "Moved").mkdir()
+    operations = []
+    for index in range(count):
+        source = tmp_path / f"file{index}.txt"
+        source.write_text("x")
+        operations.append(FileOperation(MOVE, str(source), str(tmp_path / "Moved" / source.name)))
+    return operations
+
+
+def test_initializer_does_not_run_on_the_calling_thread(tmp_path):
+    threads = []
+    executor = make_executor(1, initializer=lambda: threads.append(threading.get_ident()))
+    assert not isinstance(executor, SerialExecutor)
+
+    results = list(executor.run(moves(tmp_path, 3)))
+
+    assert [error for _, error in results] == [None] * 3
+    assert threads and threading.get_ident() not in threads
+
+
+def test_results_handed_out_before_an_error_are_yielded(tmp_path):
+    operations = moves(tmp_path, 6)
+
+    def failing():
+        yield from operations[:5]
+        raise TimeoutError("time limit reached")
+
+    results = []
+    with pytest.raises(TimeoutError):
+        for operation, error in make_executor(4).run(failing()):
+            results.append(operation)
+
+    assert results == operations[:5]
+    assert (tmp_path / "Moved" / "file4.txt").exists()
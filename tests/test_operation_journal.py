@@ -0,0 +1,24 @@
+from operation_journal import OperationJournal, journal_path, list_runs, prune_runs
+
+
+def write_run(journal_dir, run_id, finished=True):
+    journal = OperationJournal(journal_path(str(journal_dir), run_id), run_id)
+    journal.close(finished)
+
+
+def test_runs_started_in_the_same_second_sort_by_counter(tmp_path):
+    for run_id in ('20240101-120000_10', '20240101-120000', '20240101-120000_2',
+                   '20231231-235959_11', '20240101-120001'):
+        write_run(tmp_path, run_id)
+    assert list_runs(str(tmp_path)) == [
+        '20231231-235959_11', '20240101-120000', '20240101-120000_2',
+        '20240101-120000_10', '20240101-120001',
+    ]
+
+
+def test_prune_keeps_the_latest_finished_runs_and_unfinished_ones(tmp_path):
+    for second in range(5):
+        write_run(tmp_path, f'20240101-12000{second}', finished=second != 1)
+
+    assert prune_runs(str(tmp_path), keep=2) == 2
+    assert list_runs(str(tmp_path)) == ['20240101-120001', '20240101-120003', '20240101-120004']
@@ -0,0 +1,33 @@
+import os
+
+from process_probe import ProcessProbe
+
+
+class FixedListing:
+    """Reports a fixed set of open files."""
+
+    def __init__(self, open_files):
+        self._open_files = set(open_files)
+
+    def process_names(self):
+        return []
+
+    def open_files(self):
+        return self._open_files
+
+
+def test_in_use_finds_open_files_and_their_folders(tmp_path):
+    real = tmp_path / "real"
+    (real / "folder").mkdir(parents=True)
+    open_file = real / "folder" / "open.log"
+    open_file.write_text("x")
+    link = tmp_path / "link"
+    link.symlink_to(real)
+
+    probe = ProcessProbe(listing=FixedListing([os.path.realpath(open_file)]))
+
+    assert probe.in_use(str(real / "folder"))
+    assert probe.in_use(str(link / "folder"))
+    assert probe.in_use(str(link / "folder" / "open.log"))
+    assert not probe.in_use(str(link / "closed.log"))
+    assert not probe.in_use(str(tmp_path / "elsewhere" / "open.log"))
@@ -0,0 +1,39 @@
+import random
+
+from retention_policy import RetentionPolicy, RetentionQueue
+
+
+def test_size_cap_alone_holds_at_most_max_bytes():
+    policy = RetentionPolicy(max_bytes=10_000, order='oldest')
+    queue = RetentionQueue(policy)
+    sizes = {}
+    removed = []
+    generator = random.Random(7)
+    for index in range(5000):
+        if index % 10 == 0:
+            queue.keep(1)
+            continue
+        size = sizes[index] = generator.randrange(1, 1000)
+        queue.add(index, size, mtime=generator.random())
+        removed.extend(queue.ready())
+        assert sum(entry[3] for entry in queue._heap) <= policy.max_bytes
+
+    selected, left = queue.select()
+    removed.extend(selected)
+    assert len(set(removed)) == len(removed)
+    remaining = queue.total_bytes - sum(sizes[index] for index in removed)
+    assert remaining <= policy.max_bytes
+    # Nothing more was removed than needed to get under the cap
+    assert remaining + sizes[removed[-1]] > policy.max_bytes
+
+
+def test_size_cap_removes_oldest_first():
+    policy = RetentionPolicy(max_bytes=250, order='oldest')
+    queue = RetentionQueue(policy)
+    removed = []
+    for name, mtime in [('c', 3), ('a', 1), ('d', 4), ('b', 2)]:
+        queue.add(name, 100, mtime)
+        removed.extend(queue.ready())
+    selected, left = queue.select()
+    assert removed + selected == ['a', 'b']
+    assert sorted(left) == ['c', 'd']
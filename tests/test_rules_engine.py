@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from rules_engine import Rule, RuleSet, load_rules
+
+
+def test_anchored_regex_matches_whole_names():
+    rules = RuleSet([Rule('Invoices', regex=r'^invoice.*\.pdf$')])
+    assert rules.match('invoice-2024.pdf') == 'Invoices'
+    assert rules.match('Invoice_march.PDF') == 'Invoices'
+    assert rules.match('invoice-2024.pdf.bak') is None
+    assert rules.match('old invoice.pdf') is None
+
+
+def test_regex_must_match_the_whole_name():
+    rules = RuleSet([Rule('Shots', regex=r'Screenshot.*\Z'), Rule('Logs', regex='log')])
+    assert rules.match('Screenshot 1.png', os.path.join('sub', 'Screenshot 1.png')) == 'Shots'
+    assert rules.match('log') == 'Logs'
+    assert rules.match('changelog.txt') is None
+
+
+def test_regex_combines_with_other_conditions():
+    rules = RuleSet([
+        Rule('Reports', extensions=['.pdf'], regex=r'report-\d+\.pdf'),
+        Rule('Documents', extensions=['.pdf']),
+    ])
+    assert rules.match('report-12.pdf') == 'Reports'
+    assert rules.match('report-final.pdf') == 'Documents'
+
+
+@pytest.mark.parametrize('folder', [
+    '../outside', 'a/../../outside', os.path.abspath('elsewhere'), '..',
+])
+def test_folders_outside_the_organized_directory_are_rejected(folder):
+    with pytest.raises(ValueError):
+        Rule(folder, extensions=['.txt'])
+
+
+def test_nested_folders_are_allowed():
+    assert Rule(os.path.join('Work', 'Invoices'), extensions=['.pdf']).folder == \
+        os.path.join('Work', 'Invoices')
+
+
+def test_rules_given_per_call_leave_the_organizer_alone(tmp_path):
+    from file_organizer import FileOrganizer
+
+    (tmp_path / "invoice-1.pdf").write_text("x")
+    (tmp_path / "notes.pdf").write_text("x")
+    organizer = FileOrganizer()
+    rules = RuleSet([Rule('Invoices', regex=r'invoice-\d+\.pdf')])
+
+    planned = {os.path.basename(operation.source): operation.category
+               for operation in organizer.plan_organize(str(tmp_path), rules=rules)}
+    assert planned == {"invoice-1.pdf": "Invoices", "notes.pdf": "Documents"}
+    assert organizer.rules is None
+    assert {operation.category for operation in organizer.plan_organize(str(tmp_path))} == \
+        {"Documents"}
+
+
+def test_first_regex_rule_wins():
+    rules = RuleSet([
+        Rule('Scans', regex=r'scan_\d+\.(png|jpg)'),
+        Rule('Pictures', regex=r'.*\.(png|jpg)'),
+        Rule('Repeats', regex=r'(\w)\1.*'),
+        Rule('Later', regex=r'scan_.*'),
+    ])
+    assert rules.match('scan_12.png') == 'Scans'
+    assert rules.match('scan_x.png') == 'Pictures'
+    assert rules.match('aab.txt') == 'Repeats'
+    assert rules.match('scan_12.png.txt') == 'Later'
+    assert rules.match('abc.txt') is None
+
+
+def test_regex_rule_falls_through_when_its_path_does_not_match():
+    rules = RuleSet([
+        Rule('Work', regex=r'report.*', path='work/*'),
+        Rule('Reports', regex=r'report.*'),
+    ])
+    assert rules.match('report.txt', os.path.join('work', 'report.txt')) == 'Work'
+    assert rules.match('report.txt', os.path.join('home', 'report.txt')) == 'Reports'
+
+
+@pytest.mark.parametrize('folder', ['.', './', 'a/..'])
+def test_the_organized_directory_itself_is_rejected(folder):
+    with pytest.raises(ValueError):
+        Rule(folder, extensions=['.txt'])
+
+
+@pytest.mark.parametrize('content', ['[]', '"rules"', '3'])
+def test_rules_files_must_hold_a_table(tmp_path, content):
+    path = tmp_path / "rules.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        load_rules(str(path))
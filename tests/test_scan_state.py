@@ -0,0 +1,163 @@
+import os
+import time
+
+from cancellation import CancelToken
+from file_operations import SKIP
+from file_organizer import FileOrganizer
+from file_scanner import scan_directory
+from move_engine import MoveEngine
+from retention_policy import RetentionPolicy
+from scan_state import ScanState
+
+
+class StoppingMoveEngine(MoveEngine):
+    """Cancels a token after a number of moves."""
+
+    def __init__(self, token, after):
+        super().__init__()
+        self.token = token
+        self.after = after
+        self.moves = 0
+
+    def move(self, source, destination):
+        super().move(source, destination)
+        self.moves += 1
+        if self.moves == self.after:
+            self.token.cancel()
+
+
+def make_files(directory, count):
+    for index in range(count):
+        (directory / f"file{index:03}.txt").write_text(str(index))
+
+
+def left_in_place(directory):
+    return sorted(entry.name for entry in os.scandir(directory) if entry.is_file())
+
+
+def test_rerun_after_cancel_moves_the_rest(tmp_path):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, 300)
+    db_path = str(tmp_path / "state.db")
+
+    organizer = FileOrganizer()
+    organizer.state = ScanState(db_path)
+    token = CancelToken()
+    organizer.move_engine = StoppingMoveEngine(token, after=10)
+    moved = organizer.organize_directory(str(directory), cancel_token=token)
+    organizer.state.close()
+    assert moved == 10
+    assert len(left_in_place(directory)) == 290
+
+    organizer = FileOrganizer()
+    organizer.state = ScanState(db_path)
+    assert organizer.organize_directory(str(directory)) == 290
+    organizer.state.close()
+    assert left_in_place(directory) == []
+
+
+def test_failed_moves_are_retried(tmp_path):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, 5)
+    db_path = str(tmp_path / "state.db")
+
+    class FailingMoveEngine(MoveEngine):
+        def move(self, source, destination):
+            raise PermissionError(source)
+
+    organizer = FileOrganizer()
+    organizer.state = ScanState(db_path)
+    organizer.move_engine = FailingMoveEngine()
+    assert organizer.organize_directory(str(directory)) == 0
+    organizer.state.close()
+
+    organizer = FileOrganizer()
+    organizer.state = ScanState(db_path)
+    assert organizer.organize_directory(str(directory)) == 5
+    organizer.state.close()
+
+
+def test_unchanged_left_files_are_skipped(tmp_path):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, 3)
+    state = ScanState(str(tmp_path / "state.db"))
+
+    entries = {entry.name: entry for entry in scan_directory(str(directory))}
+    entry = entries["file000.txt"]
+    assert not state.seen(str(directory), entry)
+    state.record(str(directory), entry)
+    assert state.seen(str(directory), entry)
+    state.close()
+
+
+def test_expired_records_are_looked_at_again(tmp_path):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, 1)
+    state = ScanState(str(tmp_path / "state.db"))
+
+    entry = next(iter(scan_directory(str(directory))))
+    state.record(str(directory), entry, until=time.time() - 1)
+    assert not state.seen(str(directory), entry)
+    state.record(str(directory), entry, until=time.time() + 3600)
+    assert state.seen(str(directory), entry)
+    state.close()
+
+
+class CountingPolicy(RetentionPolicy):
+    """Counts the items it is asked about."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.checked = 0
+
+    def is_expired(self, is_dir, mtime, now):
+        self.checked += 1
+        return super().is_expired(is_dir, mtime, now)
+
+
+class OpenFilesProbe:
+    """Reports a fixed set of paths as open and counts the questions."""
+
+    def __init__(self, open_paths):
+        self.open_paths = set(open_paths)
+        self.asked = 0
+
+    def in_use(self, path):
+        self.asked += 1
+        return path in self.open_paths
+
+
+def test_temp_items_kept_are_skipped_next_run(tmp_path):
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    recent = temp_dir / "recent.tmp"
+    recent.write_text("x")
+    open_file = temp_dir / "open.tmp"
+    open_file.write_text("x")
+    then = time.time() - 30 * 86400
+    os.utime(open_file, (then, then))
+    db_path = str(tmp_path / "state.db")
+
+    def plan():
+        organizer = FileOrganizer()
+        organizer.temp_locations = [str(temp_dir)]
+        organizer.retention = CountingPolicy(keep_days=7)
+        organizer.process_probe = OpenFilesProbe([str(open_file)])
+        organizer.state = ScanState(db_path)
+        operations = list(organizer.plan_temp_cleanup())
+        organizer.state.close()
+        return operations, organizer.retention, organizer.process_probe
+
+    operations, policy, probe = plan()
+    assert [operation.action for operation in operations] == [SKIP]
+    assert policy.checked == 2
+    assert probe.asked == 1
+
+    operations, policy, probe = plan()
+    assert operations == []
+    assert policy.checked == 0
+    assert probe.asked == 0
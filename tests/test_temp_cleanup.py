@@ -0,0 +1,67 @@
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+from file_operations import SKIP, TRASH
+from file_organizer import FileOrganizer
+from platform_backends import FreedesktopPlatform
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'),
+                                reason="needs /proc and Unix sockets")
+
+DAY = 86400
+
+
+def age(path, days):
+    then = time.time() - days * DAY
+    os.utime(path, (then, then))
+
+
+def plan(temp_dir):
+    organizer = FileOrganizer()
+    organizer.platform = FreedesktopPlatform()
+    organizer.temp_locations = [str(temp_dir)]
+    return {os.path.basename(operation.source): operation.action
+            for operation in organizer.plan_temp_cleanup()}
+
+
+def test_linux_temp_cleanup_leaves_system_and_open_items(tmp_path):
+    old = tmp_path / "old.tmp"
+    old.write_text("x")
+    recent = tmp_path / "recent.tmp"
+    recent.write_text("x")
+    trash = tmp_path / ".Trash-1000"
+    (trash / "files").mkdir(parents=True)
+    service = tmp_path / "systemd-private-abc-foo.service-xyz"
+    service.mkdir()
+    sockets = tmp_path / ".X11-unix"
+    sockets.mkdir()
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(sockets / "X0"))
+    open_file = tmp_path / "open.tmp"
+    open_file.write_text("x")
+
+    for path in (old, trash, service, sockets, open_file):
+        age(path, 30)
+    age(recent, 5)
+
+    with listener, open(open_file):
+        actions = plan(tmp_path)
+
+    assert actions == {
+        "old.tmp": TRASH,
+        ".Trash-1000": SKIP,
+        "systemd-private-abc-foo.service-xyz": SKIP,
+        ".X11-unix": SKIP,
+        "open.tmp": SKIP,
+    }
+
+
+def test_top_level_sockets_are_left_alone(tmp_path):
+    with socket.socket(socket.AF_UNIX) as listener:
+        listener.bind(str(tmp_path / "agent.sock"))
+        age(tmp_path / "agent.sock", 30)
+        assert plan(tmp_path) == {}
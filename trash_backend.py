@@ -0,0 +1,256 @@
+import errno
+import os
+import shutil
+import stat
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+
+class Send2TrashBackend:
+    """Trashes items with send2trash; works on every platform.
+
+    Batches are handed to send2trash in one call where it supports lists
+    of paths (it then sets up the platform trash once). If that fails,
+    the batch is retried item by item so each error is attributed to
+    the right path.
+    """
+
+    def __init__(self):
+        # Imported here so the other backends work without send2trash
+        import send2trash  # Need to install this package
+        self._send2trash = send2trash.send2trash
+
+    def trash(self, path):
+        self._send2trash(path)
+
+    def trash_many(self, paths):
+        """Trash paths, yielding (path, error) pairs in order; error is None on success."""
+        if len(paths) > 1:
+            try:
+                self._send2trash(list(paths))
+            except Exception:
+                pass
+            else:
+                for path in paths:
+                    yield path, None
+                return
+
+        for path in paths:
+            try:
+                self.trash(path)
+            except Exception as e:
+                yield path, e
+            else:
+                yield path, None
+
+
+class _TrashDirectory:
+    """One freedesktop.org trash directory and the names already used in it."""
+
+    def __init__(self, path, topdir=None):
+        self.files = os.path.join(path, 'files')
+        self.info = os.path.join(path, 'info')
+        # Paths in .trashinfo files are relative to topdir, if given
+        self.topdir = topdir
+        os.makedirs(self.files, mode=0o700, exist_ok=True)
+        os.makedirs(self.info, mode=0o700, exist_ok=True)
+        self.names = set(os.listdir(self.files))
+        self.names.update(name[:-len('.trashinfo')] for name in os.listdir(self.info)
+                          if name.endswith('.trashinfo'))
+
+
+class FreedesktopTrashBackend:
+    """Trashes items into freedesktop.org trash directories (Linux and BSDs).
+
+    The trash directory for each device is found and set up once and
+    remembered, along with the names already in it. Trashing an item
+    then costs one .trashinfo write and one rename, instead of
+    send2trash's per-call mount point search and trash directory checks.
+    Items on devices without a usable trash directory are handed to
+    send2trash instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._directories = {}   # st_dev -> _TrashDirectory, or None if unusable
+        self._devices = {}       # parent directory -> st_dev
+        # Send2TrashBackend, set up the first time an item needs it
+        self._fallback = None
+
+        data_home = os.environ.get('XDG_DATA_HOME') or \
+            os.path.join(os.path.expanduser('~'), '.local', 'share')
+        self.home_trash = os.path.join(data_home, 'Trash')
+
+    def _trash_elsewhere(self, path):
+        if self._fallback is None:
+            self._fallback = Send2TrashBackend()
+        self._fallback.trash(path)
+
+    def _device_of(self, path):
+        # Items in one folder live on the folder's device, barring mount
+        # points; the rename fails with EXDEV for those and falls back
+        parent = os.path.dirname(os.path.abspath(path))
+        device = self._devices.get(parent)
+        if device is None:
+            device = self._devices[parent] = os.stat(parent).st_dev
+        return device
+
+    def _trash_directory(self, device, path):
+        if device in self._directories:
+            return self._directories[device]
+
+        directory = None
+        try:
+            os.makedirs(self.home_trash, mode=0o700, exist_ok=True)
+            if os.stat(self.home_trash).st_dev == device:
+                directory = _TrashDirectory(self.home_trash)
+            else:
+                topdir = _mount_point(os.path.abspath(path))
+                directory = _TrashDirectory(_topdir_trash(topdir), topdir)
+        except OSError:
+            directory = None
+
+        self._directories[device] = directory
+        return directory
+
+    def _reserve_name(self, directory, name):
+        candidate = name
+        counter = 1
+        while candidate in directory.names:
+            counter += 1
+            base, extension = os.path.splitext(name)
+            candidate = f"{base}.{counter}{extension}"
+        directory.names.add(candidate)
+        return candidate
+
+    def trash(self, path):
+        for _, error in self.trash_many([path]):
+            if error is not None:
+                raise error
+
+    def trash_many(self, paths):
+        """Trash paths, yielding (path, error) pairs in order; error is None on success."""
+        # One timestamp for the whole batch
+        deletion_date = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+        for path in paths:
+            directory = name = None
+            try:
+                with self._lock:
+                    device = self._device_of(path)
+                    directory = self._trash_directory(device, path)
+                    if directory is not None:
+                        name = self._reserve_name(directory, os.path.basename(path))
+
+                if directory is None:
+                    self._trash_elsewhere(path)
+                else:
+                    self._move_to_trash(path, directory, name, deletion_date)
+            except Exception as e:
+                if name is not None:
+                    with self._lock:
+                        directory.names.discard(name)
+                yield path, e
+            else:
+                yield path, None
+
+    def _move_to_trash(self, path, directory, name, deletion_date):
+        original = os.path.abspath(path)
+        if directory.topdir is not None:
+            original = os.path.relpath(original, directory.topdir)
+
+        info_path = os.path.join(directory.info, name + '.trashinfo')
+        fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(f"[Trash Info]\nPath={quote(original)}\nDeletionDate={deletion_date}\n")
+
+        try:
+            os.rename(path, os.path.join(directory.files, name))
+        except OSError as e:
+            os.remove(info_path)
+            if e.errno == errno.EXDEV:
+                # A mount point inside the folder; let send2trash handle it
+                self._trash_elsewhere(path)
+            else:
+                raise
+
+
+def _mount_point(path):
+    device = os.lstat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path or os.lstat(parent).st_dev != device:
+            return path
+        path = parent
+
+
+def _topdir_trash(topdir):
+    """Return the trash directory for a mount point, per the freedesktop spec."""
+    uid = str(os.getuid())
+    shared = os.path.join(topdir, '.Trash')
+    try:
+        mode = os.lstat(shared).st_mode
+        if stat.S_ISDIR(mode) and not stat.S_ISLNK(mode) and mode & stat.S_ISVTX:
+            return os.path.join(shared, uid)
+    except OSError:
+        pass
+    return os.path.join(topdir, f'.Trash-{uid}')
+
+
+class DirectDeleteBackend:
+    """Deletes items permanently, skipping the trash.
+
+    Only meant for data that is regenerated on demand, such as browser
+    caches, when moving it to the trash would be wasted work.
+    """
+
+    def trash(self, path):
+        mode = os.lstat(path).st_mode
+        if stat.S_ISDIR(mode):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    def trash_many(self, paths):
+        """Delete paths, yielding (path, error) pairs in order; error is None on success."""
+        for path in paths:
+            try:
+                self.trash(path)
+            except Exception as e:
+                yield path, e
+            else:
+                yield path, None
+
+
+class TrashBatch:
+    """A batch of TRASH operations carried out with one backend call.
+
+    Executors run it like a single operation; afterwards results holds
+    an error (or None) for each operation, in order, and elapsed the
+    seconds the whole batch took.
+    """
+
+    __slots__ = ('operations', 'backend', 'results', 'elapsed')
+
+    def __init__(self, operations, backend):
+        self.operations = operations
+        self.backend = backend
+        self.results = None
+        self.elapsed = None
+
+    def perform(self, mover=None):
+        started = time.perf_counter()
+        try:
+            self.results = [error for _, error in
+                            self.backend.trash_many([operation.source for operation in self.operations])]
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+
+def get_trash_backend():
+    """Return the best trash backend for this platform."""
+    if sys.platform.startswith('win') or sys.platform == 'darwin':
+        return Send2TrashBackend()
+    return FreedesktopTrashBackend()
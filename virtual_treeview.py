@@ -0,0 +1,113 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualTreeview(ttk.Frame):
+    """A ttk.Treeview for long lists that only has items for the rows in view.
+
+    rows can be any list; format_row turns a row into its column values
+    when it scrolls into view. Scrolling moves a window over the rows
+    and refills the same few items, so a list of a million rows costs no
+    more to show than one of twenty.
+
+    Args:
+        parent: Widget to put the view in
+        columns: List of (heading, width) pairs
+        format_row: Function returning the tuple of values shown for a row
+    """
+
+    # Rows moved by one mouse wheel step
+    wheel_rows = 3
+
+    def __init__(self, parent, columns, format_row=tuple, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.format_row = format_row
+        self.rows = []
+        self.first = 0
+
+        names = [f"column{index}" for index in range(len(columns))]
+        # Items are reused for whichever rows are in view, so they can't
+        # be selected
+        self.tree = ttk.Treeview(self, columns=names, show='headings', selectmode='none')
+        for name, (heading, width) in zip(names, columns):
+            self.tree.heading(name, text=heading, anchor=tk.W)
+            self.tree.column(name, width=width, anchor=tk.W)
+        self.visible = int(self.tree.cget('height'))
+        self._items = []
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<Configure>', self._resized)
+        self.tree.bind('<MouseWheel>', self._wheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll_to(self.first - self.wheel_rows))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_to(self.first + self.wheel_rows))
+
+    def set_rows(self, rows):
+        """Show rows from the top, replacing the current ones."""
+        self.rows = rows
+        self.first = 0
+        self.refresh()
+
+    def extend(self, rows):
+        """Add rows at the end; the view is only redrawn if they come into it."""
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if start < self.first + self.visible:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def scroll_to(self, first):
+        """Scroll so row first is at the top."""
+        first = max(0, min(first, len(self.rows) - self.visible))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def refresh(self):
+        """Fill the items with the rows in view."""
+        rows = self.rows[self.first:self.first + self.visible]
+        items = self._items
+        while len(items) < len(rows):
+            items.append(self.tree.insert('', tk.END))
+        while len(items) > len(rows):
+            self.tree.delete(items.pop())
+        for item, row in zip(items, rows):
+            self.tree.item(item, values=self.format_row(row))
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.visible) / total)
+
+    def _scroll(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(round(float(amount) * len(self.rows)))
+        elif action == tk.SCROLL:
+            step = max(self.visible - 1, 1) if unit == tk.PAGES else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def _wheel(self, event):
+        # Windows reports steps of 120, macOS steps of 1
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.first - steps * self.wheel_rows)
+
+    def _resized(self, event):
+        # Fit as many rows as there is room for, measured from an item
+        if not self._items:
+            return
+        bbox = self.tree.bbox(self._items[0])
+        if not bbox:
+            return
+        _, top, _, row_height = bbox
+        visible = max(1, (event.height - top) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            # Growing at the end of the list shows more rows above instead
+            self.first = max(0, min(self.first, len(self.rows) - visible))
+            self.refresh()